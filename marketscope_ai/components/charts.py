@@ -5,34 +5,77 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
+from utils.downsample import DEFAULT_POINT_BUDGET, fit_ohlcv, line_positions
+from utils.bar_store import BarPyramid
+from utils.indicators import IndicatorSet
+from utils.ohlcv import as_ohlcv
+from components.figure_encoding import (count_array, direction_marker, float_array, scatter_trace,
+                                        sign_marker, time_axis)
 
-def create_candlestick_chart(price_data, symbol: str, height: int = 400):
+
+def _take(values, positions):
+    """Select plotted rows from an array/Index/Series (all rows when positions is None)"""
+    if positions is None:
+        return values
+    if isinstance(values, pd.Series):
+        return values.iloc[positions]
+    return values[positions]
+
+
+def _indicator_set(price_data):
+    """IndicatorSet for a container, DataFrame or existing set (None if unusable)"""
+    if isinstance(price_data, IndicatorSet):
+        return price_data
+    bars = as_ohlcv(price_data)
+    if bars is None or bars.empty:
+        return None
+    return IndicatorSet(bars)
+
+
+def _resolve_bars(price_data, start=None, end=None, max_points: int = None):
+    """
+    OHLCV container to plot: the pyramid level that fits the range and point
+    budget, or the given bars (bucket-aggregated if they are too long)
+    """
+    if isinstance(price_data, BarPyramid):
+        _, price_data = price_data.select(start, end, max_points or DEFAULT_POINT_BUDGET)
+    elif isinstance(price_data, IndicatorSet):
+        price_data = price_data.bars
+    return fit_ohlcv(as_ohlcv(price_data), max_points)
+
+
+def create_candlestick_chart(price_data, symbol: str, height: int = 400, max_points: int = None,
+                             start=None, end=None):
     """
     Create a candlestick chart with price data
     
     Args:
-        price_data: DataFrame with OHLC data
+        price_data: OHLCV container, DataFrame or IndicatorSet, or a BarPyramid
         symbol: Stock symbol for title
         height: Chart height in pixels
+        max_points: Point budget for long series (bars are bucket-aggregated)
+        start, end: Date range to read when price_data is a BarPyramid
     
     Returns:
         Plotly figure object
     """
-    if price_data is None or price_data.empty:
+    bars = _resolve_bars(price_data, start, end, max_points) if price_data is not None else None
+    if bars is None or bars.empty:
         return None
         
     fig = go.Figure(data=[go.Candlestick(
-        x=price_data.index,
-        open=price_data['Open'],
-        high=price_data['High'],
-        low=price_data['Low'],
-        close=price_data['Close'],
+        **time_axis(bars.index, allow_step=False),
+        open=float_array(bars.open),
+        high=float_array(bars.high),
+        low=float_array(bars.low),
+        close=float_array(bars.close),
         name="Price"
     )])
     
     fig.update_layout(
         title=f'{symbol.upper()} - Candlestick Chart',
         xaxis_title='Date',
+        xaxis_type='date',
         yaxis_title='Price ($)',
         height=height,
         xaxis_rangeslider_visible=False,
@@ -43,37 +86,39 @@ def create_candlestick_chart(price_data, symbol: str, height: int = 400):
     return fig
 
 
-def create_volume_chart(price_data, symbol: str, height: int = 250):
+def create_volume_chart(price_data, symbol: str, height: int = 250, max_points: int = None,
+                        start=None, end=None):
     """
     Create a volume bar chart
     
     Args:
-        price_data: DataFrame with Volume column
+        price_data: OHLCV container, DataFrame or IndicatorSet with volume, or a BarPyramid
         symbol: Stock symbol for title
         height: Chart height in pixels
+        max_points: Point budget for long series (bars are bucket-aggregated)
+        start, end: Date range to read when price_data is a BarPyramid
     
     Returns:
         Plotly figure object
     """
-    if price_data is None or price_data.empty or 'Volume' not in price_data.columns:
+    bars = _resolve_bars(price_data, start, end, max_points) if price_data is not None else None
+    if bars is None or bars.empty or bars.volume is None:
         return None
     
-    # Color bars based on price direction
-    colors = ['green' if close >= open_price else 'red' 
-              for close, open_price in zip(price_data['Close'], price_data['Open'])]
-    
     fig = go.Figure()
     fig.add_trace(go.Bar(
-        x=price_data.index,
-        y=price_data['Volume'],
+        **time_axis(bars.index),
+        y=count_array(bars.volume),
         name='Volume',
-        marker_color=colors,
+        # Color bars based on price direction
+        marker=direction_marker(bars.open, bars.close),
         opacity=0.7
     ))
     
     fig.update_layout(
         title=f'{symbol.upper()} - Trading Volume',
         xaxis_title='Date',
+        xaxis_type='date',
         yaxis_title='Volume',
         height=height,
         template='plotly_white',
@@ -83,28 +128,36 @@ def create_volume_chart(price_data, symbol: str, height: int = 250):
     return fig
 
 
-def create_price_with_moving_averages(price_data, symbol: str, windows=[20, 50], height: int = 400):
+def create_price_with_moving_averages(price_data, symbol: str, windows=[20, 50], height: int = 400,
+                                      max_points: int = None):
     """
     Create a price chart with moving averages
     
     Args:
-        price_data: DataFrame with Close column
+        price_data: OHLCV container, DataFrame or IndicatorSet
         symbol: Stock symbol for title
         windows: List of moving average windows
         height: Chart height in pixels
+        max_points: Point budget for long series (LTTB-downsampled)
     
     Returns:
         Plotly figure object
     """
-    if price_data is None or price_data.empty or 'Close' not in price_data.columns:
+    indicators = _indicator_set(price_data)
+    if indicators is None:
         return None
+    bars = indicators.bars
+    
+    # Indicators use the full series; only the plotted points are thinned
+    positions = line_positions(bars.close, max_points)
+    x = time_axis(_take(bars.index, positions))
         
     fig = go.Figure()
     
     # Add close price
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
-        y=price_data['Close'],
+    fig.add_trace(scatter_trace(
+        **x,
+        y=float_array(_take(bars.close, positions)),
         mode='lines',
         name='Close Price',
         line=dict(color='blue', width=2)
@@ -113,10 +166,10 @@ def create_price_with_moving_averages(price_data, symbol: str, windows=[20, 50],
     # Add moving averages
     colors = ['orange', 'red', 'purple', 'brown']
     for i, window in enumerate(windows):
-        ma = price_data['Close'].rolling(window=window).mean()
-        fig.add_trace(go.Scatter(
-            x=price_data.index,
-            y=ma,
+        ma = indicators.get('sma', window=window)['sma']
+        fig.add_trace(scatter_trace(
+            **x,
+            y=float_array(_take(ma, positions)),
             mode='lines',
             name=f'{window}-Day MA',
             line=dict(color=colors[i % len(colors)], width=1.5)
@@ -125,6 +178,7 @@ def create_price_with_moving_averages(price_data, symbol: str, windows=[20, 50],
     fig.update_layout(
         title=f'{symbol.upper()} - Price with Moving Averages',
         xaxis_title='Date',
+        xaxis_type='date',
         yaxis_title='Price ($)',
         height=height,
         template='plotly_white',
@@ -244,52 +298,56 @@ def create_earnings_trend_chart(earnings_data, symbol: str, chart_type='annual',
     return fig
 
 
-def create_bollinger_bands_chart(price_data, symbol: str, window=20, height: int = 400):
+def create_bollinger_bands_chart(price_data, symbol: str, window=20, height: int = 400, max_points: int = None):
     """
     Create a Bollinger Bands chart
     
     Args:
-        price_data: DataFrame with Close column
+        price_data: OHLCV container, DataFrame or IndicatorSet
         symbol: Stock symbol for title
         window: Rolling window for calculations
         height: Chart height in pixels
+        max_points: Point budget for long series (LTTB-downsampled)
     
     Returns:
         Plotly figure object
     """
-    if price_data is None or price_data.empty or 'Close' not in price_data.columns:
+    indicators = _indicator_set(price_data)
+    if indicators is None:
         return None
+    bars = indicators.bars
         
     # Calculate Bollinger Bands
-    sma = price_data['Close'].rolling(window=window).mean()
-    std = price_data['Close'].rolling(window=window).std()
-    upper_band = sma + (2 * std)
-    lower_band = sma - (2 * std)
+    bands = indicators.get('bollinger', window=window)
+    middle, upper_band, lower_band = bands['middle'], bands['upper'], bands['lower']
+    
+    positions = line_positions(bars.close, max_points)
+    x = time_axis(_take(bars.index, positions))
     
     fig = go.Figure()
     
     # Add price line
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
-        y=price_data['Close'],
+    fig.add_trace(scatter_trace(
+        **x,
+        y=float_array(_take(bars.close, positions)),
         mode='lines',
         name='Close Price',
         line=dict(color='blue', width=2)
     ))
     
     # Add upper band
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
-        y=upper_band,
+    fig.add_trace(scatter_trace(
+        **x,
+        y=float_array(_take(upper_band, positions)),
         mode='lines',
         name='Upper Band',
         line=dict(color='red', dash='dash', width=1)
     ))
     
     # Add lower band
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
-        y=lower_band,
+    fig.add_trace(scatter_trace(
+        **x,
+        y=float_array(_take(lower_band, positions)),
         mode='lines',
         name='Lower Band',
         line=dict(color='red', dash='dash', width=1),
@@ -298,9 +356,9 @@ def create_bollinger_bands_chart(price_data, symbol: str, window=20, height: int
     ))
     
     # Add middle line (SMA)
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
-        y=sma,
+    fig.add_trace(scatter_trace(
+        **x,
+        y=float_array(_take(middle, positions)),
         mode='lines',
         name=f'{window}-Day SMA',
         line=dict(color='orange', width=1)
@@ -309,6 +367,7 @@ def create_bollinger_bands_chart(price_data, symbol: str, window=20, height: int
     fig.update_layout(
         title=f'{symbol.upper()} - Bollinger Bands ({window} days)',
         xaxis_title='Date',
+        xaxis_type='date',
         yaxis_title='Price ($)',
         height=height,
         template='plotly_white',
@@ -318,37 +377,35 @@ def create_bollinger_bands_chart(price_data, symbol: str, window=20, height: int
     return fig
 
 
-def create_rsi_chart(price_data, symbol: str, period=14, height: int = 250):
+def create_rsi_chart(price_data, symbol: str, period=14, height: int = 250, max_points: int = None):
     """
     Create an RSI (Relative Strength Index) chart
     
     Args:
-        price_data: DataFrame with Close column
+        price_data: OHLCV container, DataFrame or IndicatorSet
         symbol: Stock symbol for title
         period: RSI calculation period
         height: Chart height in pixels
+        max_points: Point budget for long series (LTTB-downsampled)
     
     Returns:
         Plotly figure object
     """
-    if price_data is None or price_data.empty or 'Close' not in price_data.columns:
+    indicators = _indicator_set(price_data)
+    if indicators is None:
         return None
+    bars = indicators.bars
         
     # Calculate RSI
-    delta = price_data['Close'].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
+    rsi = indicators.get('rsi', period=period)['rsi']
     
     fig = go.Figure()
     
     # Add RSI line
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
-        y=rsi,
+    positions = line_positions(rsi, max_points)
+    fig.add_trace(scatter_trace(
+        **time_axis(_take(bars.index, positions)),
+        y=float_array(_take(rsi, positions)),
         mode='lines',
         name=f'RSI ({period})',
         line=dict(color='purple', width=2)
@@ -363,6 +420,7 @@ def create_rsi_chart(price_data, symbol: str, period=14, height: int = 250):
     fig.update_layout(
         title=f'{symbol.upper()} - RSI ({period} days)',
         xaxis_title='Date',
+        xaxis_type='date',
         yaxis_title='RSI',
         height=height,
         yaxis=dict(range=[0, 100]),
@@ -372,30 +430,35 @@ def create_rsi_chart(price_data, symbol: str, period=14, height: int = 250):
     return fig
 
 
-def create_macd_chart(price_data, symbol: str, fast=12, slow=26, signal=9, height: int = 300):
+def create_macd_chart(price_data, symbol: str, fast=12, slow=26, signal=9, height: int = 300,
+                      max_points: int = None):
     """
     Create a MACD chart
     
     Args:
-        price_data: DataFrame with Close column
+        price_data: OHLCV container, DataFrame or IndicatorSet
         symbol: Stock symbol for title
         fast: Fast EMA period
         slow: Slow EMA period
         signal: Signal line period
         height: Chart height in pixels
+        max_points: Point budget for long series (LTTB-downsampled)
     
     Returns:
         Plotly figure object
     """
-    if price_data is None or price_data.empty or 'Close' not in price_data.columns:
+    indicators = _indicator_set(price_data)
+    if indicators is None:
         return None
+    bars = indicators.bars
         
     # Calculate MACD
-    exp1 = price_data['Close'].ewm(span=fast).mean()
-    exp2 = price_data['Close'].ewm(span=slow).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal).mean()
-    histogram = macd - signal_line
+    lines = indicators.get('macd', fast=fast, slow=slow, signal=signal)
+    macd, signal_line, histogram = lines['macd'], lines['signal'], lines['histogram']
+    
+    positions = line_positions(macd, max_points)
+    x = time_axis(_take(bars.index, positions))
+    macd, signal_line, histogram = (float_array(_take(s, positions)) for s in (macd, signal_line, histogram))
     
     # Create subplots
     fig = make_subplots(
@@ -407,8 +470,8 @@ def create_macd_chart(price_data, symbol: str, fast=12, slow=26, signal=9, heigh
     )
     
     # Add MACD line
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
+    fig.add_trace(scatter_trace(
+        **x,
         y=macd,
         mode='lines',
         name='MACD',
@@ -416,8 +479,8 @@ def create_macd_chart(price_data, symbol: str, fast=12, slow=26, signal=9, heigh
     ), row=1, col=1)
     
     # Add Signal line
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
+    fig.add_trace(scatter_trace(
+        **x,
         y=signal_line,
         mode='lines',
         name='Signal',
@@ -425,12 +488,11 @@ def create_macd_chart(price_data, symbol: str, fast=12, slow=26, signal=9, heigh
     ), row=1, col=1)
     
     # Add histogram
-    colors = ['green' if val >= 0 else 'red' for val in histogram]
     fig.add_trace(go.Bar(
-        x=price_data.index,
+        **x,
         y=histogram,
         name='Histogram',
-        marker_color=colors,
+        marker=sign_marker(histogram),
         opacity=0.7
     ), row=2, col=1)
     
@@ -440,35 +502,39 @@ def create_macd_chart(price_data, symbol: str, fast=12, slow=26, signal=9, heigh
         template='plotly_white',
         showlegend=True
     )
+    fig.update_xaxes(type='date')
     
     return fig
 
 
-def create_volatility_chart(price_data, symbol: str, window=20, height: int = 300):
+def create_volatility_chart(price_data, symbol: str, window=20, height: int = 300, max_points: int = None):
     """
     Create a volatility chart
     
     Args:
-        price_data: DataFrame with Close column
+        price_data: OHLCV container, DataFrame or IndicatorSet
         symbol: Stock symbol for title
         window: Rolling window for volatility calculation
         height: Chart height in pixels
+        max_points: Point budget for long series (LTTB-downsampled)
     
     Returns:
         Plotly figure object
     """
-    if price_data is None or price_data.empty or 'Close' not in price_data.columns:
+    indicators = _indicator_set(price_data)
+    if indicators is None:
         return None
+    bars = indicators.bars
         
     # Calculate returns and rolling volatility
-    returns = price_data['Close'].pct_change()
-    rolling_vol = returns.rolling(window=window).std() * np.sqrt(252)  # Annualized
+    rolling_vol = indicators.get('volatility', window=window)['volatility']  # Annualized
     
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
-        x=price_data.index,
-        y=rolling_vol,
+    positions = line_positions(rolling_vol, max_points)
+    fig.add_trace(scatter_trace(
+        **time_axis(_take(bars.index, positions)),
+        y=float_array(_take(rolling_vol, positions)),
         mode='lines',
         name=f'{window}-Day Volatility',
         line=dict(color='red', width=2),
@@ -478,6 +544,7 @@ def create_volatility_chart(price_data, symbol: str, window=20, height: int = 30
     fig.update_layout(
         title=f'{symbol.upper()} - Rolling Volatility ({window} days)',
         xaxis_title='Date',
+        xaxis_type='date',
         yaxis_title='Annualized Volatility',
         height=height,
         template='plotly_white',
@@ -487,19 +554,23 @@ def create_volatility_chart(price_data, symbol: str, window=20, height: int = 30
     return fig
 
 
-def create_combined_price_volume_chart(price_data, symbol: str, height: int = 600):
+def create_combined_price_volume_chart(price_data, symbol: str, height: int = 600, max_points: int = None,
+                                       start=None, end=None):
     """
     Create a combined price and volume chart with subplots
     
     Args:
-        price_data: DataFrame with OHLCV data
+        price_data: OHLCV container, DataFrame or IndicatorSet, or a BarPyramid
         symbol: Stock symbol for title
         height: Chart height in pixels
+        max_points: Point budget for long series (bars are bucket-aggregated)
+        start, end: Date range to read when price_data is a BarPyramid
     
     Returns:
         Plotly figure object
     """
-    if price_data is None or price_data.empty:
+    bars = _resolve_bars(price_data, start, end, max_points) if price_data is not None else None
+    if bars is None or bars.empty:
         return None
         
     # Create subplots
@@ -511,26 +582,26 @@ def create_combined_price_volume_chart(price_data, symbol: str, height: int = 60
         row_heights=[0.7, 0.3]
     )
     
+    # Both panels share one encoded time axis
+    x = time_axis(bars.index, allow_step=False)
+    
     # Add candlestick chart
     fig.add_trace(go.Candlestick(
-        x=price_data.index,
-        open=price_data['Open'],
-        high=price_data['High'],
-        low=price_data['Low'],
-        close=price_data['Close'],
+        **x,
+        open=float_array(bars.open),
+        high=float_array(bars.high),
+        low=float_array(bars.low),
+        close=float_array(bars.close),
         name="Price"
     ), row=1, col=1)
     
     # Add volume bars (if available)
-    if 'Volume' in price_data.columns:
-        colors = ['green' if close >= open_price else 'red' 
-                  for close, open_price in zip(price_data['Close'], price_data['Open'])]
-        
+    if bars.volume is not None:
         fig.add_trace(go.Bar(
-            x=price_data.index,
-            y=price_data['Volume'],
+            **x,
+            y=count_array(bars.volume),
             name='Volume',
-            marker_color=colors,
+            marker=direction_marker(bars.open, bars.close),
             opacity=0.7
         ), row=2, col=1)
     
@@ -541,39 +612,832 @@ def create_combined_price_volume_chart(price_data, symbol: str, height: int = 60
         xaxis_rangeslider_visible=False,
         showlegend=False
     )
+    fig.update_xaxes(type='date')
     
     return fig
 
 
 def prepare_chart_data(price_data):
     """
-    Prepare and validate data for charting
+    Validate price data once into a compact OHLCV container for charting
+    
+    Args:
+        price_data: Raw price DataFrame (or an existing OHLCV container)
+    
+    Returns:
+        OHLCV container shared by all chart builders, or None if unusable
+    """
+    return as_ohlcv(price_data)
+
+def create_event_study_chart(summary, symbol: str, height: int = 350):
+    """
+    Create a grouped bar chart of mean abnormal return after news, by sentiment
     
     Args:
-        price_data: Raw price data
+        summary: DataFrame from summarize_event_study
+        symbol: Stock symbol for title
+        height: Chart height in pixels
     
     Returns:
-        Processed DataFrame ready for charting
+        Plotly figure object
     """
-    if price_data is None or price_data.empty:
+    if summary is None or summary.empty:
         return None
     
-    # Ensure we have the required columns
-    required_columns = ['Open', 'High', 'Low', 'Close']
-    if not all(col in price_data.columns for col in required_columns):
+    colors = {'Positive': 'green', 'Neutral': 'gray', 'Negative': 'red'}
+    
+    fig = go.Figure()
+    for sentiment, group in summary.groupby('sentiment', sort=False):
+        fig.add_trace(go.Bar(
+            x=[f'{w} bars' for w in group['window']],
+            y=group['mean_abnormal'],
+            name=sentiment,
+            marker_color=colors.get(sentiment, 'blue'),
+            opacity=0.8,
+            customdata=np.column_stack([group['events'], group['hit_rate']]),
+            hovertemplate='%{y:.2%} mean abnormal<br>%{customdata[0]} events, '
+                          '%{customdata[1]:.0%} positive<extra>' + sentiment + '</extra>'
+        ))
+    
+    fig.add_hline(y=0, line_color='black', line_width=1)
+    
+    fig.update_layout(
+        title=f'{symbol.upper()} - Abnormal Return After News',
+        xaxis_title='Window after publication',
+        yaxis_title='Mean Abnormal Return',
+        height=height,
+        barmode='group',
+        template='plotly_white',
+        yaxis_tickformat='.1%'
+    )
+    
+    return fig
+
+
+def create_keyword_chart(terms, symbol: str, height: int = 400):
+    """
+    Create a horizontal bar chart of top emerging news terms
+    
+    Args:
+        terms: DataFrame from NewsKeywordModel.top_terms
+        symbol: Stock symbol (or scope label) for title
+        height: Chart height in pixels
+    
+    Returns:
+        Plotly figure object
+    """
+    if terms is None or terms.empty:
         return None
     
-    # Remove any rows with NaN values in OHLC data
-    price_data = price_data.dropna(subset=required_columns)
+    terms = terms.iloc[::-1]
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=terms['score'],
+        y=terms['term'],
+        orientation='h',
+        marker_color='steelblue',
+        opacity=0.8,
+        customdata=np.column_stack([terms['count'], terms['baseline_count'], terms['lift']]),
+        hovertemplate='%{y}<br>%{customdata[0]} mentions (prev. %{customdata[1]})'
+                      '<br>lift %{customdata[2]:.1f}x<extra></extra>'
+    ))
     
-    if price_data.empty:
+    fig.update_layout(
+        title=f'{symbol.upper()} - What\'s Driving the News',
+        xaxis_title='Emerging Score',
+        height=height,
+        template='plotly_white',
+        showlegend=False
+    )
+
+    return fig
+
+
+def create_backtest_chart(result, symbol: str, benchmark=None, height: int = 550, max_points: int = None,
+                          max_symbols: int = 10):
+    """
+    Create an equity curve and drawdown chart for a backtest
+
+    Args:
+        result: BacktestResult from run_backtest
+        symbol: Stock symbol (or watchlist label) for title
+        benchmark: Optional BacktestResult (e.g. buy and hold) drawn dashed
+        height: Chart height in pixels
+        max_points: Point budget for long series (LTTB-downsampled)
+        max_symbols: Per-symbol curves are drawn only for up to this many symbols
+
+    Returns:
+        Plotly figure object
+    """
+    if result is None or len(result.portfolio_equity) == 0:
         return None
+
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=('Equity', 'Drawdown'),
+        row_heights=[0.7, 0.3]
+    )
+
+    def x_for(positions):
+        index = _take(result.index, positions)
+        if isinstance(index, pd.DatetimeIndex):
+            return time_axis(index)
+        return {'x': np.asarray(index)}
+
+    if len(result.symbols) > 1 and len(result.symbols) <= max_symbols:
+        for j, name in enumerate(result.symbols):
+            positions = line_positions(result.equity[:, j], max_points)
+            fig.add_trace(scatter_trace(
+                **x_for(positions),
+                y=float_array(_take(result.equity[:, j], positions)),
+                mode='lines',
+                name=str(name),
+                line=dict(width=1),
+                opacity=0.5
+            ), row=1, col=1)
+
+    if benchmark is not None:
+        positions = line_positions(benchmark.portfolio_equity, max_points)
+        fig.add_trace(scatter_trace(
+            **x_for(positions),
+            y=float_array(_take(benchmark.portfolio_equity, positions)),
+            mode='lines',
+            name='Buy & Hold',
+            line=dict(color='gray', width=1.5, dash='dash')
+        ), row=1, col=1)
+
+    positions = line_positions(result.portfolio_equity, max_points)
+    fig.add_trace(scatter_trace(
+        **x_for(positions),
+        y=float_array(_take(result.portfolio_equity, positions)),
+        mode='lines',
+        name='Strategy',
+        line=dict(color='blue', width=2)
+    ), row=1, col=1)
+
+    positions = line_positions(result.portfolio_drawdown, max_points)
+    fig.add_trace(scatter_trace(
+        **x_for(positions),
+        y=float_array(_take(result.portfolio_drawdown, positions)),
+        mode='lines',
+        name='Drawdown',
+        fill='tozeroy',
+        line=dict(color='red', width=1),
+        showlegend=False
+    ), row=2, col=1)
+
+    fig.update_layout(
+        title=f'{symbol.upper()} - Backtest',
+        height=height,
+        template='plotly_white',
+        yaxis2_tickformat='.0%',
+        hovermode='x unified'
+    )
+    if isinstance(result.index, pd.DatetimeIndex):
+        fig.update_xaxes(type='date')
+
+    return fig
+
+
+def create_relative_stats_chart(stats: dict, symbol: str, benchmark: str, height: int = 650,
+                                max_points: int = None):
+    """
+    Create rolling beta, correlation, alpha and tracking error panels
+
+    Args:
+        stats: Dict of stat name -> (time x symbol) DataFrame from utils.relative_stats
+        symbol: Column of the frames to draw
+        benchmark: Benchmark symbol for titles
+        height: Chart height in pixels
+        max_points: Point budget for long series (LTTB-downsampled)
+
+    Returns:
+        Plotly figure object
+    """
+    if not stats or symbol not in stats['beta'].columns:
+        return None
+
+    fig = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.06,
+        subplot_titles=(f'Beta vs {benchmark}', 'Correlation', 'Alpha & Tracking Error (annualized)')
+    )
+    panels = (
+        ('beta', 'Beta', 'blue', 1),
+        ('correlation', 'Correlation', 'purple', 2),
+        ('alpha', 'Alpha', 'green', 3),
+        ('tracking_error', 'Tracking Error', 'orange', 3),
+    )
+    for name, label, color, row in panels:
+        series = stats[name][symbol]
+        positions = line_positions(series.to_numpy(), max_points)
+        fig.add_trace(scatter_trace(
+            **time_axis(_take(series.index, positions)),
+            y=float_array(_take(series.to_numpy(), positions)),
+            mode='lines',
+            name=label,
+            line=dict(color=color, width=1.5)
+        ), row=row, col=1)
+
+    fig.add_hline(y=1, line_dash="dash", line_color="gray", row=1, col=1)
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", row=2, col=1)
+    fig.update_layout(
+        title=f'{symbol.upper()} vs {benchmark} - Rolling Relative Statistics',
+        height=height,
+        template='plotly_white',
+        yaxis3_tickformat='.0%',
+        hovermode='x unified'
+    )
+    fig.update_xaxes(type='date')
+
+    return fig
+
+
+def create_spread_chart(spread: pd.DataFrame, y: str, x: str, hedge_ratio: float, entry_z: float = 2.0,
+                        height: int = 500, max_points: int = None):
+    """
+    Create a pair spread chart with its z-score and entry bands
+
+    Args:
+        spread: DataFrame with 'spread' and 'zscore' columns (utils.pairs.pair_spread)
+        y, x: Dependent and hedge symbols
+        hedge_ratio: Units of log(x) per unit of log(y), for the title
+        entry_z: Z-score bands drawn on the lower panel
+
+    Returns:
+        Plotly figure object
+    """
+    if spread is None or spread.empty:
+        return None
+
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.06,
+        subplot_titles=('Log-Price Spread', 'Z-Score'),
+        row_heights=[0.5, 0.5]
+    )
+    for row, (column, color) in enumerate((('spread', 'blue'), ('zscore', 'purple')), start=1):
+        values = spread[column].to_numpy()
+        positions = line_positions(values, max_points)
+        fig.add_trace(scatter_trace(
+            **time_axis(_take(spread.index, positions)),
+            y=float_array(_take(values, positions)),
+            mode='lines',
+            name=column.title(),
+            line=dict(color=color, width=1.5)
+        ), row=row, col=1)
+
+    for level, color in ((entry_z, 'red'), (0, 'gray'), (-entry_z, 'green')):
+        fig.add_hline(y=level, line_dash="dash", line_color=color, row=2, col=1)
+
+    fig.update_layout(
+        title=f'{y} - {hedge_ratio:.2f} x {x} Spread',
+        height=height,
+        template='plotly_white',
+        hovermode='x unified'
+    )
+    fig.update_xaxes(type='date')
+
+    return fig
+
+
+def create_fan_chart(simulation, symbol: str, history: pd.Series = None, future_index=None,
+                     n_samples: int = 10, height: int = 550):
+    """
+    Create a forward price fan chart from a Monte Carlo simulation
+
+    Args:
+        simulation: PathSimulation from utils.simulation
+        symbol: Stock symbol for title
+        history: Optional recent closes drawn before the fan
+        future_index: Dates of the simulated steps (start bar first); step
+            numbers when omitted
+        n_samples: Example paths drawn faintly
+
+    Returns:
+        Plotly figure object
+    """
+    if simulation is None or simulation.n_paths == 0:
+        return None
+
+    x = future_index if future_index is not None else np.arange(simulation.horizon + 1)
+    quantiles = simulation.quantiles()
+    fig = go.Figure()
+
+    if history is not None and not history.empty:
+        fig.add_trace(go.Scatter(x=history.index, y=float_array(history), mode='lines', name='History',
+                                 line=dict(color='black', width=1.5)))
+
+    for path in simulation.sample_paths()[:n_samples]:
+        fig.add_trace(go.Scatter(x=x, y=float_array(path), mode='lines', line=dict(color='gray', width=0.5),
+                                 opacity=0.35, showlegend=False, hoverinfo='skip'))
+
+    for lo, hi, color, label in ((0.05, 0.95, 'rgba(43,139,230,0.15)', '5-95%'),
+                                 (0.25, 0.75, 'rgba(43,139,230,0.35)', '25-75%')):
+        fig.add_trace(go.Scatter(x=x, y=float_array(quantiles[hi]), mode='lines', line=dict(width=0),
+                                 showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=x, y=float_array(quantiles[lo]), mode='lines', line=dict(width=0),
+                                 fill='tonexty', fillcolor=color, name=label))
+
+    fig.add_trace(go.Scatter(x=x, y=float_array(quantiles[0.5]), mode='lines', name='Median',
+                             line=dict(color='blue', width=2)))
+    fig.add_trace(go.Scatter(x=x, y=float_array(simulation.mean_path()), mode='lines', name='Mean',
+                             line=dict(color='orange', width=1.5, dash='dash')))
+
+    fig.update_layout(
+        title=f'{symbol.upper()} - {simulation.n_paths:,} Simulated Paths ({simulation.method.upper()})',
+        xaxis_title='Date' if future_index is not None else 'Bars ahead',
+        yaxis_title='Price',
+        height=height,
+        template='plotly_white',
+        hovermode='x unified'
+    )
+
+    return fig
+
+
+def create_portfolio_chart(analytics, title: str = 'Portfolio', top: int = 10, height: int = 600,
+                           max_points: int = None):
+    """
+    Create a portfolio value chart with a stacked weights panel
+
+    Args:
+        analytics: PortfolioAnalytics from analyze_portfolio
+        title: Chart title prefix
+        top: Holdings shown individually (largest by latest value); the rest are grouped
+        height: Chart height in pixels
+        max_points: Point budget for long series (LTTB-downsampled)
+
+    Returns:
+        Plotly figure object
+    """
+    if analytics is None or len(analytics.nav) == 0:
+        return None
+
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=(f'Value ({analytics.base_currency})', 'Weights'),
+        row_heights=[0.55, 0.45]
+    )
+
+    positions = line_positions(analytics.nav, max_points)
+    x = time_axis(_take(analytics.index, positions))
+
+    fig.add_trace(scatter_trace(
+        **x,
+        y=float_array(_take(analytics.nav, positions)),
+        mode='lines',
+        name='Portfolio Value',
+        line=dict(color='blue', width=2)
+    ), row=1, col=1)
+
+    # Largest holdings individually, everything else as one band
+    order = np.argsort(analytics.values[-1])[::-1]
+    weights = _take(analytics.weights, positions)
+    shown = order[:top]
+    bands = [(str(analytics.holdings['symbol'].iloc[j]), weights[:, j]) for j in shown]
+    if len(order) > top:
+        bands.append(('Other', weights[:, order[top:]].sum(axis=1)))
+    for name, band in bands:
+        # Stacked areas need SVG traces (Scattergl has no stackgroup)
+        fig.add_trace(go.Scatter(
+            **x,
+            y=float_array(band),
+            mode='lines',
+            name=name,
+            stackgroup='weights',
+            line=dict(width=0.5)
+        ), row=2, col=1)
+
+    fig.update_layout(
+        title=f'{title} - Value & Allocation',
+        height=height,
+        template='plotly_white',
+        yaxis2_tickformat='.0%',
+        hovermode='x unified'
+    )
+    fig.update_xaxes(type='date')
+
+    return fig
+
+
+def create_frontier_chart(frontier: dict, portfolios: dict = None, title: str = 'Portfolio', height: int = 500):
+    """
+    Create an efficient frontier chart (volatility vs expected return)
+
+    Args:
+        frontier: Dict from utils.optimizer.efficient_frontier
+        portfolios: Optional label -> (volatility, expected return) markers
+        title: Chart title prefix
+        height: Chart height in pixels
+
+    Returns:
+        Plotly figure object
+    """
+    if not frontier or len(frontier['returns']) == 0:
+        return None
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=float_array(frontier['volatility']),
+        y=float_array(frontier['returns']),
+        mode='lines+markers',
+        name='Efficient Frontier',
+        line=dict(color='blue', width=2),
+        marker=dict(size=4, color=float_array(frontier['sharpe']), colorscale='Viridis',
+                    colorbar=dict(title='Sharpe')),
+        hovertemplate='Vol %{x:.2%}<br>Return %{y:.2%}<extra></extra>'
+    ))
+    for label, (volatility, expected) in (portfolios or {}).items():
+        fig.add_trace(go.Scatter(
+            x=[volatility], y=[expected],
+            mode='markers+text',
+            name=label,
+            text=[label],
+            textposition='top center',
+            marker=dict(size=11, symbol='diamond')
+        ))
+
+    fig.update_layout(
+        title=f'{title} - Efficient Frontier (annualized)',
+        xaxis_title='Volatility',
+        yaxis_title='Expected Return',
+        xaxis_tickformat='.0%',
+        yaxis_tickformat='.0%',
+        height=height,
+        template='plotly_white',
+        showlegend=False
+    )
+
+    return fig
+
+
+def create_drift_chart(analytics, title: str = 'Portfolio', top: int = 15, height: int = 400):
+    """
+    Create a bar chart of current weight drift from target per holding
+
+    Args:
+        analytics: PortfolioAnalytics from analyze_portfolio
+        title: Chart title prefix
+        top: Number of holdings with the largest absolute drift to show
+        height: Chart height in pixels
+
+    Returns:
+        Plotly figure object
+    """
+    if analytics is None or len(analytics.nav) == 0:
+        return None
+
+    drift = analytics.drift[-1]
+    order = np.argsort(np.abs(drift))[::-1][:top][::-1]
+    symbols = analytics.holdings['symbol'].to_numpy()[order]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=drift[order],
+        y=symbols,
+        orientation='h',
+        marker=sign_marker(drift[order]),
+        customdata=np.column_stack([analytics.weights[-1][order], analytics.target_weights[order]]),
+        hovertemplate='%{y}: %{x:+.2%}<br>weight %{customdata[0]:.2%}, '
+                      'target %{customdata[1]:.2%}<extra></extra>'
+    ))
+
+    fig.add_vline(x=0, line_color='black', line_width=1)
+
+    fig.update_layout(
+        title=f'{title} - Drift from Target Weights',
+        xaxis_title='Weight - Target',
+        xaxis_tickformat='.1%',
+        height=height,
+        template='plotly_white',
+        showlegend=False
+    )
+
+    return fig
+
+
+def create_sweep_heatmap(results, symbol: str, metric: str = 'hit_rate', signal_name: str = '',
+                         height: int = 450):
+    """
+    Create a heatmap of a parameter sweep metric per parameter pair
+
+    Args:
+        results: Dict of metric -> DataFrame from run_sweep
+        symbol: Stock symbol (or watchlist label) for title
+        metric: 'hit_rate', 'mean_return' or 'signals'
+        signal_name: Swept signal, for the title
+        height: Chart height in pixels
+
+    Returns:
+        Plotly figure object
+    """
+    if not results or metric not in results:
+        return None
+
+    grid = results[metric]
+    signals = results['signals']
+    labels = {'hit_rate': 'Hit Rate', 'mean_return': 'Mean Forward Return', 'signals': 'Signals'}
+    percent = metric != 'signals'
+
+    # Diverging scale around the neutral value (50% hit rate / zero return)
+    center = {'hit_rate': 0.5, 'mean_return': 0.0}.get(metric)
+    colorscale = 'RdYlGn' if center is not None else 'Blues'
+
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        z=grid.to_numpy(dtype=np.float64),
+        x=[str(v) for v in grid.columns],
+        y=[str(v) for v in grid.index],
+        colorscale=colorscale,
+        zmid=center,
+        customdata=signals.to_numpy(),
+        colorbar=dict(title=labels.get(metric, metric), tickformat='.1%' if percent else None),
+        hovertemplate=f'{grid.index.name}=%{{y}}, {grid.columns.name}=%{{x}}<br>'
+                      f'%{{z:{".2%" if percent else "d"}}}<br>%{{customdata}} signals<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f'{symbol.upper()} - {signal_name} {labels.get(metric, metric)}'.replace('  ', ' '),
+        xaxis_title=grid.columns.name,
+        yaxis_title=grid.index.name,
+        xaxis_type='category',
+        yaxis_type='category',
+        height=height,
+        template='plotly_white'
+    )
+
+    return fig
+
+
+def create_correlation_heatmap(corr: pd.DataFrame, clusters: pd.Series = None, title: str = 'Watchlist',
+                               height: int = 700, max_labels: int = 60):
+    """
+    Create a correlation heatmap, outlining cluster blocks along the diagonal
+
+    Args:
+        corr: (symbol x symbol) correlations, e.g. CorrelationMatrix.frame() in dendrogram order
+        clusters: Optional cluster number per symbol (contiguous in corr's order)
+        title: Chart title prefix
+        height: Chart height in pixels
+        max_labels: Symbol tick labels are hidden for larger matrices
+
+    Returns:
+        Plotly figure object
+    """
+    if corr is None or corr.empty:
+        return None
+
+    labels = [str(s) for s in corr.index]
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        z=float_array(corr.to_numpy()),
+        x=labels,
+        y=labels,
+        colorscale='RdBu',
+        zmin=-1,
+        zmax=1,
+        colorbar=dict(title='Correlation'),
+        hovertemplate='%{y} / %{x}<br>%{z:.2f}<extra></extra>'
+    ))
+
+    if clusters is not None:
+        blocks = clusters.reindex(corr.index).to_numpy()
+        edges = np.flatnonzero(np.diff(blocks)) + 1
+        for lo, hi in zip(np.concatenate([[0], edges]), np.concatenate([edges, [len(blocks)]])):
+            fig.add_shape(type='rect', x0=lo - 0.5, x1=hi - 0.5, y0=lo - 0.5, y1=hi - 0.5,
+                          line=dict(color='black', width=1))
+
+    show_labels = len(labels) <= max_labels
+    fig.update_layout(
+        title=f'{title} - Return Correlation ({len(labels)} symbols, clustered)',
+        xaxis=dict(type='category', showticklabels=show_labels),
+        yaxis=dict(type='category', showticklabels=show_labels, autorange='reversed'),
+        height=height,
+        template='plotly_white'
+    )
+
+    return fig
+
+
+# ---------- Technical chart map (main.py) ----------
+
+# Indicator specs each chart reads, so a page can batch-request them up front
+CHART_INDICATORS = {
+    "Line Price": [],
+    "Candlestick": [],
+    "Volume Histogram": [],
+    "Price with Moving Averages": [("sma", {"window": 20}), ("sma", {"window": 50})],
+    "MA Crossover": [("ma_crossover", {"fast": 20, "slow": 50})],
+    "Bollinger Bands": [("bollinger", {"window": 20})],
+    "RSI": [("rsi", {"period": 14})],
+    "MACD": [("macd", {"fast": 12, "slow": 26, "signal": 9})],
+    "Volatility": [("volatility", {"window": 20})],
+    "Drawdown": [("drawdown", {})],
+    "ATR": [("atr", {"period": 14})],
+    "OBV": [("obv", {})],
+    "VWAP": [("vwap", {})],
+    "Stochastic": [("stochastic", {"k": 14, "d": 3})],
+}
+
+
+def _indicator_lines(indicators, series, title: str, yaxis_title: str, height: int = 400,
+                     max_points: int = None, **layout):
+    """
+    Line chart of (name, values, line style) series sharing the bar time axis
+
+    Points are thinned with LTTB on the first series.
+    """
+    positions = line_positions(series[0][1], max_points)
+    x = time_axis(_take(indicators.bars.index, positions))
     
-    # Ensure index is datetime
-    if not isinstance(price_data.index, pd.DatetimeIndex):
-        try:
-            price_data.index = pd.to_datetime(price_data.index)
-        except:
-            return None
+    fig = go.Figure()
+    for name, values, style in series:
+        fig.add_trace(scatter_trace(
+            **x,
+            y=float_array(_take(values, positions)),
+            mode='lines',
+            name=name,
+            **style
+        ))
     
-    return price_data
\ No newline at end of file
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        xaxis_type='date',
+        yaxis_title=yaxis_title,
+        height=height,
+        template='plotly_white',
+        hovermode='x unified',
+        **layout
+    )
+    return fig
+
+
+def plot_line_price(data, symbol: str = "", height: int = 400, max_points: int = None):
+    """Close price line (data: DataFrame, OHLCV container or IndicatorSet)"""
+    indicators = _indicator_set(data)
+    if indicators is None:
+        return None
+    return _indicator_lines(
+        indicators,
+        [('Close Price', indicators.bars.close, dict(line=dict(color='blue', width=2)))],
+        f'{symbol.upper()} - Close Price', 'Price ($)', height, max_points
+    )
+
+
+def plot_candlestick(data, symbol: str = "", height: int = 400, max_points: int = None):
+    """Candlestick chart (see create_candlestick_chart)"""
+    return create_candlestick_chart(data, symbol, height=height, max_points=max_points)
+
+
+def plot_volume_histogram(data, symbol: str = "", height: int = 250, max_points: int = None):
+    """Volume bars colored by direction (see create_volume_chart)"""
+    return create_volume_chart(data, symbol, height=height, max_points=max_points)
+
+
+def plot_price_with_ma(data, symbol: str = "", windows=(20, 50), height: int = 400, max_points: int = None):
+    """Close with simple moving averages (see create_price_with_moving_averages)"""
+    return create_price_with_moving_averages(data, symbol, windows=list(windows), height=height,
+                                             max_points=max_points)
+
+
+def plot_ma_crossover(data, symbol: str = "", fast: int = 20, slow: int = 50, height: int = 400,
+                      max_points: int = None):
+    """Close with fast/slow moving averages and golden/death cross markers"""
+    indicators = _indicator_set(data)
+    if indicators is None:
+        return None
+    signals = indicators.get('ma_crossover', fast=fast, slow=slow)
+    close = indicators.bars.close
+    
+    fig = _indicator_lines(
+        indicators,
+        [
+            ('Close Price', close, dict(line=dict(color='blue', width=1.5))),
+            (f'{fast}-Day MA', signals['fast'], dict(line=dict(color='orange', width=1.5))),
+            (f'{slow}-Day MA', signals['slow'], dict(line=dict(color='purple', width=1.5))),
+        ],
+        f'{symbol.upper()} - MA Crossover ({fast}/{slow})', 'Price ($)', height, max_points
+    )
+    
+    # Crosses are sparse, so they are plotted at full resolution
+    index = indicators.bars.index
+    for direction, name, symbol_name, color in ((1, 'Golden Cross', 'triangle-up', 'green'),
+                                                (-1, 'Death Cross', 'triangle-down', 'red')):
+        hits = np.flatnonzero(signals['cross'] == direction)
+        fig.add_trace(go.Scatter(
+            **time_axis(index[hits], allow_step=False),
+            y=float_array(close[hits]),
+            mode='markers',
+            name=name,
+            marker=dict(symbol=symbol_name, size=11, color=color)
+        ))
+    
+    return fig
+
+
+def plot_bollinger_bands(data, symbol: str = "", window: int = 20, height: int = 400, max_points: int = None):
+    """Bollinger Bands (see create_bollinger_bands_chart)"""
+    return create_bollinger_bands_chart(data, symbol, window=window, height=height, max_points=max_points)
+
+
+def plot_rsi(data, symbol: str = "", period: int = 14, height: int = 250, max_points: int = None):
+    """RSI with overbought/oversold lines (see create_rsi_chart)"""
+    return create_rsi_chart(data, symbol, period=period, height=height, max_points=max_points)
+
+
+def plot_macd(data, symbol: str = "", fast: int = 12, slow: int = 26, signal: int = 9, height: int = 300,
+              max_points: int = None):
+    """MACD line, signal and histogram (see create_macd_chart)"""
+    return create_macd_chart(data, symbol, fast=fast, slow=slow, signal=signal, height=height,
+                             max_points=max_points)
+
+
+def plot_volatility(data, symbol: str = "", window: int = 20, height: int = 300, max_points: int = None):
+    """Annualized rolling volatility (see create_volatility_chart)"""
+    return create_volatility_chart(data, symbol, window=window, height=height, max_points=max_points)
+
+
+def plot_drawdown(data, symbol: str = "", height: int = 300, max_points: int = None):
+    """Drawdown from the running peak close"""
+    indicators = _indicator_set(data)
+    if indicators is None:
+        return None
+    drawdown = indicators.get('drawdown')['drawdown']
+    return _indicator_lines(
+        indicators,
+        [('Drawdown', drawdown, dict(line=dict(color='red', width=1.5), fill='tozeroy',
+                                     fillcolor='rgba(255, 0, 0, 0.2)'))],
+        f'{symbol.upper()} - Drawdown', 'Drawdown', height, max_points,
+        yaxis_tickformat='.1%'
+    )
+
+
+def plot_atr(data, symbol: str = "", period: int = 14, height: int = 300, max_points: int = None):
+    """Average True Range"""
+    indicators = _indicator_set(data)
+    if indicators is None:
+        return None
+    atr = indicators.get('atr', period=period)['atr']
+    return _indicator_lines(
+        indicators,
+        [(f'ATR ({period})', atr, dict(line=dict(color='teal', width=2)))],
+        f'{symbol.upper()} - Average True Range ({period})', 'ATR ($)', height, max_points
+    )
+
+
+def plot_obv(data, symbol: str = "", height: int = 300, max_points: int = None):
+    """On-Balance Volume"""
+    indicators = _indicator_set(data)
+    if indicators is None or indicators.bars.volume is None:
+        return None
+    obv = indicators.get('obv')['obv']
+    return _indicator_lines(
+        indicators,
+        [('OBV', obv, dict(line=dict(color='darkgreen', width=2)))],
+        f'{symbol.upper()} - On-Balance Volume', 'OBV', height, max_points
+    )
+
+
+def plot_vwap(data, symbol: str = "", height: int = 400, max_points: int = None):
+    """Close with VWAP (reset each session for intraday bars, cumulative for daily)"""
+    indicators = _indicator_set(data)
+    if indicators is None or indicators.bars.volume is None:
+        return None
+    vwap = indicators.get('vwap')['vwap']
+    return _indicator_lines(
+        indicators,
+        [
+            ('Close Price', indicators.bars.close, dict(line=dict(color='blue', width=1.5))),
+            ('VWAP', vwap, dict(line=dict(color='orange', width=2, dash='dot'))),
+        ],
+        f'{symbol.upper()} - VWAP', 'Price ($)', height, max_points
+    )
+
+
+def plot_stochastic(data, symbol: str = "", k: int = 14, d: int = 3, height: int = 250, max_points: int = None):
+    """Stochastic oscillator %K/%D with 80/20 lines"""
+    indicators = _indicator_set(data)
+    if indicators is None:
+        return None
+    stochastic = indicators.get('stochastic', k=k, d=d)
+    fig = _indicator_lines(
+        indicators,
+        [
+            (f'%K ({k})', stochastic['k'], dict(line=dict(color='blue', width=1.5))),
+            (f'%D ({d})', stochastic['d'], dict(line=dict(color='red', width=1.5))),
+        ],
+        f'{symbol.upper()} - Stochastic ({k}, {d})', 'Stochastic', height, max_points,
+        yaxis=dict(range=[0, 100])
+    )
+    fig.add_hline(y=80, line_dash="dash", line_color="red")
+    fig.add_hline(y=20, line_dash="dash", line_color="green")
+    return fig
@@ -0,0 +1,94 @@
+# components/figure_cache.py
+import threading
+
+import plotly.io as pio
+
+from components.helpers import _apply_dark_layout
+from utils.bar_store import BarPyramid
+from utils.cache import LRUCache, fingerprint
+from utils.indicators import IndicatorSet
+from utils.ohlcv import OHLCV
+
+
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Post-build layout themes, applied before the figure is serialized
+THEMES = {
+    None: None,
+    "dark": _apply_dark_layout,
+}
+
+
+def _cache_arg(value):
+    """Fingerprintable stand-in for an argument (pyramids hash by their base bars)"""
+    if isinstance(value, BarPyramid):
+        return ("pyramid", value.base_interval, value.base)
+    if isinstance(value, IndicatorSet):
+        value = value.bars
+    if isinstance(value, OHLCV):
+        return ("ohlcv", str(value.tz), value.arrays())
+    return value
+
+
+class FigureCache:
+    """
+    Cache of serialized Plotly figures keyed by input fingerprint + parameters
+
+    On a hit the stored JSON is rehydrated without recomputing indicators or
+    rebuilding traces; memory is bounded by the serialized size of entries.
+    """
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES):
+        self.entries = LRUCache(max_bytes)
+
+    def key(self, builder, args, kwargs, theme=None, title=None) -> str:
+        name = f"{builder.__module__}.{builder.__qualname__}"
+        return fingerprint(
+            name, theme, title,
+            [_cache_arg(a) for a in args],
+            {k: _cache_arg(v) for k, v in kwargs.items()},
+        )
+
+    def figure(self, builder, *args, theme: str = None, title: str = None, **kwargs):
+        """
+        Return builder(*args, **kwargs) with the given theme applied, from cache when possible
+
+        Args:
+            builder: Chart function returning a Plotly figure (or None)
+            theme: Key of THEMES applied after building (e.g. "dark")
+            title: Title passed to the theme function
+        """
+        key = self.key(builder, args, kwargs, theme, title)
+        payload = self.entries.get(key)
+        if payload is not None:
+            return pio.from_json(payload, skip_invalid=True)
+
+        fig = builder(*args, **kwargs)
+        if fig is None:
+            return None
+        apply_theme = THEMES.get(theme)
+        if apply_theme is not None:
+            apply_theme(fig, title)
+        self.entries.put(key, fig.to_json())
+        return fig
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_figure_cache() -> FigureCache:
+    """Process-wide figure cache (created once even when sessions start together)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FigureCache()
+    return _cache
+
+
+def cached_figure(builder, *args, theme: str = None, title: str = None, **kwargs):
+    """Build a chart through the process-wide figure cache"""
+    return get_figure_cache().figure(builder, *args, theme=theme, title=title, **kwargs)
@@ -0,0 +1,159 @@
+# components/figure_encoding.py
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Line traces with more points than this render with WebGL (same cut-off as plotly express)
+WEBGL_THRESHOLD = int(os.getenv("MARKETSCOPE_WEBGL_THRESHOLD", 1000))
+# Direction colors as a 2-entry colorscale indexed by a uint8 mask
+DIRECTION_COLORSCALE = [[0, 'red'], [1, 'green']]
+
+# plotly.js typed-array dtypes usable for integer data, smallest first
+_INT_DTYPES = [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32]
+
+
+def float_array(values) -> np.ndarray:
+    """Contiguous float32 array of a Series/array (NaN kept as gaps)"""
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float32))
+
+
+def count_array(values) -> np.ndarray:
+    """Smallest typed-array integer dtype that holds the values (float64 past int32)"""
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'f':
+        if np.isnan(arr).any() or not np.array_equal(arr, np.round(arr)):
+            return np.ascontiguousarray(arr, dtype=np.float64)
+    if arr.size == 0:
+        return arr.astype(np.uint8)
+    lo, hi = arr.min(), arr.max()
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.ascontiguousarray(arr, dtype=dtype)
+    return np.ascontiguousarray(arr, dtype=np.float64)
+
+
+def time_axis(index, allow_step: bool = True) -> dict:
+    """
+    Trace keyword arguments for a datetime x axis
+
+    Evenly spaced bars are described by x0/dx alone (no x array is sent);
+    otherwise x is a float64 array of wall-clock epoch milliseconds, which
+    plotly date axes read directly instead of parsing ISO strings. The same
+    dict can be passed to every trace sharing the axis. Pass
+    allow_step=False for trace types without x0/dx (e.g. Candlestick).
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    ms = index.values.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+
+    if allow_step and len(ms) > 2:
+        steps = np.diff(ms)
+        if steps[0] > 0 and np.all(steps == steps[0]):
+            return {'x0': index[0].isoformat(), 'dx': float(steps[0])}
+    return {'x': ms}
+
+
+def direction_marker(open_values, close_values, **marker) -> dict:
+    """Bar marker colored green/red by close >= open, from a vectorized uint8 mask"""
+    up = np.asarray(close_values) >= np.asarray(open_values)
+    return dict(marker, color=up.astype(np.uint8), colorscale=DIRECTION_COLORSCALE, cmin=0, cmax=1)
+
+
+def sign_marker(values, **marker) -> dict:
+    """Bar marker colored green/red by value >= 0, from a vectorized uint8 mask"""
+    return dict(marker, color=(np.asarray(values) >= 0).astype(np.uint8),
+                colorscale=DIRECTION_COLORSCALE, cmin=0, cmax=1)
+
+
+def scatter_trace(threshold: int = None, **kwargs):
+    """
+    go.Scatter, or go.Scattergl when the trace has more than threshold points
+
+    Both accept the same line/marker/fill/hover properties used by the charts,
+    so styling carries over unchanged.
+    """
+    threshold = WEBGL_THRESHOLD if threshold is None else threshold
+    y = kwargs.get('y')
+    n = len(y) if y is not None else 0
+    return go.Scattergl(**kwargs) if n > threshold else go.Scatter(**kwargs)
+
+
+# Benchmark functions
+def benchmark_figure_encoding(sizes=(10_000, 100_000)):
+    """
+    Compare serialization time and payload size of the legacy
+    (Series + per-bar color list) and columnar figure construction paths
+    """
+    from plotly.subplots import make_subplots
+
+    def legacy(df):
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True)
+        fig.add_trace(go.Candlestick(x=df.index, open=df['Open'], high=df['High'],
+                                     low=df['Low'], close=df['Close']), row=1, col=1)
+        colors = ['green' if c >= o else 'red' for c, o in zip(df['Close'], df['Open'])]
+        fig.add_trace(go.Bar(x=df.index, y=df['Volume'], marker_color=colors), row=2, col=1)
+        return fig
+
+    def columnar(df):
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True)
+        fig.add_trace(go.Candlestick(**time_axis(df.index, allow_step=False), open=float_array(df['Open']), high=float_array(df['High']),
+                                     low=float_array(df['Low']), close=float_array(df['Close'])), row=1, col=1)
+        fig.add_trace(go.Bar(**time_axis(df.index), y=count_array(df['Volume']),
+                             marker=direction_marker(df['Open'], df['Close'])), row=2, col=1)
+        fig.update_xaxes(type='date')
+        return fig
+
+    print("Benchmarking figure encoding (candlestick + volume):")
+    print("=" * 50)
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+        frames = {
+            'hourly session (irregular)': pd.bdate_range('2000-01-03', periods=n, freq='bh', tz='America/New_York'),
+            'intraday (regular)': pd.date_range('2024-01-01', periods=n, freq='min', tz='UTC'),
+        }
+        for label, index in frames.items():
+            df = pd.DataFrame({'Open': close + rng.normal(0, 0.2, n), 'High': close + 1, 'Low': close - 1,
+                               'Close': close, 'Volume': rng.integers(1e5, 1e7, n)}, index=index)
+            print(f"\n{n:,} bars, {label}")
+            print("-" * 30)
+            for name, build in (('legacy', legacy), ('columnar', columnar)):
+                start = time.perf_counter()
+                payload = build(df).to_json()
+                elapsed = time.perf_counter() - start
+                print(f"{name:>9}: {elapsed * 1000:8.1f} ms build+serialize, {len(payload) / 1024:9.1f} KB")
+
+
+def benchmark_webgl(sizes=(10_000, 100_000, 1_000_000)):
+    """Compare build time and payload of SVG and WebGL line traces, full and LTTB-thinned"""
+    from utils.downsample import line_positions
+
+    print("Benchmarking SVG vs WebGL line traces:")
+    print("=" * 50)
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        index = pd.date_range('2000-01-01', periods=n, freq='min')
+        close = pd.Series(100 + np.cumsum(rng.normal(0, 0.1, n)), index=index)
+        positions = line_positions(close)
+        print(f"\n{n:,} points")
+        print("-" * 30)
+        for label, values in (('full', close), ('lttb', close.iloc[positions])):
+            for name, threshold in (('svg', len(values)), ('webgl', 0)):
+                start = time.perf_counter()
+                fig = go.Figure(scatter_trace(threshold=threshold, **time_axis(values.index),
+                                              y=float_array(values), mode='lines'))
+                payload = fig.to_json()
+                elapsed = time.perf_counter() - start
+                print(f"{label:>5} {name:>6}: {elapsed * 1000:8.1f} ms, {len(payload) / 1024:9.1f} KB, "
+                      f"trace={fig.data[0].type}")
+
+
+if __name__ == "__main__":
+    benchmark_figure_encoding()
+    benchmark_webgl()
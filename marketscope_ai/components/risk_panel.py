@@ -0,0 +1,49 @@
+# components/risk_panel.py
+import streamlit as st
+
+from utils.indicators import TRADING_DAYS
+from utils.risk import CONFIDENCE, COVARIANCE_METHODS, MC_PATHS, risk_report
+
+
+def render_risk_panel(prices, weights=None, key: str = "risk", periods_per_year: int = TRADING_DAYS,
+                      title: str = "⚠️ Risk (VaR / CVaR & Stress Tests)"):
+    """
+    VaR/CVaR by three methods and historical stress scenarios for a
+    price Series (one asset) or a (time x asset) DataFrame with weights
+    """
+    with st.expander(title):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            confidence = st.selectbox("Confidence:", [0.90, 0.95, 0.99], index=[0.90, 0.95, 0.99].index(CONFIDENCE),
+                                      format_func=lambda c: f"{c:.0%}", key=f"{key}_confidence")
+        with col2:
+            horizon = st.slider("Horizon (bars):", 1, 20, 1, key=f"{key}_horizon")
+        with col3:
+            method = st.selectbox("Covariance:", COVARIANCE_METHODS, key=f"{key}_method")
+        with col4:
+            n_paths = st.selectbox("Simulated Paths:", [5000, MC_PATHS, 50000, 100000], index=1,
+                                   key=f"{key}_paths")
+
+        report = risk_report(prices, weights, confidence, horizon, method, n_paths,
+                             periods_per_year=periods_per_year)
+        if report is None:
+            st.info("Not enough price history for risk estimates (at least 30 returns needed).")
+            return
+
+        cols = st.columns(4)
+        for col, (name, label) in zip(cols, (("historical", "Historical"), ("parametric", "Parametric"),
+                                            ("monte_carlo", "Monte Carlo"))):
+            col.metric(f"{label} VaR", f"{report['var'][name]:.2%}",
+                       f"CVaR {report['cvar'][name]:.2%}", delta_color="off")
+        cols[3].metric("Volatility (ann.)", f"{report['volatility']:.2%}")
+        st.caption(
+            f"Loss not exceeded with {confidence:.0%} confidence over {horizon} bar(s); "
+            f"CVaR is the average loss beyond it. {report['observations']} returns, {method} covariance."
+        )
+
+        st.markdown("**Stress Tests**")
+        stress = report['stress']
+        st.dataframe(
+            stress.style.format({'return': '{:.2%}', 'coverage': '{:.0%}'}, na_rep='Not in history'),
+            use_container_width=True
+        )
@@ -0,0 +1,85 @@
+# components/simulation_panel.py
+import pandas as pd
+import streamlit as st
+
+from components.charts import create_fan_chart
+from utils.simulation import DEFAULT_HORIZON, SIM_METHODS, SimulationJob
+
+
+POLL_SECONDS = 0.5
+
+
+def _future_index(history: pd.Series, horizon: int):
+    """Dates of the simulated bars: calendar days if the history trades on weekends, else business days"""
+    last = history.index[-1]
+    if (history.index.dayofweek >= 5).any():
+        return pd.date_range(last, periods=horizon + 1, freq="D")
+    return pd.bdate_range(last, periods=horizon + 1)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _job_progress(job: SimulationJob, key: str):
+    """Progress of a running job, polled on its own; the page reruns once when the job is done"""
+    if job.done():
+        st.rerun()
+    st.progress(job.progress, text=f"Simulating {job.params['n_paths']:,} paths...")
+    if st.button("Cancel", key=f"{key}_cancel"):
+        job.cancel()
+
+
+def render_simulation_panel(close: pd.Series, key: str = "sim", title: str = "🎲 Monte Carlo Price Simulation"):
+    """
+    Forward price fan chart from GBM or bootstrapped returns of a daily close series
+
+    The simulation runs as a background job. Only the progress block polls
+    it, as a fragment, so the rest of the page is not rerun meanwhile.
+    """
+    with st.expander(title):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            method = st.selectbox("Model:", list(SIM_METHODS), format_func=SIM_METHODS.get, key=f"{key}_method")
+        with col2:
+            horizon = st.slider("Horizon (bars):", 5, 756, DEFAULT_HORIZON, key=f"{key}_horizon")
+        with col3:
+            n_paths = st.selectbox("Paths:", [10_000, 100_000, 1_000_000], index=1,
+                                   format_func=lambda n: f"{n:,}", key=f"{key}_paths")
+        with col4:
+            seed = int(st.number_input("Seed:", min_value=0, value=42, step=1, key=f"{key}_seed"))
+        block_size = 1
+        if method == "bootstrap":
+            block_size = st.slider("Bootstrap Block (bars):", 1, 20, 5, key=f"{key}_block")
+
+        state_key = f"{key}_job"
+        if st.button("Run Simulation", key=f"{key}_run"):
+            previous = st.session_state.get(state_key)
+            if previous is not None:
+                previous[1].cancel()
+            job = SimulationJob(close.to_numpy(), horizon=horizon, n_paths=n_paths, method=method,
+                                seed=seed, block_size=block_size)
+            st.session_state[state_key] = (close.name, job)
+
+        stored = st.session_state.get(state_key)
+        if stored is None or stored[0] != close.name:
+            return
+        job = stored[1]
+        if not job.done():
+            _job_progress(job, key)
+            return
+
+        simulation = job.result()
+        if simulation is None:
+            st.info("Not enough price history to simulate.")
+            return
+        summary = simulation.summary()
+        cols = st.columns(4)
+        cols[0].metric("Median Price", f"{summary['median_price']:,.2f}",
+                       f"{summary['median_price'] / summary['start_price'] - 1:+.2%}")
+        cols[1].metric("Expected Price", f"{summary['expected_price']:,.2f}")
+        cols[2].metric("5% - 95% Range", f"{summary['p05']:,.2f} - {summary['p95']:,.2f}")
+        cols[3].metric("P(Above Today)", f"{summary['prob_above_start']:.1%}")
+
+        fig = create_fan_chart(simulation, str(close.name), close.iloc[-2 * simulation.horizon:],
+                               _future_index(close, simulation.horizon))
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"{summary['paths']:,} paths in {summary['elapsed_s']:.1f}s, seed {simulation.seed}.")
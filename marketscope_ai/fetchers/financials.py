@@ -3,6 +3,10 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 
+from utils.bar_store import get_bar_store
+from utils.fundamentals import get_fundamentals_store
+from utils.ohlcv import as_ohlcv
+
 
 def validate_symbol(symbol: str):
     """
@@ -190,6 +194,9 @@ def get_basic_info(symbol: str):
             'timezone': info.get('timeZoneFullName')
         }
         
+        # Keep a local copy so screeners can read a whole universe without refetching
+        get_fundamentals_store().add(symbol, result)
+        
         return result
         
     except Exception as e:
@@ -212,6 +219,9 @@ def get_price_data(symbol: str, start_date=None, end_date=None, period="1y"):
         
         if hist.empty:
             return None
+        
+        # Keep a local multi-resolution copy for charts and analytics
+        get_bar_store().update(symbol, hist, "1d")
             
         return hist
         
@@ -491,6 +501,8 @@ def get_all_financial_data(input_string: str, start_date=None, end_date=None, pe
         price_data = get_price_data(symbol, start_date, end_date, period)
         if price_data is not None:
             result['price_data'] = price_data
+            # Validated once here; charts and indicators share the container
+            result['bars'] = as_ohlcv(price_data)
             result['current_price'] = price_data['Close'].iloc[-1]
             result['price_change'] = price_data['Close'].iloc[-1] - price_data['Close'].iloc[-2] if len(price_data) > 1 else 0
             result['price_change_percent'] = ((result['price_change'] / price_data['Close'].iloc[-2]) * 100) if len(price_data) > 1 and price_data['Close'].iloc[-2] != 0 else 0
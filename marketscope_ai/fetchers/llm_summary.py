@@ -1,15 +1,39 @@
 # marketscope_ai/fetchers/llm_summary.py
+import time
+
 from transformers import pipeline
 
-# Initialize Hugging Face pipelines
-summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
-sentiment_analyzer = pipeline("sentiment-analysis")
+from utils.textrank import extractive_summary
+
+SUMMARY_BACKENDS = ["abstractive", "extractive"]
+
+# Hugging Face pipelines are created on first use so the extractive path
+# never pays for loading a model
+_pipelines = {}
+
+
+def _get_pipeline(task: str, **kwargs):
+    """Create (once) and return a Hugging Face pipeline"""
+    if task not in _pipelines:
+        _pipelines[task] = pipeline(task, **kwargs)
+    return _pipelines[task]
 
-def generate_summary(text: str, max_length: int = 130, min_length: int = 30) -> str:
-    """Generate a concise summary of text."""
+
+def generate_summary(text: str, max_length: int = 130, min_length: int = 30, backend: str = "abstractive") -> str:
+    """
+    Generate a concise summary of text.
+
+    backend="abstractive" uses distilbart; backend="extractive" picks the most
+    central sentences with TextRank (CPU-cheap, no model download).
+    """
     if not text.strip():
         return "⚠️ No text provided for summarization."
     try:
+        if backend == "extractive":
+            # max_length is in tokens for the abstractive model; ~4 chars per token
+            sentences = extractive_summary(text, n_sentences=3, max_chars=max_length * 4)
+            return " ".join(sentences)
+        summarizer = _get_pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
         summary = summarizer(text, max_length=max_length, min_length=min_length, do_sample=False)
         return summary[0]["summary_text"]
     except Exception as e:
@@ -20,6 +44,7 @@ def analyze_sentiment(text: str) -> str:
     if not text.strip():
         return "Neutral"
     try:
+        sentiment_analyzer = _get_pipeline("sentiment-analysis")
         result = sentiment_analyzer(text[:512])[0]  # limit tokens for safety
         label = result["label"]
         if label == "POSITIVE":
@@ -31,7 +56,7 @@ def analyze_sentiment(text: str) -> str:
     except Exception as e:
         return f"❌ Error in sentiment: {e}"
 
-def generate_custom_summary(company: str, financials: str, news: str, style: str) -> dict:
+def generate_custom_summary(company: str, financials: str, news: str, style: str, backend: str = "abstractive") -> dict:
     """
     Generate a multi-section AI summary for a company.
     Returns dict with overview, financials, news, sentiment, perspective.
@@ -44,9 +69,9 @@ def generate_custom_summary(company: str, financials: str, news: str, style: str
     """
 
     # Generate different parts
-    overview = generate_summary(f"{company} overview: {financials} {news}")
-    financial_summary = generate_summary(financials)
-    news_summary = generate_summary(news)
+    overview = generate_summary(f"{company} overview: {financials} {news}", backend=backend)
+    financial_summary = generate_summary(financials, backend=backend)
+    news_summary = generate_summary(news, backend=backend)
     sentiment = analyze_sentiment(news + " " + financials)
 
     # Adjust tone/style
@@ -65,3 +90,41 @@ def generate_custom_summary(company: str, financials: str, news: str, style: str
         "perspective": perspective,
         "raw_text": combined_text,
     }
+
+
+# Benchmark function
+def benchmark_summarizers(text: str = None, runs: int = 3):
+    """
+    Compare latency and output of the abstractive and extractive backends
+    """
+    if text is None:
+        text = " ".join([
+            "Apple reported quarterly revenue of $94.8 billion, up 5% year over year.",
+            "iPhone sales beat analyst expectations despite weaker demand in China.",
+            "The company raised its dividend by 4% and announced a $110 billion buyback.",
+            "Services revenue hit an all-time record of $23.9 billion.",
+            "Shares rose 6% in after-hours trading following the results.",
+            "Analysts at Morgan Stanley reiterated their overweight rating on the stock.",
+            "Apple also faces an antitrust lawsuit from the U.S. Department of Justice.",
+            "The lawsuit alleges the company monopolizes the smartphone market.",
+            "Mac revenue grew 4% while iPad sales declined for a fifth straight quarter.",
+            "CEO Tim Cook said generative AI features will arrive later this year.",
+        ] * 2)
+
+    print("Benchmarking summarizers:")
+    print("=" * 50)
+
+    for backend in SUMMARY_BACKENDS:
+        generate_summary(text, backend=backend)  # warm-up (model load)
+        start = time.perf_counter()
+        for _ in range(runs):
+            summary = generate_summary(text, backend=backend)
+        elapsed = (time.perf_counter() - start) / runs
+
+        print(f"\n{backend}: {elapsed * 1000:.1f} ms per summary")
+        print("-" * 30)
+        print(summary)
+
+
+if __name__ == "__main__":
+    benchmark_summarizers()
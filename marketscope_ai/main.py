@@ -328,9 +328,16 @@ from fetchers.financials import get_financials, get_eps
 from components.charts import (
     plot_line_price, plot_candlestick, plot_volume_histogram,
     plot_price_with_ma, plot_ma_crossover, plot_bollinger_bands,
-    plot_rsi, plot_macd, plot_volatility, plot_drawdown
+    plot_rsi, plot_macd, plot_volatility, plot_drawdown,
+    plot_atr, plot_obv, plot_vwap, plot_stochastic, CHART_INDICATORS
 )
 from components.helpers import _apply_dark_layout, _fmt_num
+from components.figure_cache import cached_figure
+from components.risk_panel import render_risk_panel
+from components.simulation_panel import render_simulation_panel
+from utils.indicators import IndicatorSet
+from utils.ohlcv import as_ohlcv
+from tabs.portfolio import render_portfolio
 
 
 # ======================================
@@ -363,6 +370,7 @@ def main():
     tabs = [
         "📊 Overview",
         "💰 Finances",
+        "💼 Portfolio",
         "📰 News & Sentiment",
         "🧠 LLM Summary",
         "💬 Ask AI",
@@ -427,6 +435,8 @@ def main():
                 hist = stock.history(start=start_date, end=end_date, interval="1d")
 
                 if not hist.empty:
+                    render_risk_panel(hist["Close"].rename(stock_info["ticker"]), key="overview_risk")
+                    render_simulation_panel(hist["Close"].rename(stock_info["ticker"]), key="overview_sim")
                     hist = hist.reset_index()
                     fig = go.Figure()
                     fig.add_trace(go.Scatter(
@@ -501,10 +511,12 @@ def main():
                 if hist_tc is None or hist_tc.empty:
                     st.warning("No historical OHLCV available to render technical charts.")
                 else:
-                    data = hist_tc.reset_index()
+                    # One validated container; selected indicators are computed together on first use
+                    data = IndicatorSet(as_ohlcv(hist_tc))
                     chart_options = [
                         "Line Price", "Candlestick", "Volume Histogram", "Price with Moving Averages",
-                        "MA Crossover", "Bollinger Bands", "RSI", "MACD", "Volatility", "Drawdown"
+                        "MA Crossover", "Bollinger Bands", "RSI", "MACD", "Volatility", "Drawdown",
+                        "ATR", "OBV", "VWAP", "Stochastic"
                     ]
                     selected_charts = st.multiselect("Select charts to display:", chart_options, default=["Line Price", "Candlestick", "RSI"])
 
@@ -519,18 +531,29 @@ def main():
                         "MACD": plot_macd,
                         "Volatility": plot_volatility,
                         "Drawdown": plot_drawdown,
+                        "ATR": plot_atr,
+                        "OBV": plot_obv,
+                        "VWAP": plot_vwap,
+                        "Stochastic": plot_stochastic,
                     }
 
+                    data.request(*(spec for name in selected_charts for spec in CHART_INDICATORS[name]))
                     for chart_name in selected_charts:
-                        fig = chart_map[chart_name](data)
-                        _apply_dark_layout(fig, chart_name)
-                        st.plotly_chart(fig, use_container_width=True)
+                        fig = cached_figure(chart_map[chart_name], data, theme="dark", title=chart_name)
+                        if fig:
+                            st.plotly_chart(fig, use_container_width=True)
 
             except Exception as e:
                 st.error(f"Error loading financials: {e}")
         else:
             st.info("Enter a stock symbol in the sidebar to see financial data.")
 
+    # ============================
+    # Portfolio
+    # ============================
+    elif choice == "💼 Portfolio":
+        render_portfolio(currency, start_date, end_date)
+
     # ============================
     # TAB 3: News & Sentiment
     # ============================
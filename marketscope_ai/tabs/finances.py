@@ -1,8 +1,11 @@
 # tabs/finances.py
 import streamlit as st
+import numpy as np
 import pandas as pd
 from fetchers.financials import (
     get_all_financial_data, 
+    get_basic_info,
+    get_price_data,
     format_large_number, 
     format_percentage,
     validate_symbol
@@ -18,8 +21,26 @@ from components.charts import (
     create_rsi_chart,
     create_macd_chart,
     create_volatility_chart,
+    create_sweep_heatmap,
+    create_backtest_chart,
+    create_relative_stats_chart,
+    create_correlation_heatmap,
+    create_spread_chart,
     prepare_chart_data
 )
+from components.figure_cache import cached_figure
+from components.risk_panel import render_risk_panel
+from utils.backtest import DEFAULT_COST_BPS, STRATEGIES, run_backtest
+from utils.bar_store import get_bar_store
+from utils.correlation import MIN_PERIODS, watchlist_correlation
+from utils.fundamentals import (
+    FILTER_OPS, RANK_SUFFIX, SCREEN_COLUMNS, ZSCORE_SUFFIX, get_fundamentals_store, screen_fundamentals
+)
+from utils.pairs import MIN_CORRELATION, pair_spread, scan_pairs
+from utils.relative_stats import BENCHMARKS, DEFAULT_WINDOW, relative_stats_watchlist
+from utils.screener import EXAMPLE_SCREEN, SCREEN_TERMS, screen_universe
+from utils.sweeps import DEFAULT_HORIZON, SWEEP_SIGNALS, run_sweep, sweep_watchlist
+from utils.walk_forward import IN_SAMPLE_BARS, OUT_OF_SAMPLE_BARS, walk_forward
 
 
 def render_finances(symbol: str, start_date=None, end_date=None):
@@ -61,6 +82,12 @@ def render_finances(symbol: str, start_date=None, end_date=None):
     _display_charts(financial_data, resolved_symbol)
     _display_technical_analysis(financial_data, resolved_symbol)
     _display_performance_metrics(financial_data)
+    _display_risk_metrics(financial_data, resolved_symbol)
+    _display_relative_stats(financial_data, resolved_symbol)
+    _display_correlation(financial_data, resolved_symbol)
+    _display_pairs_scanner(financial_data, resolved_symbol)
+    _display_screener(financial_data, resolved_symbol)
+    _display_fundamentals_screener(resolved_symbol)
     _display_price_alerts(financial_data, resolved_symbol)
     _display_financial_statements(financial_data)
     _display_company_info(financial_data)
@@ -173,6 +200,13 @@ def _display_key_metrics(financial_data: dict):
             st.metric("52W Low", f"${low_52w:.2f}" if low_52w else "N/A")
 
 
+def _chart_bars(financial_data: dict):
+    """OHLCV container for the price data, validated once per financial_data"""
+    if financial_data.get('bars') is None:
+        financial_data['bars'] = prepare_chart_data(financial_data.get('price_data'))
+    return financial_data['bars']
+
+
 def _display_charts(financial_data: dict, symbol: str):
     """Display price and volume charts"""
     st.subheader("📈 Price Charts")
@@ -181,7 +215,7 @@ def _display_charts(financial_data: dict, symbol: str):
         st.info("No price data available for charting.")
         return
     
-    price_data = prepare_chart_data(financial_data['price_data'])
+    price_data = _chart_bars(financial_data)
     if price_data is None:
         st.info("Price data is not suitable for charting.")
         return
@@ -193,14 +227,19 @@ def _display_charts(financial_data: dict, symbol: str):
         index=0
     )
     
+    # Bar charts read the stored pyramid level that fits the visible range
+    pyramid = get_bar_store().pyramid(symbol)
+    bars = pyramid if pyramid is not None else price_data
+    start, end = price_data.index[0], price_data.index[-1]
+    
     # Display selected chart
     if chart_type == "Combined Price & Volume":
-        fig = create_combined_price_volume_chart(price_data, symbol)
+        fig = cached_figure(create_combined_price_volume_chart, bars, symbol, start=start, end=end)
         if fig:
             st.plotly_chart(fig, use_container_width=True)
     
     elif chart_type == "Candlestick":
-        fig = create_candlestick_chart(price_data, symbol)
+        fig = cached_figure(create_candlestick_chart, bars, symbol, start=start, end=end)
         if fig:
             st.plotly_chart(fig, use_container_width=True)
     
@@ -215,19 +254,19 @@ def _display_charts(financial_data: dict, symbol: str):
             )
         
         if ma_periods:
-            fig = create_price_with_moving_averages(price_data, symbol, windows=ma_periods)
+            fig = cached_figure(create_price_with_moving_averages, price_data, symbol, windows=ma_periods)
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
     
     elif chart_type == "Volume Only":
-        fig = create_volume_chart(price_data, symbol)
+        fig = cached_figure(create_volume_chart, bars, symbol, start=start, end=end)
         if fig:
             st.plotly_chart(fig, use_container_width=True)
     
     # Revenue and Income Trend
     if 'revenue_income_trend' in financial_data:
         st.subheader("📈 Revenue & Net Income Trend")
-        fig = create_revenue_income_chart(financial_data['revenue_income_trend'], symbol)
+        fig = cached_figure(create_revenue_income_chart, financial_data['revenue_income_trend'], symbol)
         if fig:
             st.plotly_chart(fig, use_container_width=True)
     
@@ -237,7 +276,8 @@ def _display_charts(financial_data: dict, symbol: str):
     # Annual Earnings
     if 'annual_earnings' in earnings_data:
         st.subheader("📊 Annual Earnings Trend")
-        fig = create_earnings_trend_chart(
+        fig = cached_figure(
+            create_earnings_trend_chart,
             earnings_data['annual_earnings'], 
             symbol, 
             chart_type='annual'
@@ -248,7 +288,8 @@ def _display_charts(financial_data: dict, symbol: str):
     # Quarterly Earnings
     if 'quarterly_earnings' in earnings_data:
         st.subheader("📊 Quarterly Earnings Trend")
-        fig = create_earnings_trend_chart(
+        fig = cached_figure(
+            create_earnings_trend_chart,
             earnings_data['quarterly_earnings'], 
             symbol, 
             chart_type='quarterly'
@@ -262,7 +303,7 @@ def _display_technical_analysis(financial_data: dict, symbol: str):
     if 'price_data' not in financial_data:
         return
     
-    price_data = prepare_chart_data(financial_data['price_data'])
+    price_data = _chart_bars(financial_data)
     if price_data is None:
         return
     
@@ -272,7 +313,9 @@ def _display_technical_analysis(financial_data: dict, symbol: str):
             "Bollinger Bands", 
             "RSI", 
             "MACD", 
-            "Volatility"
+            "Volatility",
+            "Parameter Sweep",
+            "Backtest"
         ])
         
         with tech_tabs[0]:  # Bollinger Bands
@@ -280,7 +323,7 @@ def _display_technical_analysis(financial_data: dict, symbol: str):
             with col1:
                 bb_period = st.slider("Bollinger Bands Period:", 10, 50, 20, key="bb_period")
             
-            fig = create_bollinger_bands_chart(price_data, symbol, window=bb_period)
+            fig = cached_figure(create_bollinger_bands_chart, price_data, symbol, window=bb_period)
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
         
@@ -289,7 +332,7 @@ def _display_technical_analysis(financial_data: dict, symbol: str):
             with col1:
                 rsi_period = st.slider("RSI Period:", 5, 30, 14, key="rsi_period")
             
-            fig = create_rsi_chart(price_data, symbol, period=rsi_period)
+            fig = cached_figure(create_rsi_chart, price_data, symbol, period=rsi_period)
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
         
@@ -302,7 +345,7 @@ def _display_technical_analysis(financial_data: dict, symbol: str):
             with col3:
                 macd_signal = st.slider("Signal:", 3, 15, 9, key="macd_signal")
             
-            fig = create_macd_chart(price_data, symbol, fast=macd_fast, slow=macd_slow, signal=macd_signal)
+            fig = cached_figure(create_macd_chart, price_data, symbol, fast=macd_fast, slow=macd_slow, signal=macd_signal)
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
         
@@ -311,9 +354,203 @@ def _display_technical_analysis(financial_data: dict, symbol: str):
             with col1:
                 vol_period = st.slider("Volatility Window:", 10, 50, 20, key="vol_period")
             
-            fig = create_volatility_chart(price_data, symbol, window=vol_period)
+            fig = cached_figure(create_volatility_chart, price_data, symbol, window=vol_period)
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
+        
+        with tech_tabs[4]:  # Parameter Sweep
+            _display_parameter_sweep(price_data, symbol)
+        
+        with tech_tabs[5]:  # Backtest
+            _display_backtest(price_data, symbol)
+
+
+def _watchlist_input(symbol: str, key: str) -> list:
+    """Extra symbols typed by the user (comma-separated), excluding the current one"""
+    watchlist = st.text_input(
+        "Watchlist (optional, comma-separated symbols pooled with this one):",
+        key=key
+    )
+    symbols = [s.strip().upper() for s in watchlist.split(',') if s.strip()]
+    return [s for s in dict.fromkeys(symbols) if s != symbol.upper()]
+
+
+def _ensure_stored(symbols, start, end):
+    """Fetch daily bars into the bar store for symbols it does not hold yet"""
+    store = get_bar_store()
+    for sym in symbols:
+        if store.pyramid(sym) is None:
+            get_price_data(sym, start.date(), end.date())
+
+
+def _ensure_fundamentals(symbols):
+    """Fetch basic info into the fundamentals cache for symbols it does not hold yet"""
+    for sym in get_fundamentals_store().missing(symbols):
+        get_basic_info(sym)
+
+
+def _display_parameter_sweep(price_data, symbol: str):
+    """Sweep an indicator signal over its parameter grid and show a heatmap"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        signal_name = st.selectbox(
+            "Signal:",
+            list(SWEEP_SIGNALS),
+            format_func=lambda name: f"{name} - {SWEEP_SIGNALS[name].description}",
+            key="sweep_signal"
+        )
+    with col2:
+        horizon = st.slider("Forward Horizon (bars):", 1, 20, DEFAULT_HORIZON, key="sweep_horizon")
+    with col3:
+        metric = st.selectbox(
+            "Metric:",
+            ["hit_rate", "mean_return", "signals"],
+            format_func=lambda m: m.replace('_', ' ').title(),
+            key="sweep_metric"
+        )
+    
+    fixed = {}
+    if signal_name == "macd":
+        fixed['signal'] = st.slider("Signal:", 3, 15, 9, key="sweep_macd_signal")
+    
+    extra = _watchlist_input(symbol, "sweep_watchlist")
+    
+    if st.button("Run Sweep", key="sweep_run"):
+        start, end = price_data.index[0], price_data.index[-1]
+        with st.spinner("Sweeping parameter grid..."):
+            if extra:
+                _ensure_stored(extra, start, end)
+                results, used = sweep_watchlist(
+                    [symbol] + extra, signal_name, start=start, end=end, horizon=horizon, **fixed
+                )
+                label = ", ".join(used) if used else symbol
+            else:
+                results = run_sweep(price_data, signal_name, horizon=horizon, **fixed)
+                label = symbol
+        st.session_state['sweep_results'] = (signal_name, label, horizon, results)
+    
+    stored = st.session_state.get('sweep_results')
+    if not stored or stored[0] != signal_name:
+        st.info("Choose a signal and run the sweep to see every parameter pair at once.")
+        return
+    
+    _, label, swept_horizon, results = stored
+    if results is None:
+        st.warning("Not enough price history for this sweep.")
+        return
+    
+    fig = cached_figure(create_sweep_heatmap, results, label, metric=metric, signal_name=signal_name.upper())
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+    
+    signals = results['signals']
+    hit_rate = results['hit_rate'].where(signals >= 10)
+    if hit_rate.notna().any().any():
+        first, second = hit_rate.stack().idxmax()
+        st.caption(
+            f"Best hit rate with at least 10 signals: {signals.index.name}={first}, "
+            f"{signals.columns.name}={second} - {hit_rate.loc[first, second]:.1%} over "
+            f"{signals.loc[first, second]} signals, mean {swept_horizon}-bar return "
+            f"{results['mean_return'].loc[first, second]:.2%}"
+        )
+
+
+def _display_backtest(price_data, symbol: str):
+    """Backtest a chart strategy on this symbol (or a watchlist) against buy and hold"""
+    strategies = [name for name in STRATEGIES if name != "buy_and_hold"]
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        strategy = st.selectbox(
+            "Strategy:",
+            strategies,
+            format_func=lambda name: f"{name} - {STRATEGIES[name]['description']}",
+            key="bt_strategy"
+        )
+    with col2:
+        cost_bps = st.slider("Transaction Cost (bps):", 0.0, 50.0, DEFAULT_COST_BPS, 0.5, key="bt_cost")
+
+    # One input per strategy parameter, typed by its default
+    params = {}
+    defaults = STRATEGIES[strategy]['params']
+    columns = st.columns(max(len(defaults), 1))
+    for col, (name, default) in zip(columns, defaults.items()):
+        label = name.replace('_', ' ').title()
+        with col:
+            if isinstance(default, bool):
+                params[name] = st.checkbox(label, value=default, key=f"bt_{strategy}_{name}")
+            elif isinstance(default, int):
+                params[name] = int(st.number_input(label, min_value=1, value=default, step=1,
+                                                   key=f"bt_{strategy}_{name}"))
+            else:
+                params[name] = float(st.number_input(label, value=float(default), step=0.25,
+                                                     key=f"bt_{strategy}_{name}"))
+
+    extra = _watchlist_input(symbol, "bt_watchlist")
+    start, end = price_data.index[0], price_data.index[-1]
+    if extra:
+        _ensure_stored(extra, start, end)
+        close = get_bar_store().matrix([symbol] + extra, "Close", start=start, end=end)
+        label = ", ".join(close.columns) if not close.empty else symbol
+    else:
+        close = pd.Series(price_data.close, index=price_data.index, name=symbol.upper())
+        label = symbol
+    if close.empty:
+        st.info("No stored prices for this watchlist.")
+        return
+
+    result = run_backtest(close, strategy, cost_bps=cost_bps, **params)
+    benchmark = run_backtest(close, "buy_and_hold", cost_bps=cost_bps)
+    if result is None:
+        return
+
+    fig = create_backtest_chart(result, label, benchmark=benchmark)
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+
+    summary = result.summary()
+    summary.loc["Buy & Hold"] = benchmark.summary().loc["Portfolio"]
+    percent = ['total_return', 'cagr', 'volatility', 'max_drawdown', 'exposure', 'costs']
+    st.dataframe(
+        summary.style.format({**{c: '{:.2%}' for c in percent},
+                              'sharpe': '{:.2f}', 'turnover': '{:.1f}x', 'trades': '{:d}'}),
+        use_container_width=True
+    )
+
+    _display_walk_forward(close, strategy, label, cost_bps)
+
+
+def _display_walk_forward(close, strategy: str, label: str, cost_bps: float):
+    """Walk-forward validation of the selected strategy, with per-fold timings"""
+    st.markdown("**Walk-Forward Validation**")
+    col1, col2 = st.columns(2)
+    with col1:
+        in_sample = st.slider("In-Sample Window (bars):", 126, 1260, IN_SAMPLE_BARS, 21, key="wf_in_sample")
+    with col2:
+        out_of_sample = st.slider("Out-of-Sample Window (bars):", 21, 252, OUT_OF_SAMPLE_BARS, 21, key="wf_oos")
+
+    if len(close) <= in_sample:
+        st.info("Not enough history for one walk-forward fold with this in-sample window.")
+        return
+    if not st.button("Run Walk-Forward", key="wf_run"):
+        return
+
+    with st.spinner("Optimizing folds..."):
+        run = walk_forward(close, strategy, in_sample=in_sample, out_of_sample=out_of_sample, cost_bps=cost_bps)
+    if run is None:
+        return
+
+    fig = create_backtest_chart(run['result'], f"{label} (out-of-sample)")
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+
+    folds = run['folds']
+    st.caption(
+        f"{len(folds)} folds on {run['workers']} worker(s): {run['wall_s']:.2f}s wall, "
+        f"{folds['total_s'].sum():.2f}s of fold compute"
+    )
+    st.dataframe(folds, use_container_width=True)
+    with st.expander("Chosen parameters per fold"):
+        st.dataframe(run['params'], use_container_width=True)
 
 
 def _display_financial_statements(financial_data: dict):
@@ -530,6 +767,229 @@ def _display_performance_metrics(financial_data: dict):
                 st.write(f"• PEG Ratio: {basic_info['peg_ratio']:.2f}")
 
 
+def _display_risk_metrics(financial_data: dict, symbol: str):
+    """VaR/CVaR and stress tests from the loaded price history"""
+    price_data = financial_data.get('price_data')
+    if price_data is None or price_data.empty or 'Close' not in price_data:
+        return
+    render_risk_panel(price_data['Close'].rename(symbol.upper()), key="finances_risk")
+
+
+def _display_relative_stats(financial_data: dict, symbol: str):
+    """Rolling beta, correlation, alpha and tracking error against a chosen benchmark"""
+    price_data = financial_data.get('price_data')
+    if price_data is None or price_data.empty:
+        return
+
+    with st.expander("📐 Beta & Correlation vs Benchmark"):
+        col1, col2 = st.columns(2)
+        with col1:
+            benchmark = st.selectbox("Benchmark:", list(BENCHMARKS), format_func=BENCHMARKS.get,
+                                     key="rel_benchmark")
+        with col2:
+            window = st.slider("Rolling Window (bars):", 20, 252, DEFAULT_WINDOW, key="rel_window")
+        extra = _watchlist_input(symbol, "rel_watchlist")
+
+        start, end = price_data.index[0], price_data.index[-1]
+        _ensure_stored([symbol, benchmark] + extra, start, end)
+        computed = relative_stats_watchlist([symbol] + extra, benchmark, window)
+        if computed is None:
+            st.info(f"No stored prices for {benchmark} or this watchlist.")
+            return
+        cache, stats = computed
+
+        static_beta = financial_data.get('basic_info', {}).get('beta')
+        if symbol.upper() in cache.symbols:
+            latest = cache.latest().loc[symbol.upper()]
+            cols = st.columns(4)
+            cols[0].metric("Beta", f"{latest['beta']:.2f}",
+                           f"Yahoo: {static_beta:.2f}" if static_beta else None, delta_color="off")
+            cols[1].metric("Correlation", f"{latest['correlation']:.2f}")
+            cols[2].metric("Alpha (ann.)", f"{latest['alpha']:.2%}")
+            cols[3].metric("Tracking Error", f"{latest['tracking_error']:.2%}")
+
+            # The cache covers all stored bars; chart the selected range (stored rows are local dates)
+            shown = {name: frame.loc[frame.index >= pd.Timestamp(start.date())] for name, frame in stats.items()}
+            fig = create_relative_stats_chart(shown, symbol.upper(), benchmark)
+            if fig:
+                st.plotly_chart(fig, use_container_width=True)
+
+        if len(cache.symbols) > 1:
+            st.dataframe(
+                cache.latest().style.format({'beta': '{:.2f}', 'correlation': '{:.2f}',
+                                             'alpha': '{:.2%}', 'tracking_error': '{:.2%}'}, na_rep='N/A'),
+                use_container_width=True
+            )
+
+
+def _display_correlation(financial_data: dict, symbol: str):
+    """Clustered return correlation heatmap of this symbol and a watchlist"""
+    price_data = financial_data.get('price_data')
+    if price_data is None or price_data.empty:
+        return
+
+    with st.expander("🔗 Watchlist Correlation & Clusters"):
+        extra = _watchlist_input(symbol, "corr_watchlist")
+        if not extra:
+            st.info("Add watchlist symbols to compare their returns with this one.")
+            return
+        col1, col2 = st.columns(2)
+        with col1:
+            min_periods = st.slider("Minimum Overlapping Bars:", 5, 252, MIN_PERIODS, key="corr_min_periods")
+        with col2:
+            n_clusters = st.slider("Clusters:", 1, max(min(len(extra) + 1, 20), 2), min(3, len(extra) + 1),
+                                   key="corr_clusters")
+
+        start, end = price_data.index[0], price_data.index[-1]
+        _ensure_stored(extra, start, end)
+        with st.spinner("Computing correlations..."):
+            matrix = watchlist_correlation([symbol] + extra, start, end, min_periods=min_periods)
+        if matrix is None:
+            st.info("Need stored prices for at least two symbols.")
+            return
+
+        clusters = matrix.clusters(n_clusters)
+        fig = create_correlation_heatmap(matrix.frame(), clusters, title=symbol.upper())
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
+
+        pairs = matrix.counts[np.triu_indices(len(matrix.symbols), 1)]
+        st.caption(f"Pairwise-complete returns: {int(pairs.min())}-{int(pairs.max())} overlapping bars per pair.")
+        members = clusters.groupby(clusters).apply(lambda s: ", ".join(s.index))
+        st.dataframe(members.rename("symbols").to_frame(), use_container_width=True)
+
+
+def _display_pairs_scanner(financial_data: dict, symbol: str):
+    """Cointegration scan over every pair of this symbol and a watchlist"""
+    price_data = financial_data.get('price_data')
+    if price_data is None or price_data.empty:
+        return
+
+    with st.expander("🔀 Pairs Scanner (Cointegration)"):
+        extra = _watchlist_input(symbol, "pairs_watchlist")
+        if not extra:
+            st.info("Add watchlist symbols to scan for cointegrated pairs.")
+            return
+        min_correlation = st.slider("Minimum Return Correlation:", -1.0, 1.0, MIN_CORRELATION, 0.05,
+                                    key="pairs_min_corr")
+        if not st.button("Scan Pairs", key="pairs_run"):
+            return
+
+        start, end = price_data.index[0], price_data.index[-1]
+        _ensure_stored(extra, start, end)
+        close = get_bar_store().matrix([symbol] + extra, "Close", start=start, end=end)
+        if close.shape[1] < 2:
+            st.info("Need stored prices for at least two symbols.")
+            return
+        with st.spinner("Testing pairs..."):
+            table = scan_pairs(close, min_correlation=min_correlation)
+        if table.empty:
+            st.info("No pair passed the correlation prefilter and history requirements.")
+            return
+
+        st.caption(f"{len(table)} pairs tested, {int(table['cointegrated'].sum())} cointegrated at 5%.")
+        st.dataframe(
+            table.style.format({'correlation': '{:.2f}', 'hedge_ratio': '{:.3f}', 'intercept': '{:.3f}',
+                                'adf_t': '{:.2f}', 'critical_5': '{:.2f}', 'half_life': '{:.1f}',
+                                'zscore': '{:+.2f}'}),
+            use_container_width=True
+        )
+
+        best = table.iloc[0]
+        spread = pair_spread(close, best['y'], best['x'], best['hedge_ratio'], best['intercept'])
+        fig = create_spread_chart(spread, best['y'], best['x'], best['hedge_ratio'])
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
+
+
+def _display_screener(financial_data: dict, symbol: str):
+    """Technical screen of this symbol and a watchlist, or of every stored symbol"""
+    price_data = financial_data.get('price_data')
+    if price_data is None or price_data.empty:
+        return
+
+    with st.expander("🧮 Technical Screener"):
+        everything = st.checkbox("Screen every symbol in the local bar store", key="screen_all")
+        if everything:
+            universe = get_bar_store().symbols()
+        else:
+            extra = _watchlist_input(symbol, "screen_watchlist")
+            universe = [symbol.upper()] + extra
+        condition = st.text_input(
+            "Condition:", EXAMPLE_SCREEN, key="screen_condition",
+            help="Terms: " + ", ".join(
+                f"{name}({', '.join(map(str, term.params))})" if term.params else name
+                for name, term in SCREEN_TERMS.items()
+            ) + ". Combine with < > <= >=, + - * /, and / or / not."
+        )
+        if not st.button("Run Screen", key="screen_run"):
+            return
+
+        if not everything:
+            _ensure_stored(universe[1:], price_data.index[0], price_data.index[-1])
+        with st.spinner(f"Screening {len(universe)} symbols..."):
+            screener = screen_universe(universe, condition)
+        if screener is None:
+            st.error("Could not run the screen - check the condition and that symbols have stored prices.")
+            return
+
+        matches = screener.matches()
+        st.caption(f"{len(matches)} of {len(screener.symbols)} symbols match as of {screener.end:%Y-%m-%d} "
+                   f"(streak = consecutive bars matched).")
+        if matches.empty:
+            return
+        st.dataframe(
+            matches.drop(columns='match').style.format({**{label: '{:,.2f}' for label in screener.condition.terms},
+                                                        'last_bar': '{:%Y-%m-%d}'}),
+            use_container_width=True
+        )
+
+
+def _display_fundamentals_screener(symbol: str):
+    """Filter and rank cached company fundamentals, optionally relative to each sector"""
+    with st.expander("🧾 Fundamentals Screener"):
+        store = get_fundamentals_store()
+        everything = st.checkbox(f"Screen every company with cached fundamentals ({len(store)})", key="fund_all")
+        universe = None if everything else [symbol.upper()] + _watchlist_input(symbol, "fund_watchlist")
+        sector_relative = st.checkbox("Percentile ranks and z-scores within each sector", value=True,
+                                      key="fund_sector_relative")
+
+        columns = [f"{field}{suffix}" for field in SCREEN_COLUMNS for suffix in ("", RANK_SUFFIX, ZSCORE_SUFFIX)]
+        filters = []
+        for i in range(3):
+            col1, col2, col3 = st.columns([3, 1, 2])
+            with col1:
+                column = st.selectbox(f"Filter {i + 1}:", ["(none)"] + columns, key=f"fund_filter_{i}")
+            with col2:
+                op = st.selectbox("Operator:", list(FILTER_OPS), key=f"fund_op_{i}")
+            with col3:
+                value = st.number_input("Value:", value=0.0, key=f"fund_value_{i}")
+            if column != "(none)":
+                filters.append((column, op, value))
+        sectors = st.multiselect("Sectors (optional):", store.table().categories['sector'], key="fund_sectors")
+        if sectors:
+            filters.append(("sector", "in", sectors))
+        col1, col2 = st.columns(2)
+        with col1:
+            rank_by = st.selectbox("Rank By:", columns, index=columns.index("return_on_equity"), key="fund_rank_by")
+        with col2:
+            ascending = st.checkbox("Lowest first", key="fund_ascending")
+        if not st.button("Screen Fundamentals", key="fund_run"):
+            return
+
+        if universe is not None:
+            with st.spinner("Fetching missing fundamentals..."):
+                _ensure_fundamentals(universe)
+        table = store.table(universe)
+        result = screen_fundamentals(table, filters, rank_by, ascending, sector_relative)
+        if result is None:
+            st.error("Invalid filter.")
+            return
+
+        st.caption(f"{len(result)} of {len(table)} companies pass the filters.")
+        st.dataframe(result.style.format(precision=2, na_rep='-'), use_container_width=True)
+
+
 # Enhanced render function with additional features
 def render_finances_enhanced(symbol: str, start_date=None, end_date=None):
     """
@@ -575,6 +1035,12 @@ def render_finances_enhanced(symbol: str, start_date=None, end_date=None):
     _display_charts(financial_data, resolved_symbol)
     _display_technical_analysis(financial_data, resolved_symbol)
     _display_performance_metrics(financial_data)
+    _display_risk_metrics(financial_data, resolved_symbol)
+    _display_relative_stats(financial_data, resolved_symbol)
+    _display_correlation(financial_data, resolved_symbol)
+    _display_pairs_scanner(financial_data, resolved_symbol)
+    _display_screener(financial_data, resolved_symbol)
+    _display_fundamentals_screener(resolved_symbol)
     _display_price_alerts(financial_data, resolved_symbol)
     _display_financial_statements(financial_data)
     _display_company_info(financial_data)
@@ -587,4 +1053,4 @@ def render_finances_enhanced(symbol: str, start_date=None, end_date=None):
 
 
 # Export the main functions
-__all__ = ['render_finances', 'render_finances_enhanced']
\ No newline at end of file
+__all__ = ['render_finances', 'render_finances_enhanced']
@@ -10,6 +10,7 @@ from fetchers.llm_summary import call_huggingface
 # fallbacks (only used if caller doesn't pass data)
 from fetchers.financials import get_financial_statements
 from fetchers.news import fetch_news
+from utils.textrank import extractive_summary
 
 
 def _to_text(obj: Any, max_chars: int = 4000) -> str:
@@ -48,6 +49,27 @@ def _to_text(obj: Any, max_chars: int = 4000) -> str:
     return str(obj)[:max_chars]
 
 
+def _news_to_extractive_text(news: Any, n_sentences: int = 8, max_chars: int = 3000) -> str:
+    """Condense news titles + descriptions into the most central sentences (TextRank)."""
+    if not isinstance(news, list):
+        return _to_text(news, max_chars=max_chars)
+
+    parts = []
+    for it in news:
+        if isinstance(it, dict):
+            title = (it.get("title") or "").strip()
+            desc = (it.get("description") or "").strip()
+            if title:
+                parts.append(title if title[-1] in ".!?" else title + ".")
+            if desc:
+                parts.append(desc)
+        else:
+            parts.append(str(it))
+
+    sentences = extractive_summary("\n".join(parts), n_sentences=n_sentences, max_chars=max_chars)
+    return "\n".join(f"- {s}" for s in sentences)[:max_chars]
+
+
 def _safe_json_parse(text: str) -> Optional[Dict]:
     """
     Try to parse a model response into JSON. Robust to extra text around JSON by extracting
@@ -123,10 +145,14 @@ def render_llm_summary(
     model = st.selectbox("Choose Hugging Face model", [model_default, "mistralai/Mixtral-8x7B-Instruct-v0.1"], index=0)
 
     max_tokens = st.slider("Max tokens for generation (model may ignore)", 100, 1500, 400)
+    news_mode = st.selectbox("News input", ["Headlines", "Extractive summary (TextRank)"], index=0)
 
     # Prepare compact textual payloads
     fin_text = _to_text(financials, max_chars=3000)
-    news_text = _to_text(news, max_chars=3000)
+    if news_mode == "Headlines":
+        news_text = _to_text(news, max_chars=3000)
+    else:
+        news_text = _news_to_extractive_text(news, max_chars=3000)
 
     st.markdown("**Preview of data used (truncated):**")
     with st.expander("🔎 Financials preview"):
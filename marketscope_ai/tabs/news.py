@@ -1,7 +1,98 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from fetchers.news import fetch_news, analyze_sentiment
+from fetchers.financials import get_price_data, resolve_symbol_for_financials
+from components.charts import create_event_study_chart, create_keyword_chart
+from utils.news_store import get_news_store
+from utils.search_index import get_search_index
+from utils.keywords import get_keyword_model
+from utils.fundamentals import get_fundamentals_store
+from utils.event_study import (
+    DEFAULT_WINDOWS,
+    articles_to_events,
+    run_event_study,
+    summarize_event_study
+)
+
+SENTIMENT_ICONS = {"Positive": "🟢", "Negative": "🔴", "Neutral": "⚪"}
+PAGE_SIZES = [10, 25, 50]
+
+ARTICLE_CARD_CSS = """
+<style>
+.ms-article {background-color:#f8f9fa; padding:14px; border-radius:10px;
+             margin-bottom:12px; box-shadow:0 2px 6px rgba(0,0,0,0.05);}
+.ms-article-title {font-size:18px; font-weight:700; color:#000;}
+.ms-article-meta {font-size:13px; color:#555; margin-top:6px;}
+.ms-article-sentiment {font-size:14px; margin-top:6px; font-weight:600; color:#333;}
+.ms-article-link {margin-top:8px;}
+.ms-article-link a {color:#0a66c2; text-decoration:none;}
+</style>
+"""
+
+# Rendered card HTML per article ID; articles are immutable once stored
+_card_cache = {}
+_CARD_CACHE_LIMIT = 5000
+
+
+def _escape(series: pd.Series) -> pd.Series:
+    """Vectorized HTML escaping of a string column"""
+    return (series.fillna("").astype(str)
+            .str.replace("&", "&amp;", regex=False)
+            .str.replace("<", "&lt;", regex=False)
+            .str.replace(">", "&gt;", regex=False)
+            .str.replace('"', "&quot;", regex=False))
+
+
+def _build_article_cards(articles: pd.DataFrame) -> pd.Series:
+    """Build card HTML for a frame of stored articles in one vectorized string pass"""
+    icons = articles["sentiment"].map(SENTIMENT_ICONS).fillna("⚪")
+    dates = articles["published_at"].dt.strftime("%Y-%m-%d").fillna("")
+    scores = pd.Series(np.char.mod("%.2f", articles["score"].to_numpy(dtype=float)), index=articles.index)
+    return (
+        '<div class="ms-article"><div class="ms-article-title">' + icons + " " + _escape(articles["title"])
+        + '</div><div class="ms-article-meta">Source: ' + _escape(articles["source"]) + " • 📅 " + dates
+        + '</div><div class="ms-article-sentiment">Sentiment: ' + articles["sentiment"] + " (Score: " + scores
+        + ')</div><div class="ms-article-link"><a href="' + _escape(articles["url"])
+        + '" target="_blank">🔗 Read Full Article</a></div></div>'
+    )
+
+
+def _render_article_page(n_articles: int, page_of, key: str = "news"):
+    """
+    Render one page of article cards as a single HTML block
+
+    Args:
+        n_articles: Number of matching articles
+        page_of: Callable (start, stop) -> DataFrame of those articles
+        key: Widget key prefix
+    """
+    if n_articles == 0:
+        st.info("No articles match the selected filters.")
+        return
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        page_size = st.selectbox("Articles per page:", PAGE_SIZES, index=0, key=f"{key}_page_size")
+    n_pages = max(1, -(-n_articles // page_size))
+    with col2:
+        page = st.number_input("Page:", min_value=1, max_value=n_pages, value=1, step=1, key=f"{key}_page")
+    with col3:
+        st.caption(f"{n_articles} articles in history • page {page} of {n_pages}")
+
+    start = (int(page) - 1) * page_size
+    page_df = page_of(start, start + page_size)
+
+    missing = page_df[~page_df["id"].isin(_card_cache)]
+    if not missing.empty:
+        if len(_card_cache) + len(missing) > _CARD_CACHE_LIMIT:
+            _card_cache.clear()
+        _card_cache.update(zip(missing["id"], _build_article_cards(missing)))
+
+    cards = "".join(_card_cache[article_id] for article_id in page_df["id"])
+    st.markdown(ARTICLE_CARD_CSS + cards, unsafe_allow_html=True)
+
 
 def render_news_sentiment(company_name: str):
     st.subheader("📰 News & Sentiment")
@@ -14,6 +105,11 @@ def render_news_sentiment(company_name: str):
         st.error(f"Error fetching news: {e}")
         return
 
+    store = get_news_store()
+    search_index = get_search_index()
+    keyword_model = get_keyword_model()
+    store.add(company_name, articles)
+
     if not articles:
         st.warning("No news found for this company.")
         return
@@ -74,6 +170,9 @@ def render_news_sentiment(company_name: str):
     else:
         st.info("Most articles are **Neutral** – no strong sentiment trend.")
 
+    _display_news_impact(company_name, articles)
+    _display_news_drivers(keyword_model, company_name)
+
     st.markdown("---")
     st.markdown("### 📰 Latest Articles")
 
@@ -83,32 +182,111 @@ def render_news_sentiment(company_name: str):
         options=["Positive", "Negative", "Neutral"],
         default=["Positive", "Negative", "Neutral"]
     )
-    filtered_df = df[df["Sentiment"].isin(sentiment_filter)]
-
-    # --- 📰 Styled Article Cards ---
-    for _, row in filtered_df.iterrows():
-        sentiment_icon = {"Positive": "🟢", "Negative": "🔴", "Neutral": "⚪"}
-        st.markdown(
-            f"""
-            <div style="background-color:#f8f9fa; padding:14px; border-radius:10px; 
-                        margin-bottom:12px; box-shadow:0 2px 6px rgba(0,0,0,0.05);">
-                <div style="font-size:18px; font-weight:700; color:#000;">
-                    {sentiment_icon.get(row['Sentiment'], '⚪')} {row['Title']}
-                </div>
-                <div style="font-size:13px; color:#555; margin-top:6px;">
-                    Source: {row['Source']} • 📅 {row['Date']}
-                </div>
-                <div style="font-size:14px; margin-top:6px; font-weight:600; color:#333;">
-                    Sentiment: {row['Sentiment']} (Score: {row['Score']:.2f})
-                </div>
-                <div style="margin-top:8px;">
-                    <a href="{row['URL']}" target="_blank" style="color:#0a66c2; text-decoration:none;">
-                        🔗 Read Full Article
-                    </a>
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    positions = store.positions(company_name, sentiment_filter)
+
+    # --- 📰 Paginated Article Cards (only the shown page is loaded) ---
+    _render_article_page(len(positions), lambda start, stop: store.take(positions[start:stop]))
+
+    _display_archive_search(search_index, company_name)
+
+def _display_archive_search(search_index, symbol: str):
+    """Full-text search over every article stored so far"""
+    st.markdown("---")
+    st.markdown("### 🔎 Search News Archive")
+
+    query = st.text_input("Search headlines and descriptions:", placeholder="e.g. guidance cut", key="archive_query")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        known_symbols = sorted(search_index.symbols)
+        default_symbols = [symbol.upper()] if symbol.upper() in search_index.symbols else []
+        symbols = st.multiselect("Symbols:", known_symbols, default=default_symbols, key="archive_symbols")
+    with col2:
+        date_range = st.date_input("Published between:", value=(), key="archive_dates")
+    with col3:
+        sentiments = st.multiselect("Sentiment:", ["Positive", "Negative", "Neutral"], key="archive_sentiment")
+
+    if not query:
+        st.caption(f"{len(search_index)} articles indexed.")
+        return
+
+    start = date_range[0] if len(date_range) > 0 else None
+    end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1) if len(date_range) > 1 else None
+    results = search_index.search_frame(
+        query, symbols=symbols, start=start, end=end, sentiments=sentiments, limit=200
+    )
+    st.caption(f"{len(results)} matching articles out of {len(search_index)} indexed.")
+    _render_article_page(len(results), lambda start, stop: results.iloc[start:stop], key="archive")
+
 
+def _display_news_drivers(keyword_model, symbol: str):
+    """Show the terms gaining the most weight in recent coverage"""
+    st.markdown("### 🧭 What's Driving the News")
+
+    # Sectors come from basic_info snapshots cached by the Finances tab
+    sector_map = get_fundamentals_store().sector_map()
+    sector = sector_map.get(symbol.upper())
+    scopes = [symbol.upper()] + ([f"{sector} sector"] if sector else []) + ["All archived symbols"]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        scope = st.radio("Scope:", scopes, horizontal=True, key="drivers_scope")
+    with col2:
+        days = st.select_slider("Window (days):", options=[1, 3, 7, 14, 30, 90], value=7, key="drivers_days")
+
+    end = pd.Timestamp.now(tz="UTC")
+    window = dict(start=end - pd.Timedelta(days=days), end=end)
+    if sector and scope == f"{sector} sector":
+        terms = keyword_model.top_terms_by_sector(sector, sector_map, **window)
+    else:
+        terms = keyword_model.top_terms(symbols=None if scope == "All archived symbols" else [symbol], **window)
+    fig = create_keyword_chart(terms, scope)
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("Not enough archived articles in this window yet.")
+
+
+def _resolve_ticker(query: str):
+    """
+    Ticker for a symbol or company name, resolved like the Finances tab does
+
+    Results (including failures) are kept in the session so reruns do not
+    search again.
+    """
+    resolved = st.session_state.setdefault("news_resolved_tickers", {})
+    if query not in resolved:
+        resolution = resolve_symbol_for_financials(query)
+        resolved[query] = resolution['symbol'] if resolution.get('found') else None
+    return resolved[query]
+
+
+def _display_news_impact(company_name: str, articles):
+    """Show how prices moved after each sentiment bucket of headlines"""
+    st.markdown("### ⏱️ News Impact on Price")
+
+    symbol = _resolve_ticker(company_name)
+    if symbol is None:
+        st.info(f"Could not resolve a ticker for '{company_name}' to measure news impact.")
+        return
+
+    price_data = get_price_data(symbol, period="3mo")
+    if price_data is None:
+        st.info("No price data available to measure news impact.")
+        return
+
+    benchmark = get_price_data("SPY", period="3mo")
+    results = run_event_study(
+        articles_to_events(articles, symbol),
+        {symbol: price_data},
+        windows=DEFAULT_WINDOWS,
+        benchmark=benchmark
+    )
+    summary = summarize_event_study(results, DEFAULT_WINDOWS)
+    if summary is None or summary['events'].sum() == 0:
+        st.info("Articles are too recent to measure a price reaction yet.")
+        return
 
+    fig = create_event_study_chart(summary, symbol)
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption("Abnormal return = symbol return minus SPY return over the same bars, measured from the last close before publication.")
@@ -3,6 +3,14 @@ import yfinance as yf
 import plotly.graph_objs as go
 from fetchers.stocks import get_stock_info
 from components.helpers import _apply_dark_layout
+from components.figure_encoding import scatter_trace
+from components.risk_panel import render_risk_panel
+from components.simulation_panel import render_simulation_panel
+from utils.downsample import line_positions
+from utils.bar_store import get_bar_store
+from utils.ohlcv import as_ohlcv
+from utils.streaming_indicators import (LIVE_INTERVALS, get_live_indicators, periods_per_year,
+                                        save_live_indicators)
 
 def render_overview(selected_symbol, currency, interval, start_date, end_date):
     """Render the Overview tab with stock/crypto/ETF info and charts."""
@@ -52,10 +60,30 @@ def render_overview(selected_symbol, currency, interval, start_date, end_date):
             hist = stock.history(start=start_date, end=end_date, interval=interval)
 
             if not hist.empty:
+                # Crypto trades around the clock; everything else annualizes over trading sessions
+                crypto = st.session_state.get("selected_market") == "Crypto" or stock_info["exchange"] == "CCC"
+                bars_per_year = periods_per_year(interval, crypto)
+                if interval in LIVE_INTERVALS:
+                    _display_live_indicators(stock_info["ticker"], interval, hist, bars_per_year)
+                render_risk_panel(hist["Close"].rename(stock_info["ticker"]), key="overview_risk",
+                                  periods_per_year=bars_per_year)
+                # Horizons and simulated dates are in daily bars
+                if interval == "1d":
+                    render_simulation_panel(hist["Close"].rename(stock_info["ticker"]), key="overview_sim")
+
+                # Plot the finest stored resolution that fits the range
+                pyramid = get_bar_store().update(stock_info["ticker"], hist, interval)
+                if pyramid is not None:
+                    _, hist = pyramid.select(start_date, end_date)
                 hist = hist.reset_index()
+                # Intraday intervals come back with a "Datetime" column
+                date_col = "Date" if "Date" in hist.columns else hist.columns[0]
+                positions = line_positions(hist["Close"])
+                if positions is not None:
+                    hist = hist.iloc[positions]
                 fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=hist["Date"],
+                fig.add_trace(scatter_trace(
+                    x=hist[date_col],
                     y=hist["Close"],
                     mode="lines+markers",
                     name="Closing Price",
@@ -69,3 +97,22 @@ def render_overview(selected_symbol, currency, interval, start_date, end_date):
                 st.warning("No historical data available for this stock.")
     else:
         st.info("Please enter a symbol and click Search.")
+
+
+def _display_live_indicators(ticker: str, interval: str, hist, bars_per_year: int):
+    """Latest indicator readings, updated only with bars not seen before"""
+    live = get_live_indicators(ticker, interval, bars_per_year)
+    values = live.sync(as_ohlcv(hist))
+    save_live_indicators(ticker, interval)
+    if not values:
+        return
+
+    middle, upper, lower = values["Bollinger 20"]
+    macd, signal, _ = values["MACD 12/26/9"]
+    cols = st.columns(5)
+    cols[0].metric("SMA 20", f"{values['SMA 20']:.2f}")
+    cols[1].metric("EMA 20", f"{values['EMA 20']:.2f}")
+    cols[2].metric("RSI 14", f"{values['RSI 14']:.1f}")
+    cols[3].metric("MACD", f"{macd:.3f}", f"{macd - signal:+.3f} vs signal")
+    cols[4].metric("Volatility (ann.)", f"{values['Volatility 20']:.1%}")
+    st.caption(f"Bollinger 20: {lower:.2f} – {upper:.2f}")
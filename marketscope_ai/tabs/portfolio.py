@@ -0,0 +1,185 @@
+# tabs/portfolio.py
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+from components.charts import create_portfolio_chart, create_drift_chart, create_frontier_chart
+from components.currency import get_exchange_rate
+from components.risk_panel import render_risk_panel
+from fetchers.financials import get_price_data
+from utils.bar_store import get_bar_store
+from utils.optimizer import OPTIMIZERS, optimize_portfolio
+from utils.portfolio import fx_symbol, load_portfolio, normalize_holdings
+from utils.risk import COVARIANCE_METHODS
+
+
+DEFAULT_HOLDINGS = pd.DataFrame([
+    {"symbol": "AAPL", "quantity": 10, "cost": 150.0, "currency": "USD", "target_weight": 0.3},
+    {"symbol": "MSFT", "quantity": 5, "cost": 300.0, "currency": "USD", "target_weight": 0.3},
+    {"symbol": "SPY", "quantity": 4, "cost": 420.0, "currency": "USD", "target_weight": 0.2},
+    {"symbol": "BTC-USD", "quantity": 0.02, "cost": 30000.0, "currency": "USD", "target_weight": 0.1},
+    {"symbol": "GC=F", "quantity": 1, "cost": 1900.0, "currency": "USD", "target_weight": 0.1},
+])
+
+
+# Symbols and FX pairs that failed to load are retried after this long
+FAILED_FETCH_TTL = pd.Timedelta(minutes=15)
+
+
+def _has_bars(symbol: str, start_date, end_date) -> bool:
+    """
+    Whether the bar store has daily bars for a symbol, fetching them if not
+
+    Failures are remembered in the session for FAILED_FETCH_TTL so reruns do
+    not hit the network again for symbols that do not exist.
+    """
+    if get_bar_store().pyramid(symbol) is not None:
+        return True
+    failed = st.session_state.setdefault("portfolio_failed_fetches", {})
+    when = failed.get(symbol)
+    if when is not None and pd.Timestamp.now() - when < FAILED_FETCH_TTL:
+        return False
+    if get_price_data(symbol, start_date, end_date) is None:
+        failed[symbol] = pd.Timestamp.now()
+        return False
+    failed.pop(symbol, None)
+    return True
+
+
+def _fetch_missing(holdings: pd.DataFrame, base_currency: str, start_date, end_date) -> dict:
+    """
+    Load daily bars for holdings and FX pairs the bar store does not have yet
+
+    Returns:
+        Spot rates for currencies whose FX history could not be fetched
+    """
+    for symbol in holdings["symbol"].unique():
+        _has_bars(symbol, start_date, end_date)
+
+    spot_rates = {}
+    cached_rates = st.session_state.setdefault("portfolio_spot_rates", {})
+    for currency in holdings["currency"].unique():
+        if currency == base_currency.upper():
+            continue
+        pair = fx_symbol(currency, base_currency)
+        if not _has_bars(pair, start_date, end_date):
+            if pair not in cached_rates:
+                cached_rates[pair] = get_exchange_rate(currency, base_currency)
+            spot_rates[currency] = cached_rates[pair]
+    return spot_rates
+
+
+def render_portfolio(base_currency: str = "USD", start_date=None, end_date=None):
+    """
+    Main function to render the portfolio tab
+    """
+    st.header("💼 Portfolio")
+
+    st.caption("Holdings: symbol, quantity, cost per unit and currency (optional target weight).")
+    uploaded = st.file_uploader("Upload holdings CSV", type=["csv"], key="portfolio_csv")
+    holdings = pd.read_csv(uploaded) if uploaded is not None else DEFAULT_HOLDINGS
+    holdings = st.data_editor(holdings, num_rows="dynamic", use_container_width=True, key="portfolio_holdings")
+
+    normalized = normalize_holdings(holdings, base_currency)
+    if normalized.empty:
+        st.info("Add at least one holding with a symbol and quantity.")
+        return
+
+    with st.spinner("Loading prices..."):
+        spot_rates = _fetch_missing(normalized, base_currency, start_date, end_date)
+        analytics = load_portfolio(normalized, base_currency, start_date, end_date, fallback_rates=spot_rates)
+
+    if analytics is None:
+        st.error("No price history available for these holdings.")
+        return
+    if spot_rates:
+        st.warning(f"No FX history for {', '.join(spot_rates)}; using today's rate for the whole period.")
+
+    summary = analytics.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(f"Value ({summary['base_currency']})", f"{summary['nav']:,.2f}")
+    with col2:
+        st.metric("Total Return", f"{summary['total_return']:.2%}", f"CAGR {summary['cagr']:.2%}")
+    with col3:
+        st.metric("Sharpe", f"{summary['sharpe']:.2f}", f"Vol {summary['volatility']:.2%}", delta_color="off")
+    with col4:
+        st.metric("Max Drawdown", f"{summary['max_drawdown']:.2%}")
+        st.metric("Drift from Target", f"{summary['drift']:.2%}")
+
+    fig = create_portfolio_chart(analytics)
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+
+    fig = create_drift_chart(analytics)
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+
+    table = analytics.holdings_table()
+    percent = ['weight', 'target_weight', 'drift', 'unrealized_pnl_pct', 'period_return', 'contribution']
+    money = ['price', 'value', 'rebalance_trade', 'cost_value', 'unrealized_pnl']
+    st.dataframe(
+        table.style.format({**{c: '{:.2%}' for c in percent}, **{c: '{:,.2f}' for c in money}}, na_rep='N/A'),
+        use_container_width=True
+    )
+
+    render_risk_panel(analytics.price_frame(), analytics.weights[-1], key="portfolio_risk",
+                      periods_per_year=analytics.periods_per_year)
+    _display_optimizer(analytics)
+
+
+def _display_optimizer(analytics):
+    """Optimal weights for the current holdings and the efficient frontier"""
+    with st.expander("🎯 Optimize Weights"):
+        n_assets = len(analytics.holdings)
+        if n_assets < 2:
+            st.info("Add at least two holdings to optimize weights.")
+            return
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            method = st.selectbox("Objective:", list(OPTIMIZERS), format_func=OPTIMIZERS.get, index=1,
+                                  key="opt_method")
+        with col2:
+            floor = round(1.0 / n_assets + 0.005, 2)
+            upper = st.slider("Max Weight per Holding:", min(floor, 1.0), 1.0, 1.0, 0.01, key="opt_upper")
+        with col3:
+            cov_method = st.selectbox("Covariance:", COVARIANCE_METHODS, index=1, key="opt_cov")
+
+        result = optimize_portfolio(analytics.price_frame(), method, upper=upper, cov_method=cov_method,
+                                    periods_per_year=analytics.periods_per_year)
+        if result is None:
+            st.info("Not enough overlapping price history to optimize.")
+            return
+        if method == "risk_parity" and upper < 1.0:
+            st.caption("Holdings held at the max weight carry less risk; the others share the rest equally.")
+
+        current = analytics.weights[-1]
+        cov, mu = result['cov'], result['mu'].to_numpy()
+        current_vol = float(np.sqrt(max(current @ cov @ current, 0.0)))
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Expected Return", f"{result['expected_return']:.2%}", f"{result['expected_return'] - current @ mu:+.2%} vs current")
+        col2.metric("Volatility", f"{result['volatility']:.2%}", f"{result['volatility'] - current_vol:+.2%} vs current",
+                    delta_color="inverse")
+        col3.metric("Sharpe", f"{result['sharpe']:.2f}")
+
+        fig = create_frontier_chart(result['frontier'], {
+            "Current": (current_vol, float(current @ mu)),
+            OPTIMIZERS[method]: (result['volatility'], result['expected_return']),
+        })
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
+
+        table = pd.DataFrame({
+            "current_weight": current,
+            "optimal_weight": result['weights'].to_numpy(),
+            "risk_contribution": result['risk_contributions'].to_numpy(),
+            "expected_return": mu,
+        }, index=result['weights'].index)
+        table["trade_value"] = (table["optimal_weight"] - table["current_weight"]) * analytics.nav[-1]
+        st.dataframe(
+            table.style.format({'current_weight': '{:.2%}', 'optimal_weight': '{:.2%}',
+                                'risk_contribution': '{:.2%}', 'expected_return': '{:.2%}',
+                                'trade_value': '{:,.2f}'}),
+            use_container_width=True
+        )
+        st.caption("Expected returns are historical means; optimal weights are sensitive to them.")
@@ -128,6 +128,7 @@ from tabs.overview import render_overview
 from tabs.finances import render_finances
 from tabs.news import render_news_sentiment
 from tabs.llm_summary import render_llm_summary
+from tabs.portfolio import render_portfolio
 # from tabs.ask_ai import render_ask_ai
 
 
@@ -206,8 +207,8 @@ def main():
         # Only show tabs if a symbol is selected
         if selected_symbol:
             # Tabs
-            tab1, tab2, tab3, tab4, tab5 = st.tabs(
-                ["📊 Overview", "💰 Finances", "📰 News & Sentiment", "🧠 LLM Summary", "💬 Ask AI"]
+            tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
+                ["📊 Overview", "💰 Finances", "📰 News & Sentiment", "🧠 LLM Summary", "💬 Ask AI", "💼 Portfolio"]
             )
 
             with tab1:
@@ -227,6 +228,9 @@ def main():
 
             # with tab5:
             #     render_ask_ai(selected_symbol)
+
+            with tab6:
+                render_portfolio(currency, start_date, end_date)
         else:
             st.info("Please select a symbol from the sidebar to view data.")
 
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from utils.event_study import run_event_study
+
+
+def _daily_bars():
+    """Two weeks of NYSE daily bars stamped at local midnight, close = 100 + bar number"""
+    index = pd.bdate_range("2024-01-08", "2024-01-19", tz="America/New_York")
+    return pd.DataFrame({"Close": 100.0 + np.arange(len(index))}, index=index)
+
+
+def _ret_1(bars, published):
+    events = pd.DataFrame({"symbol": ["AAPL"], "timestamp": [published], "sentiment": ["Positive"]})
+    results = run_event_study(events, {"AAPL": bars}, windows=(1,))
+    return results["ret_1"].iloc[0]
+
+
+def _close(bars, day):
+    return bars.loc[pd.Timestamp(day, tz="America/New_York"), "Close"]
+
+
+def test_saturday_article_counts_from_monday():
+    bars = _daily_bars()
+    ret = _ret_1(bars, "2024-01-13T17:00:00Z")
+    assert np.isclose(ret, _close(bars, "2024-01-15") / _close(bars, "2024-01-12") - 1)
+
+
+def test_after_close_article_counts_from_next_session():
+    bars = _daily_bars()
+    ret = _ret_1(bars, "2024-01-10T23:00:00Z")  # Wednesday 18:00 New York
+    assert np.isclose(ret, _close(bars, "2024-01-11") / _close(bars, "2024-01-10") - 1)
+
+
+def test_in_session_article_counts_from_same_day():
+    bars = _daily_bars()
+    ret = _ret_1(bars, "2024-01-10T15:00:00Z")  # Wednesday 10:00 New York
+    assert np.isclose(ret, _close(bars, "2024-01-10") / _close(bars, "2024-01-09") - 1)
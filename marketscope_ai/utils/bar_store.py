@@ -0,0 +1,287 @@
+# utils/bar_store.py
+import os
+
+import pandas as pd
+
+from utils.downsample import DEFAULT_POINT_BUDGET
+
+
+DATA_DIR = os.getenv("MARKETSCOPE_DATA_DIR", "data")
+BAR_STORE_DIR = os.path.join(DATA_DIR, "bars")
+
+# Pyramid ladder: every level nests exactly into the next coarser one
+PYRAMID_LEVELS = {
+    "1m": pd.Timedelta(minutes=1),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+    "1w": pd.Timedelta(weeks=1),
+}
+
+# yfinance intervals accepted as a base resolution
+BASE_INTERVALS = {
+    "1m": pd.Timedelta(minutes=1),
+    "2m": pd.Timedelta(minutes=2),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "30m": pd.Timedelta(minutes=30),
+    "60m": pd.Timedelta(hours=1),
+    "90m": pd.Timedelta(minutes=90),
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+    "5d": pd.Timedelta(days=5),
+    "1wk": pd.Timedelta(weeks=1),
+}
+
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def _rule(level: str):
+    """pandas resample rule for a pyramid level (weeks start on Monday)"""
+    if level == "1w":
+        return pd.offsets.Week(weekday=0)
+    return PYRAMID_LEVELS[level]
+
+
+def resample_ohlcv(bars: pd.DataFrame, level: str) -> pd.DataFrame:
+    """
+    Vectorized OHLCV resample to a pyramid level (left-closed, left-labeled buckets)
+
+    Buckets follow exchange wall-clock time, so daily bars stay at local
+    midnight across DST changes and do not depend on where the input starts.
+    """
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in bars.columns}
+    tz = bars.index.tz
+    if tz is not None:
+        bars = bars.tz_localize(None)
+    out = bars.resample(_rule(level), closed="left", label="left").agg(agg)
+    if "Close" in out.columns:
+        out = out.dropna(subset=["Close"])
+    if tz is not None:
+        out.index = out.index.tz_localize(tz, ambiguous=True, nonexistent="shift_forward")
+    return out
+
+
+class BarPyramid:
+    """
+    One symbol's bars at the base resolution plus precomputed coarser levels
+
+    Levels are kept in ascending order of bar size, each built from the next
+    finer level, so a chart can read the finest level that fits its pixel
+    budget instead of resampling raw bars on demand.
+    """
+
+    def __init__(self, base_interval: str, bars: pd.DataFrame):
+        if base_interval not in BASE_INTERVALS:
+            raise ValueError(f"Unsupported base interval '{base_interval}'")
+        self.base_interval = base_interval
+        base_size = BASE_INTERVALS[base_interval]
+        self.levels = {base_interval: _clean(bars)}
+        for level, size in PYRAMID_LEVELS.items():
+            if size > base_size:
+                self.levels[level] = None
+        self._rebuild_from(None)
+
+    @property
+    def resolutions(self) -> list:
+        return list(self.levels)
+
+    @property
+    def base(self) -> pd.DataFrame:
+        return self.levels[self.base_interval]
+
+    def _rebuild_from(self, first_new):
+        """Recompute coarser levels, only from the bucket containing first_new onwards"""
+        names = list(self.levels)
+        for finer, level in zip(names, names[1:]):
+            source = self.levels[finer]
+            current = self.levels[level]
+            if first_new is None or current is None or current.empty:
+                self.levels[level] = resample_ohlcv(source, level)
+                continue
+            labels = current.index[current.index <= first_new]
+            if len(labels) == 0:
+                self.levels[level] = resample_ohlcv(source, level)
+                continue
+            cutoff = labels[-1]
+            tail = resample_ohlcv(source[source.index >= cutoff], level)
+            self.levels[level] = pd.concat([current[current.index < cutoff], tail])
+
+    def append(self, bars: pd.DataFrame) -> bool:
+        """
+        Merge new (or revised) base bars and update coarser levels incrementally
+
+        Returns:
+            True if any bar was added or changed
+        """
+        bars = _clean(bars)
+        base = self.base
+        # Drop bars already stored with identical values
+        old = base.reindex(index=bars.index, columns=bars.columns)
+        same = (old.eq(bars) | (old.isna() & bars.isna())).all(axis=1)
+        bars = bars[~same]
+        if bars.empty:
+            return False
+        merged = pd.concat([base[~base.index.isin(bars.index)], bars])
+        if len(base) and bars.index.min() < base.index.max():
+            merged = merged.sort_index()
+        self.levels[self.base_interval] = merged
+        self._rebuild_from(bars.index.min())
+        return True
+
+    def select(self, start=None, end=None, max_points: int = DEFAULT_POINT_BUDGET):
+        """
+        Bars for [start, end] at the finest resolution that fits max_points
+
+        Returns:
+            (resolution, DataFrame) tuple
+        """
+        chosen = None
+        for level, bars in self.levels.items():
+            if bars is None:
+                continue
+            lo = 0 if start is None else bars.index.searchsorted(_align(start, bars.index), side="left")
+            hi = len(bars) if end is None else bars.index.searchsorted(_align(end, bars.index), side="right")
+            chosen = (level, bars.iloc[lo:hi])
+            if hi - lo <= max_points:
+                break
+        return chosen
+
+
+def _clean(bars: pd.DataFrame) -> pd.DataFrame:
+    """Keep OHLCV columns, drop rows without a close, sort and dedupe the index"""
+    cols = [c for c in OHLCV_AGG if c in bars.columns]
+    bars = bars[cols].dropna(subset=["Close"])
+    if not isinstance(bars.index, pd.DatetimeIndex):
+        bars.index = pd.to_datetime(bars.index)
+    if not bars.index.is_monotonic_increasing:
+        bars = bars.sort_index()
+    return bars[~bars.index.duplicated(keep="last")]
+
+
+def _align(value, index: pd.DatetimeIndex):
+    """Make a date/timestamp comparable with a (possibly tz-aware) index"""
+    ts = pd.Timestamp(value)
+    if index.tz is not None and ts.tzinfo is None:
+        return ts.tz_localize(index.tz)
+    if index.tz is None and ts.tzinfo is not None:
+        return ts.tz_convert(None)
+    return ts
+
+
+class BarStore:
+    """
+    Local store of bar pyramids keyed by (symbol, base interval)
+
+    Pyramids are pickled under BAR_STORE_DIR so they survive restarts and are
+    loaded lazily on first access.
+    """
+
+    def __init__(self, root: str = BAR_STORE_DIR):
+        self.root = root
+        self._pyramids = {}
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}_{interval}.pkl")
+
+    def pyramid(self, symbol: str, interval: str = "1d"):
+        """Stored pyramid for a symbol, or None"""
+        key = (symbol.upper(), interval)
+        if key not in self._pyramids:
+            path = self._path(symbol, interval)
+            if not os.path.exists(path):
+                return None
+            try:
+                self._pyramids[key] = pd.read_pickle(path)
+            except Exception as e:
+                print(f"Error loading bars for {symbol}: {e}")
+                return None
+        return self._pyramids[key]
+
+    def update(self, symbol: str, bars: pd.DataFrame, interval: str = "1d"):
+        """Ingest bars for a symbol, creating or incrementally extending its pyramid"""
+        if bars is None or bars.empty or interval not in BASE_INTERVALS:
+            return None
+        pyramid = self.pyramid(symbol, interval)
+        if pyramid is None:
+            pyramid = BarPyramid(interval, bars)
+            self._pyramids[(symbol.upper(), interval)] = pyramid
+        elif not pyramid.append(bars):
+            # Reruns pass the same history; skip re-pickling an unchanged pyramid
+            return pyramid
+        self._save(symbol, interval, pyramid)
+        return pyramid
+
+    def _save(self, symbol: str, interval: str, pyramid: BarPyramid):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            pd.to_pickle(pyramid, self._path(symbol, interval))
+        except Exception as e:
+            print(f"Error saving bars for {symbol}: {e}")
+
+    def bars(self, symbol: str, resolution: str = "1d", interval: str = "1d"):
+        """Bars of one pyramid level, or None if not stored"""
+        pyramid = self.pyramid(symbol, interval)
+        if pyramid is None:
+            return None
+        return pyramid.levels.get(resolution)
+
+    def symbols(self, interval: str = "1d") -> list:
+        """Symbols with a stored pyramid for a base interval (loaded or on disk)"""
+        found = {symbol for symbol, level in self._pyramids if level == interval}
+        suffix = f"_{interval}.pkl"
+        if os.path.isdir(self.root):
+            found.update(name[:-len(suffix)] for name in os.listdir(self.root) if name.endswith(suffix))
+        return sorted(found)
+
+    def matrix(self, symbols, field: str = "Close", resolution: str = "1d", interval: str = "1d",
+               start=None, end=None) -> pd.DataFrame:
+        """
+        One field of many symbols aligned on a shared time axis (time x symbol)
+
+        Daily and coarser levels align on the exchange-local calendar date, so
+        symbols from different timezones share rows; intraday levels align on
+        UTC instants. Missing bars are NaN; symbols without stored bars are
+        left out.
+        """
+        daily = PYRAMID_LEVELS.get(resolution, BASE_INTERVALS.get(resolution)) >= pd.Timedelta(days=1)
+        columns = {}
+        for symbol in symbols:
+            bars = self.bars(symbol, resolution, interval)
+            if bars is None or bars.empty or field not in bars.columns:
+                continue
+            series = bars[field]
+            if daily:
+                index = series.index.tz_localize(None) if series.index.tz is not None else series.index
+                series = pd.Series(series.to_numpy(), index=index.normalize())
+            elif series.index.tz is not None:
+                series = series.tz_convert("UTC")
+            columns[symbol.upper()] = series[~series.index.duplicated(keep="last")]
+        if not columns:
+            return pd.DataFrame()
+
+        frame = pd.concat(columns, axis=1).sort_index()
+        bounds = []
+        for value in (start, end):
+            if value is not None and daily:
+                # Compare by local calendar date, like the rows themselves
+                ts = pd.Timestamp(value)
+                value = (ts.tz_localize(None) if ts.tzinfo is not None else ts).normalize()
+            bounds.append(_align(value, frame.index) if value is not None else None)
+        if bounds[0] is not None:
+            frame = frame[frame.index >= bounds[0]]
+        if bounds[1] is not None:
+            frame = frame[frame.index <= bounds[1]]
+        return frame
+
+
+_store = None
+
+
+def get_bar_store() -> BarStore:
+    """Process-wide BarStore instance"""
+    global _store
+    if _store is None:
+        _store = BarStore()
+    return _store
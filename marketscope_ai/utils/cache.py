@@ -0,0 +1,141 @@
+# utils/cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# Arrays above this many bytes are fingerprinted from a strided sample plus their tail
+FULL_HASH_BYTES = 8 * 1024 * 1024
+SAMPLE_ELEMENTS = 65536
+TAIL_ELEMENTS = 4096
+
+
+def _update_array(digest, values):
+    """Feed an array (dtype, shape and contents) into a running digest"""
+    if isinstance(getattr(values, "dtype", None), pd.DatetimeTZDtype):
+        # tz-aware values would otherwise become an object array of Timestamps
+        digest.update(str(values.dtype).encode())
+        values = pd.DatetimeIndex(values).asi8
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        arr = arr.astype(str)
+    if arr.dtype.kind == 'M':
+        arr = arr.view(np.int64)
+    digest.update(f"{arr.dtype.str}{arr.shape}".encode())
+    arr = np.ascontiguousarray(arr)
+    if arr.nbytes <= FULL_HASH_BYTES:
+        digest.update(arr.tobytes())
+        return
+    # Long histories: a strided sample catches revisions, the tail catches new bars
+    flat = arr.reshape(-1)
+    step = max(len(flat) // SAMPLE_ELEMENTS, 1)
+    digest.update(np.ascontiguousarray(flat[::step]).tobytes())
+    digest.update(np.ascontiguousarray(flat[-TAIL_ELEMENTS:]).tobytes())
+
+
+def _update(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(b"frame")
+        _update_array(digest, value.columns.astype(str))
+        _update_array(digest, value.index)
+        for col in value.columns:
+            _update_array(digest, value[col].array)
+    elif isinstance(value, (pd.Series, pd.Index)):
+        digest.update(f"series{value.name}".encode())
+        if isinstance(value, pd.Series):
+            _update_array(digest, value.index)
+        _update_array(digest, value.array)
+    elif isinstance(value, np.ndarray):
+        _update_array(digest, value)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"seq{len(value)}".encode())
+        for item in value:
+            _update(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"map{len(value)}".encode())
+        for key in sorted(value, key=str):
+            _update(digest, key)
+            _update(digest, value[key])
+    else:
+        digest.update(f"{type(value).__name__}:{value!r}".encode())
+
+
+def fingerprint(*values) -> str:
+    """
+    Cheap content fingerprint of frames, arrays and plain parameters
+
+    Array contents are hashed in full up to FULL_HASH_BYTES; longer arrays
+    contribute a strided sample plus their last TAIL_ELEMENTS values.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        _update(digest, value)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    Byte-bounded least-recently-used cache with hit-rate statistics
+
+    Values must support len() (e.g. serialized strings/bytes), which is used as
+    their size when enforcing max_bytes. A lock guards every access, since
+    Streamlit runs each session's script in its own thread.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.bytes -= len(self._items.pop(key))
+            self._items[key] = value
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,261 @@
+# utils/correlation.py
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import fill_gaps
+from utils.bar_store import get_bar_store
+
+
+MIN_PERIODS = 20  # overlapping returns needed for a pair's correlation
+CORRELATION_CACHE_SIZE = 8
+
+
+def aligned_returns(close) -> np.ndarray:
+    """
+    (T-1, N) simple returns that are NaN wherever the close itself is missing
+
+    Each return spans back to the symbol's previous stored bar, so a symbol
+    that skips a day (holiday, other exchange) is compared bar to bar
+    rather than losing the return after the gap.
+    """
+    values = np.asarray(close, dtype=np.float64)
+    filled = fill_gaps(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = filled[1:] / filled[:-1] - 1
+    returns[~np.isfinite(values[1:])] = np.nan
+    return returns
+
+
+def pairwise_correlation(returns, min_periods: int = MIN_PERIODS):
+    """
+    Pearson correlation of every column pair over the rows where both are present
+
+    The pairwise-complete sums come from masked matrix products: with M the
+    validity mask and X the zero-filled values, M'M counts the overlap,
+    X'M holds each column's sum over its partner's rows, (X*X)'M the sums
+    of squares and X'X the cross products. Matches DataFrame.corr().
+
+    Returns:
+        (correlation, overlap counts), both (N, N); pairs with fewer than
+        min_periods overlapping rows are NaN
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    mask = np.isfinite(returns)
+    # Centering keeps the sum-of-squares differences well conditioned
+    centered = returns - np.nanmean(np.where(mask, returns, np.nan), axis=0)
+    x = np.where(mask, centered, 0.0)
+    m = mask.astype(np.float64)
+
+    counts = m.T @ m
+    sums = x.T @ m           # sums[i, j]: column i over rows where j is present
+    squares = (x * x).T @ m
+    cross = x.T @ x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = cross - sums * sums.T / counts
+        var_i = squares - sums ** 2 / counts
+        corr = cov / np.sqrt(var_i * var_i.T)
+    corr = np.clip(corr, -1.0, 1.0)
+    corr[counts < max(min_periods, 2)] = np.nan
+    np.fill_diagonal(corr, np.where(np.diag(counts) >= max(min_periods, 2), 1.0, np.nan))
+    return corr, counts
+
+
+def correlation_distance(corr) -> np.ndarray:
+    """sqrt((1 - rho) / 2): 0 for identical, 1 for opposite series; unknown pairs count as uncorrelated"""
+    return np.sqrt(0.5 * (1.0 - np.nan_to_num(corr, nan=0.0)))
+
+
+def average_linkage(distance) -> np.ndarray:
+    """
+    Agglomerative clustering with average (UPGMA) linkage
+
+    Every row caches its nearest active cluster, so a merge only rescans
+    the rows that pointed at one of the two merged clusters. Cluster
+    distances are updated with one vectorized Lance-Williams step.
+
+    Returns:
+        (N-1, 4) linkage rows of (cluster a, cluster b, distance, size) in
+        merge order; leaves are 0..N-1 and the cluster made at step s is N+s
+        (the scipy layout)
+    """
+    dist = np.array(distance, dtype=np.float64)
+    n = len(dist)
+    np.fill_diagonal(dist, np.inf)
+    size = np.ones(n)
+    node = np.arange(n)
+    active = np.ones(n, dtype=bool)
+    nearest = dist.argmin(axis=1) if n else np.empty(0, dtype=int)
+    nearest_d = dist[np.arange(n), nearest]
+
+    linkage = np.empty((max(n - 1, 0), 4))
+    for step in range(n - 1):
+        i = int(nearest_d.argmin())
+        j = int(nearest[i])
+        linkage[step] = (min(node[i], node[j]), max(node[i], node[j]), nearest_d[i], size[i] + size[j])
+
+        merged = (size[i] * dist[i] + size[j] * dist[j]) / (size[i] + size[j])
+        merged[i] = np.inf
+        dist[j] = np.inf
+        dist[:, j] = np.inf
+        merged[j] = np.inf
+        dist[i] = merged
+        dist[:, i] = merged
+        size[i] += size[j]
+        node[i] = n + step
+        active[j] = False
+        nearest_d[j] = np.inf
+
+        stale = active & ((nearest == i) | (nearest == j))
+        stale[i] = True
+        rows = np.flatnonzero(stale)
+        nearest[rows] = dist[rows].argmin(axis=1)
+        nearest_d[rows] = dist[rows, nearest[rows]]
+        closer = active & (merged < nearest_d)
+        nearest[closer] = i
+        nearest_d[closer] = merged[closer]
+    return linkage
+
+
+def leaf_order(linkage) -> np.ndarray:
+    """Leaves in dendrogram order (left subtree first), so similar series sit together"""
+    n = len(linkage) + 1
+    if n == 1:
+        return np.zeros(1, dtype=int)
+    order, stack = [], [2 * n - 2]
+    while stack:
+        node = stack.pop()
+        if node < n:
+            order.append(node)
+        else:
+            left, right = linkage[node - n, :2].astype(int)
+            stack.extend((right, left))
+    return np.asarray(order)
+
+
+def cut_tree(linkage, n_clusters: int) -> np.ndarray:
+    """Cluster number of every leaf when the tree is cut into n_clusters groups"""
+    n = len(linkage) + 1
+    parent = np.arange(2 * n - 1)
+    for step in range(max(n - max(n_clusters, 1), 0)):
+        parent[linkage[step, :2].astype(int)] = n + step
+    roots = parent[:n]
+    while True:
+        up = parent[roots]
+        if np.array_equal(up, roots):
+            break
+        roots = up
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels
+
+
+class CorrelationMatrix:
+    """
+    Pairwise-complete return correlations of a watchlist with a clustering
+
+    order lists the symbols in dendrogram order, which puts clusters of
+    co-moving symbols into blocks along the diagonal of the heatmap.
+    """
+
+    __slots__ = ("symbols", "corr", "counts", "linkage", "order", "start", "end")
+
+    def __init__(self, symbols, corr, counts, start=None, end=None):
+        self.symbols = list(symbols)
+        self.corr = corr
+        self.counts = counts
+        self.linkage = average_linkage(correlation_distance(corr))
+        self.order = leaf_order(self.linkage)
+        self.start, self.end = start, end
+
+    def frame(self, ordered: bool = True) -> pd.DataFrame:
+        """(symbol x symbol) correlations, in dendrogram order by default"""
+        order = self.order if ordered else np.arange(len(self.symbols))
+        labels = [self.symbols[i] for i in order]
+        return pd.DataFrame(self.corr[np.ix_(order, order)], index=labels, columns=labels)
+
+    def clusters(self, n_clusters: int) -> pd.Series:
+        """Cluster number per symbol, numbered in dendrogram order"""
+        labels = cut_tree(self.linkage, n_clusters)
+        # Renumber so cluster 1 is the first block of the heatmap
+        first_seen = {}
+        for leaf in self.order:
+            first_seen.setdefault(labels[leaf], len(first_seen) + 1)
+        return pd.Series([first_seen[label] for label in labels], index=self.symbols, name="cluster")
+
+
+def correlation_matrix(close, min_periods: int = MIN_PERIODS) -> CorrelationMatrix:
+    """Correlation matrix and clustering of a (time x symbol) close DataFrame"""
+    corr, counts = pairwise_correlation(aligned_returns(close.to_numpy(dtype=np.float64)), min_periods)
+    start, end = (close.index[0], close.index[-1]) if len(close) else (None, None)
+    return CorrelationMatrix(close.columns, corr, counts, start, end)
+
+
+_correlations = {}
+
+
+def watchlist_correlation(symbols, start=None, end=None, resolution: str = "1d",
+                          min_periods: int = MIN_PERIODS):
+    """
+    Correlation matrix of stored symbols over a window, cached per window
+
+    The cache key includes the newest stored bar, so a new bar recomputes
+    while reruns of an unchanged window are free.
+
+    Returns:
+        CorrelationMatrix, or None when fewer than two symbols are stored
+    """
+    close = get_bar_store().matrix(symbols, "Close", resolution, start=start, end=end)
+    if close.shape[1] < 2:
+        return None
+    key = (tuple(close.columns), resolution, close.index[0], close.index[-1], min_periods)
+    if key not in _correlations:
+        if len(_correlations) >= CORRELATION_CACHE_SIZE:
+            _correlations.pop(next(iter(_correlations)))
+        _correlations[key] = correlation_matrix(close, min_periods)
+    return _correlations[key]
+
+
+def benchmark_correlation(n_days: int = 2520, n_symbols: int = 1000, n_groups: int = 10,
+                          missing: float = 0.1, seed: int = 0) -> dict:
+    """
+    Time the correlation matrix and clustering of a grouped random universe
+    with missing bars, and check both against slower references
+
+    Returns:
+        Dict of step -> seconds, plus the largest difference from pandas
+        and the share of symbols clustered with their own group
+    """
+    rng = np.random.default_rng(seed)
+    groups = rng.integers(0, n_groups, n_symbols)
+    factors = rng.normal(0, 0.01, (n_days, n_groups))
+    returns = factors[:, groups] + rng.normal(0, 0.008, (n_days, n_symbols))
+    close = 100 * np.cumprod(1 + returns, axis=0)
+    close[rng.random(close.shape) < missing] = np.nan
+    frame = pd.DataFrame(close, index=pd.bdate_range("2014-01-01", periods=n_days),
+                         columns=[f"S{i}" for i in range(n_symbols)])
+
+    out = {}
+    start = time.perf_counter()
+    corr, _ = pairwise_correlation(aligned_returns(close))
+    out["correlation_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    linkage = average_linkage(correlation_distance(corr))
+    out["clustering_s"] = time.perf_counter() - start
+
+    subset = pd.DataFrame(aligned_returns(close[:, :50])).corr(min_periods=MIN_PERIODS).to_numpy()
+    out["max_diff_vs_pandas"] = float(np.nanmax(np.abs(corr[:50, :50] - subset)))
+
+    labels = cut_tree(linkage, n_groups)
+    # Each found cluster should map onto one true group
+    purity = sum(np.bincount(groups[labels == c]).max() for c in np.unique(labels)) / n_symbols
+    out["cluster_purity"] = purity
+    assert out["max_diff_vs_pandas"] < 1e-10 and purity > 0.99, out
+    return out
+
+
+if __name__ == "__main__":
+    print("Correlation matrix, 1000 symbols x 10 years, 10% missing bars:")
+    print("=" * 60)
+    for name, value in benchmark_correlation().items():
+        print(f"{name:>20}: {value:.4g}")
@@ -0,0 +1,130 @@
+# utils/downsample.py
+import numpy as np
+import pandas as pd
+
+from utils.ohlcv import OHLCV
+
+
+# Series longer than this are downsampled before being sent to the browser
+DOWNSAMPLE_THRESHOLD = 5000
+# ~2 points per horizontal pixel of a wide (1200px) chart
+POINTS_PER_PIXEL = 2
+DEFAULT_CHART_WIDTH = 1200
+DEFAULT_POINT_BUDGET = POINTS_PER_PIXEL * DEFAULT_CHART_WIDTH
+
+
+def point_budget(width_px: int = DEFAULT_CHART_WIDTH) -> int:
+    """Number of points worth rendering for a chart of the given pixel width"""
+    return max(int(width_px) * POINTS_PER_PIXEL, 10)
+
+
+def lttb_indices(values, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets selection of row positions
+
+    Keeps the first and last point and, from each of n_out - 2 equal buckets,
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket. Preserves peaks and troughs of a line.
+
+    Args:
+        values: 1-D array-like of y values (NaNs are treated as the series mean)
+        n_out: Number of points to keep
+
+    Returns:
+        Sorted int64 array of row positions
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    if np.isnan(y).any():
+        y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+
+    # Bucket edges over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Stop at the last edge so the final bucket excludes the endpoint
+    avg_y = np.add.reduceat(y[:edges[-1]], edges[:-1]) / counts
+    avg_x = (edges[:-1] + edges[1:] - 1) / 2.0
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    n_buckets = n_out - 2
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < n_buckets:
+            cx, cy = avg_x[i + 1], avg_y[i + 1]
+        else:
+            cx, cy = n - 1.0, y[-1]
+        xs = np.arange(lo, hi, dtype=np.float64)
+        area = np.abs((a - cx) * (y[lo:hi] - y[a]) - (a - xs) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def bucket_starts(n: int, n_out: int) -> np.ndarray:
+    """Start positions of n_out contiguous, near-equal buckets over n rows"""
+    if n_out >= n:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n, n_out, endpoint=False).astype(np.int64))
+
+
+def aggregate_ohlcv(price_data, n_out: int):
+    """
+    Aggregate OHLCV bars (DataFrame or OHLCV container) into at most n_out buckets
+
+    Open is the first open, High the max, Low the min, Close the last close and
+    Volume the sum of each bucket; the bucket is stamped with its first bar's
+    timestamp. The result has the same type as the input.
+    """
+    n = len(price_data)
+    if n_out >= n:
+        return price_data
+
+    starts = bucket_starts(n, n_out)
+    ends = np.append(starts[1:], n) - 1
+    if isinstance(price_data, OHLCV):
+        volume = price_data.volume
+        return OHLCV(
+            price_data.time[starts],
+            price_data.open[starts],
+            np.maximum.reduceat(price_data.high, starts),
+            np.minimum.reduceat(price_data.low, starts),
+            price_data.close[ends],
+            np.add.reduceat(volume, starts) if volume is not None else None,
+            tz=price_data.tz,
+        )
+    data = {}
+    if 'Open' in price_data.columns:
+        data['Open'] = price_data['Open'].to_numpy()[starts]
+    if 'High' in price_data.columns:
+        data['High'] = np.maximum.reduceat(price_data['High'].to_numpy(), starts)
+    if 'Low' in price_data.columns:
+        data['Low'] = np.minimum.reduceat(price_data['Low'].to_numpy(), starts)
+    if 'Close' in price_data.columns:
+        data['Close'] = price_data['Close'].to_numpy()[ends]
+    if 'Volume' in price_data.columns:
+        data['Volume'] = np.add.reduceat(price_data['Volume'].to_numpy(), starts)
+    return pd.DataFrame(data, index=price_data.index[starts])
+
+
+def line_positions(values, max_points: int = None):
+    """
+    Row positions to plot for a line series, or None to plot every row
+
+    Downsampling activates only above DOWNSAMPLE_THRESHOLD rows.
+    """
+    n = len(values)
+    if n <= DOWNSAMPLE_THRESHOLD:
+        return None
+    return lttb_indices(values, max_points or DEFAULT_POINT_BUDGET)
+
+
+def fit_ohlcv(price_data, max_points: int = None):
+    """Bucket-aggregate OHLCV bars when they exceed DOWNSAMPLE_THRESHOLD rows"""
+    if price_data is None or len(price_data) <= DOWNSAMPLE_THRESHOLD:
+        return price_data
+    return aggregate_ohlcv(price_data, max_points or DEFAULT_POINT_BUDGET)
@@ -0,0 +1,225 @@
+# utils/event_study.py
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_WINDOWS = (1, 3, 5, 10)
+SENTIMENT_BUCKETS = ["Positive", "Neutral", "Negative"]
+
+# Daily bars of exchange-traded symbols are stamped at local midnight but only
+# close at the end of the session; 24/7 (UTC-stamped) daily bars close at the
+# next midnight
+SESSION_CLOSE = pd.Timedelta(hours=16)
+
+# Bars and events are packed into one sorted int64 key: symbol code in the
+# high bits, seconds since the earliest timestamp in the low 33 bits (~270 years)
+_TIME_BITS = 33
+
+
+def _to_utc_seconds(values):
+    """Convert timestamps (strings, datetimes, DatetimeIndex) to int64 UTC epoch seconds"""
+    ts = pd.DatetimeIndex(pd.to_datetime(values, utc=True))
+    return np.asarray((ts - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1), dtype=np.int64)
+
+
+def articles_to_events(articles, symbol: str):
+    """
+    Convert analyzed NewsAPI articles into event rows
+
+    Args:
+        articles: List of article dicts (with 'publishedAt' and sentiment fields)
+        symbol: Symbol the articles refer to
+
+    Returns:
+        DataFrame with symbol, timestamp, sentiment, score, title columns
+    """
+    rows = [{
+        "symbol": symbol,
+        "timestamp": a.get("publishedAt"),
+        "sentiment": a.get("sentiment", "Neutral"),
+        "score": a.get("sentiment_score", 0.0),
+        "title": a.get("title", ""),
+    } for a in articles or [] if a.get("publishedAt")]
+    return pd.DataFrame(rows, columns=["symbol", "timestamp", "sentiment", "score", "title"])
+
+
+def _close_offset(index: pd.DatetimeIndex, secs) -> int:
+    """
+    Seconds from a bar's timestamp to its close
+
+    Intraday bars close one bar length after they start. Daily and longer
+    bars close on their last day: at SESSION_CLOSE for exchange-local
+    timestamps, at the following midnight for UTC or naive ones.
+    """
+    day = 86400
+    spacing = int(np.median(np.diff(secs))) if len(secs) > 1 else day
+    if spacing < day:
+        return spacing
+    session = SESSION_CLOSE if index.tz is not None and str(index.tz) != "UTC" else pd.Timedelta(days=1)
+    return spacing - day + int(session.total_seconds())
+
+
+def _build_bar_grid(price_frames: dict):
+    """
+    Flatten per-symbol price frames into contiguous arrays
+
+    Returns:
+        (symbols, seconds, close_seconds, close, starts, ends) where bars of
+        symbols[i] live in the half-open slice starts[i]:ends[i]
+    """
+    symbols, seconds, close_seconds, closes, lengths = [], [], [], [], []
+    for symbol, frame in price_frames.items():
+        if frame is None or frame.empty or 'Close' not in frame.columns:
+            continue
+        frame = frame[frame['Close'].notna()]
+        if frame.empty:
+            continue
+        secs = _to_utc_seconds(frame.index)
+        order = np.argsort(secs, kind='stable')
+        symbols.append(symbol)
+        seconds.append(secs[order])
+        close_seconds.append(secs[order] + _close_offset(frame.index, secs[order]))
+        closes.append(frame['Close'].to_numpy(dtype=np.float64)[order])
+        lengths.append(len(frame))
+
+    if not symbols:
+        empty = np.empty(0, np.int64)
+        return [], empty, empty, np.empty(0), empty, empty
+
+    ends = np.cumsum(lengths)
+    starts = ends - np.asarray(lengths)
+    return symbols, np.concatenate(seconds), np.concatenate(close_seconds), np.concatenate(closes), starts, ends
+
+
+def _forward_returns(close, base, target, valid):
+    """Simple returns close[target] / close[base] - 1, NaN where invalid"""
+    out = np.full(base.shape, np.nan)
+    out[valid] = close[target[valid]] / close[base[valid]] - 1
+    return out
+
+
+def _mean_window_returns(close, codes, n_symbols, window):
+    """Unconditional mean `window`-bar return per symbol (used as the expected return)"""
+    if len(close) <= window:
+        return np.full(n_symbols, np.nan)
+    rets = close[window:] / close[:-window] - 1
+    same_symbol = codes[window:] == codes[:-window]
+    sums = np.bincount(codes[window:][same_symbol], weights=rets[same_symbol], minlength=n_symbols)
+    counts = np.bincount(codes[window:][same_symbol], minlength=n_symbols)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def run_event_study(events, price_frames: dict, windows=DEFAULT_WINDOWS, benchmark=None):
+    """
+    Align news events to the bar grid and compute forward and abnormal returns
+
+    Every event is mapped to the first bar that closes after its timestamp,
+    and the last close before publication is the base price, so the 1-bar
+    window is the first reaction the market could have had. News published
+    after the close or on a weekend counts from the next session. All
+    symbols and windows are handled in a single vectorized searchsorted over
+    a packed (symbol, time) key.
+
+    Args:
+        events: DataFrame with 'symbol', 'timestamp' and 'sentiment' columns
+        price_frames: Dict of symbol -> OHLCV DataFrame (as from get_price_data)
+        windows: Forward windows in bars
+        benchmark: Optional benchmark OHLCV DataFrame; abnormal returns are
+            market-adjusted when given, otherwise mean-adjusted per symbol
+
+    Returns:
+        Copy of events with ret_{w} and abn_{w} columns per window, limited to
+        events whose symbol has price data
+    """
+    if events is None or events.empty or not price_frames:
+        return None
+
+    windows = np.asarray(sorted(set(int(w) for w in windows)), dtype=np.int64)
+    symbols, bar_secs, close_secs, close, starts, ends = _build_bar_grid(price_frames)
+    if not symbols:
+        return None
+
+    code_of = {symbol: i for i, symbol in enumerate(symbols)}
+    events = events[events['symbol'].isin(code_of)].copy()
+    if events.empty:
+        return None
+
+    ev_codes = events['symbol'].map(code_of).to_numpy(dtype=np.int64)
+    ev_secs = _to_utc_seconds(events['timestamp'])
+    bar_codes = np.repeat(np.arange(len(symbols), dtype=np.int64), ends - starts)
+
+    origin = min(bar_secs.min(), ev_secs.min())
+    close_keys = (bar_codes << _TIME_BITS) | (close_secs - origin)
+    ev_keys = (ev_codes << _TIME_BITS) | (ev_secs - origin)
+
+    # First bar closing after each event; the close before it is the base price
+    base = np.searchsorted(close_keys, ev_keys, side='right') - 1
+    targets = base[:, None] + windows[None, :]
+    valid = (base >= starts[ev_codes])[:, None] & (targets < ends[ev_codes][:, None])
+    base_2d = np.broadcast_to(base[:, None], targets.shape)
+
+    returns = _forward_returns(close, base_2d, np.where(valid, targets, 0), valid)
+
+    if benchmark is not None and not benchmark.empty and 'Close' in benchmark.columns:
+        bench = benchmark[benchmark['Close'].notna()]
+        bench_secs = _to_utc_seconds(bench.index)
+        order = np.argsort(bench_secs, kind='stable')
+        bench_secs = bench_secs[order]
+        bench_close = bench['Close'].to_numpy(dtype=np.float64)[order]
+        safe_targets = np.where(valid, targets, base_2d)
+        b_base = np.searchsorted(bench_secs, bar_secs[base_2d.clip(min=0)], side='right') - 1
+        b_target = np.searchsorted(bench_secs, bar_secs[safe_targets.clip(min=0)], side='right') - 1
+        b_valid = valid & (b_base >= 0) & (b_target >= 0)
+        expected = _forward_returns(bench_close, b_base, b_target, b_valid)
+    else:
+        expected = np.column_stack([
+            _mean_window_returns(close, bar_codes, len(symbols), w)[ev_codes] for w in windows
+        ])
+
+    abnormal = returns - expected
+    for j, w in enumerate(windows):
+        events[f'ret_{w}'] = returns[:, j]
+        events[f'abn_{w}'] = abnormal[:, j]
+    events['event_time'] = pd.to_datetime(ev_secs, unit='s', utc=True)
+    return events
+
+
+def summarize_event_study(results, windows=DEFAULT_WINDOWS):
+    """
+    Aggregate event study results by sentiment bucket
+
+    Args:
+        results: DataFrame returned by run_event_study
+        windows: Forward windows to summarize
+
+    Returns:
+        Long DataFrame with sentiment, window, events, mean/median abnormal
+        return, mean raw return and hit rate (share of positive abnormal returns)
+    """
+    if results is None or results.empty:
+        return None
+
+    rows = []
+    grouped = results.groupby('sentiment')
+    for w in sorted(set(int(w) for w in windows)):
+        ret_col, abn_col = f'ret_{w}', f'abn_{w}'
+        if abn_col not in results.columns:
+            continue
+        stats = grouped.agg(
+            events=(abn_col, 'count'),
+            mean_abnormal=(abn_col, 'mean'),
+            median_abnormal=(abn_col, 'median'),
+            mean_return=(ret_col, 'mean'),
+            hit_rate=(abn_col, lambda s: (s.dropna() > 0).mean() if s.notna().any() else np.nan),
+        )
+        stats['window'] = w
+        rows.append(stats.reset_index())
+
+    if not rows:
+        return None
+
+    summary = pd.concat(rows, ignore_index=True)
+    order = {bucket: i for i, bucket in enumerate(SENTIMENT_BUCKETS)}
+    summary['_order'] = summary['sentiment'].map(order).fillna(len(order))
+    return summary.sort_values(['_order', 'window']).drop(columns='_order').reset_index(drop=True)
@@ -0,0 +1,389 @@
+# utils/fundamentals.py
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_store import DATA_DIR
+
+
+FUNDAMENTALS_PATH = os.path.join(DATA_DIR, "fundamentals.jsonl")
+
+# basic_info fields kept for screening (website, summary and timezone are not)
+NUMERIC_FIELDS = (
+    "market_cap", "enterprise_value", "pe_ratio", "peg_ratio", "price_to_book", "price_to_sales", "eps",
+    "dividend_yield", "revenue_ttm", "net_income_ttm", "book_value", "debt_to_equity", "current_ratio",
+    "beta", "profit_margin", "operating_margin", "gross_margin", "return_on_equity", "return_on_assets",
+    "asset_turnover", "fifty_two_week_high", "fifty_two_week_low", "average_volume", "employees",
+)
+TEXT_FIELDS = ("company_name", "sector", "industry", "country", "exchange", "currency")
+# Derived like get_key_ratios: net income / revenue in percent
+DERIVED_FIELDS = ("net_margin",)
+SCREEN_COLUMNS = NUMERIC_FIELDS + DERIVED_FIELDS
+# Suffixes for percentile-rank (0-100) and z-score versions of a numeric column
+RANK_SUFFIX, ZSCORE_SUFFIX = "_pct", "_z"
+FILTER_OPS = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+              "==": np.equal, "!=": np.not_equal}
+MIN_GROUP_SIZE = 3  # valid values a sector needs for a z-score
+MISSING_TEXT = ("", "N/A", "None")
+# An unchanged snapshot is only re-recorded once the cached one is this old
+REFRESH_HOURS = 12
+
+
+def _as_float(value) -> float:
+    """A finite float, or NaN for None, text and infinities"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return value if np.isfinite(value) else np.nan
+
+
+def percentile_rank(values, groups=None) -> np.ndarray:
+    """
+    Percentile rank (0-100] of each value among the valid values of its group
+
+    Ties share their average rank, as in pandas rank(pct=True). Values are
+    ranked through one integer sort key of (group, dense value rank), so
+    every group is ranked in the same sort. NaN values and group -1 stay NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    valid = np.isfinite(values)
+    if groups is not None:
+        groups = np.asarray(groups)
+        valid &= groups >= 0
+    if not valid.any():
+        return out
+    group = groups[valid].astype(np.int64) if groups is not None else np.zeros(valid.sum(), dtype=np.int64)
+    _, dense = np.unique(values[valid], return_inverse=True)
+    stride = len(dense) + 1
+    key = group * stride + dense
+    ordered = np.sort(key)
+    below = np.searchsorted(ordered, key, "left")
+    equal = np.searchsorted(ordered, key, "right") - below
+    first = np.searchsorted(ordered, group * stride, "left")
+    size = np.bincount(group)[group]
+    out[valid] = 100 * (below - first + (equal + 1) / 2) / size
+    return out
+
+
+def group_zscore(values, groups=None, min_size: int = MIN_GROUP_SIZE) -> np.ndarray:
+    """
+    (value - group mean) / group standard deviation (ddof=1), with group sums from bincount
+
+    Groups with fewer than min_size valid values, or no spread, give NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    valid = np.isfinite(values)
+    if groups is not None:
+        groups = np.asarray(groups)
+        valid &= groups >= 0
+    if not valid.any():
+        return out
+    group = groups[valid].astype(np.int64) if groups is not None else np.zeros(valid.sum(), dtype=np.int64)
+    x = values[valid]
+    count = np.bincount(group)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = x - (np.bincount(group, weights=x) / count)[group]
+        std = np.sqrt(np.bincount(group, weights=deviation ** 2) / (count - 1))[group]
+        z = deviation / std
+    out[valid] = np.where((count[group] >= min_size) & (std > 0), z, np.nan)
+    return out
+
+
+class FundamentalsTable:
+    """
+    Columnar snapshot of cached basic_info for a universe
+
+    Numeric fields are float64 arrays with NaN for missing values, so the
+    NaN mask is the missing mask; text fields are factorized into int32
+    codes (-1 when missing) plus their labels. Filters, percentile ranks and
+    per-sector statistics are whole-array operations; derived rank and
+    z-score columns are computed once per snapshot.
+    """
+
+    __slots__ = ("symbols", "numeric", "codes", "categories", "fetched_at", "_derived")
+
+    def __init__(self, symbols, numeric: dict, codes: dict, categories: dict, fetched_at):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.numeric = numeric
+        self.codes = codes
+        self.categories = categories
+        self.fetched_at = fetched_at
+        self._derived = {}
+
+    @classmethod
+    def from_records(cls, records) -> "FundamentalsTable":
+        """Build from a list of basic_info dicts that each carry a 'symbol'"""
+        numeric = {name: np.array([_as_float(r.get(name)) for r in records], dtype=np.float64)
+                   for name in NUMERIC_FIELDS}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            revenue = numeric["revenue_ttm"]
+            numeric["net_margin"] = np.where(revenue != 0, numeric["net_income_ttm"] / revenue * 100, np.nan)
+        codes, categories = {}, {}
+        for name in TEXT_FIELDS:
+            labels = [r.get(name) for r in records]
+            labels = [None if label is None or str(label).strip() in MISSING_TEXT else str(label) for label in labels]
+            code, uniques = pd.factorize(pd.Series(labels, dtype=object), sort=True)
+            codes[name], categories[name] = code.astype(np.int32), list(uniques)
+        fetched_at = pd.to_datetime(pd.Series([r.get("fetched_at") for r in records], dtype=object),
+                                    utc=True, errors="coerce").to_numpy()
+        return cls([r["symbol"] for r in records], numeric, codes, categories, fetched_at)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def subset(self, symbols) -> "FundamentalsTable":
+        """Rows of the given symbols that are in the table, in that order"""
+        position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        rows = np.array([position[s.upper()] for s in symbols if s.upper() in position], dtype=np.int64)
+        return FundamentalsTable(self.symbols[rows], {name: v[rows] for name, v in self.numeric.items()},
+                                 {name: c[rows] for name, c in self.codes.items()}, self.categories,
+                                 self.fetched_at[rows])
+
+    def text(self, name: str) -> np.ndarray:
+        """Labels of a text field (None where missing)"""
+        labels = np.asarray(self.categories[name] + [None], dtype=object)
+        return labels[self.codes[name]]
+
+    def column(self, name: str, sector_relative: bool = False) -> np.ndarray:
+        """
+        A numeric field, or its percentile rank ('<field>_pct') or z-score
+        ('<field>_z'), within each sector when sector_relative
+        """
+        if name in self.numeric:
+            return self.numeric[name]
+        field = self.base_field(name)
+        if field not in self.numeric:
+            raise ValueError(f"Unknown fundamentals column '{name}'")
+        key = (name, sector_relative)
+        if key not in self._derived:
+            statistic = percentile_rank if name.endswith(RANK_SUFFIX) else group_zscore
+            self._derived[key] = statistic(self.numeric[field], self.codes["sector"] if sector_relative else None)
+        return self._derived[key]
+
+    def base_field(self, name: str) -> str:
+        """The numeric field behind a _pct / _z column (other names unchanged)"""
+        for suffix in (RANK_SUFFIX, ZSCORE_SUFFIX):
+            if name.endswith(suffix) and name[:-len(suffix)] in self.numeric:
+                return name[:-len(suffix)]
+        return name
+
+    def mask(self, filters, sector_relative: bool = False) -> np.ndarray:
+        """
+        Rows passing every (column, op, value) filter
+
+        Numeric columns take FILTER_OPS; text fields take '==' / 'in' and
+        '!=' / 'not in' with a label or a list of labels. Missing values
+        fail every filter.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        for name, op, value in filters:
+            if name in self.codes:
+                if op not in ("==", "in", "!=", "not in"):
+                    raise ValueError(f"Unsupported filter '{op}' for text field {name}")
+                labels = [value] if isinstance(value, str) else list(value)
+                wanted = [self.categories[name].index(label) for label in labels if label in self.categories[name]]
+                hit = np.isin(self.codes[name], wanted)
+                keep &= hit if op in ("==", "in") else ~hit & (self.codes[name] >= 0)
+            elif op in FILTER_OPS:
+                keep &= FILTER_OPS[op](self.column(name, sector_relative), float(value))
+            else:
+                raise ValueError(f"Unsupported filter '{op}' (use one of {', '.join(FILTER_OPS)})")
+        return keep
+
+
+def screen_fundamentals(table: FundamentalsTable, filters=(), rank_by: str = None, ascending: bool = False,
+                        sector_relative: bool = False, limit: int = None):
+    """
+    Filter and rank a FundamentalsTable
+
+    Args:
+        filters: (column, op, value) triples; columns are SCREEN_COLUMNS,
+            their _pct / _z versions or TEXT_FIELDS (see FundamentalsTable.mask)
+        rank_by: Column to sort by (missing values last)
+        sector_relative: Percentile ranks and z-scores within each sector
+            instead of across the whole universe
+        limit: Keep only the first rows after sorting
+
+    Returns:
+        DataFrame (symbol x columns) of matching companies with their name,
+        sector, every filtered / ranked column and the percentile rank of
+        each numeric one, or None when a filter is invalid
+    """
+    try:
+        keep = table.mask(filters, sector_relative)
+        rows = np.flatnonzero(keep)
+        if rank_by is not None:
+            values = table.column(rank_by, sector_relative)[rows]
+            order = np.argsort(-values if not ascending else values, kind="stable")
+            rows = rows[order]
+    except ValueError as e:
+        print(f"Invalid fundamentals screen: {e}")
+        return None
+    if limit is not None:
+        rows = rows[:limit]
+
+    names = [name for name, _, _ in filters if name not in table.codes]
+    if rank_by is not None:
+        names.append(rank_by)
+    columns = {"company_name": table.text("company_name")[rows], "sector": table.text("sector")[rows]}
+    for field in dict.fromkeys(table.base_field(name) for name in names):
+        columns[field] = table.column(field)[rows]
+        columns[field + RANK_SUFFIX] = table.column(field + RANK_SUFFIX, sector_relative)[rows]
+        if field + ZSCORE_SUFFIX in names:
+            columns[field + ZSCORE_SUFFIX] = table.column(field + ZSCORE_SUFFIX, sector_relative)[rows]
+    return pd.DataFrame(columns, index=pd.Index(table.symbols[rows], name="symbol"))
+
+
+class FundamentalsStore:
+    """
+    Local cache of basic_info snapshots, persisted as JSON lines
+
+    Every fetch appends one record stamped with its time (unless it repeats
+    a recent one); the newest record per symbol wins. table() builds the columnar FundamentalsTable once and
+    reuses it until the next add.
+    """
+
+    def __init__(self, path: str = FUNDAMENTALS_PATH):
+        self.path = path
+        self._records = {}
+        self._table = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("symbol"):
+                    self._records[record["symbol"]] = record
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, symbol: str):
+        return symbol.upper() in self._records
+
+    def add(self, symbol: str, info: dict):
+        """Cache a basic_info dict for a symbol"""
+        if not info:
+            return
+        now = datetime.now(timezone.utc)
+        record = {"symbol": symbol.upper(), "fetched_at": now.isoformat()}
+        record.update({name: info.get(name) for name in NUMERIC_FIELDS + TEXT_FIELDS})
+        previous = self._records.get(record["symbol"])
+        if previous is not None and all(previous.get(k) == v for k, v in record.items() if k != "fetched_at"):
+            # Repeated page loads fetch the same snapshot; keep the file from growing with them
+            if now - datetime.fromisoformat(previous["fetched_at"]) < timedelta(hours=REFRESH_HOURS):
+                return
+        self._records[record["symbol"]] = record
+        self._table = None
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            print(f"Error persisting fundamentals: {e}")
+
+    def get(self, symbol: str):
+        """Newest cached record of a symbol, or None"""
+        return self._records.get(symbol.upper())
+
+    def symbols(self) -> list:
+        return sorted(self._records)
+
+    def sector_map(self) -> dict:
+        """Symbol -> sector of every cached record that has one"""
+        return {symbol: record["sector"] for symbol, record in self._records.items() if record.get("sector")}
+
+    def missing(self, symbols, max_age_days: float = None) -> list:
+        """Symbols without a cached record, or with one older than max_age_days"""
+        cutoff = None
+        if max_age_days is not None:
+            cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=max_age_days)
+        out = []
+        for symbol in symbols:
+            record = self._records.get(symbol.upper())
+            if record is None or (cutoff is not None and pd.Timestamp(record["fetched_at"]) < cutoff):
+                out.append(symbol.upper())
+        return out
+
+    def table(self, symbols=None) -> FundamentalsTable:
+        """Columnar table of every cached symbol, or of the given ones"""
+        if self._table is None:
+            self._table = FundamentalsTable.from_records(list(self._records.values()))
+        return self._table if symbols is None else self._table.subset(symbols)
+
+
+_store = None
+
+
+def get_fundamentals_store() -> FundamentalsStore:
+    """Process-wide FundamentalsStore instance"""
+    global _store
+    if _store is None:
+        _store = FundamentalsStore()
+    return _store
+
+
+def benchmark_fundamentals(n_companies: int = 5000, n_sectors: int = 11, missing: float = 0.1,
+                           seed: int = 0) -> dict:
+    """
+    Build a table of random companies, time a filtered, sector-relative
+    screen and check ranks and z-scores against pandas groupby
+
+    Returns:
+        Dict of step -> seconds, the match count and the largest differences
+    """
+    rng = np.random.default_rng(seed)
+    sectors = [f"Sector {i}" for i in range(n_sectors)]
+    records = []
+    for i in range(n_companies):
+        record = {"symbol": f"S{i}", "company_name": f"Company {i}", "sector": sectors[rng.integers(n_sectors)],
+                  "fetched_at": "2026-01-02T00:00:00+00:00"}
+        record.update({name: float(rng.lognormal(2, 1)) for name in NUMERIC_FIELDS})
+        for name in rng.choice(NUMERIC_FIELDS, int(missing * len(NUMERIC_FIELDS)), replace=False):
+            record[name] = None
+        records.append(record)
+
+    out = {}
+    start = time.perf_counter()
+    table = FundamentalsTable.from_records(records)
+    out["build_s"] = time.perf_counter() - start
+
+    filters = [("pe_ratio", "<", 15), ("return_on_equity_pct", ">=", 50), ("debt_to_equity_z", "<", 0.5),
+               ("sector", "!=", sectors[0])]
+    start = time.perf_counter()
+    result = screen_fundamentals(table, filters, rank_by="peg_ratio", ascending=True, sector_relative=True)
+    out["screen_s"] = time.perf_counter() - start
+    out["matches"] = len(result)
+
+    frame = pd.DataFrame({"sector": table.text("sector"), "roe": table.numeric["return_on_equity"],
+                          "de": table.numeric["debt_to_equity"]})
+    by_sector = frame.groupby("sector")
+    expected_pct = by_sector["roe"].rank(pct=True) * 100
+    expected_z = (frame["de"] - by_sector["de"].transform("mean")) / by_sector["de"].transform("std")
+    out["rank_diff"] = float(np.nanmax(np.abs(table.column("return_on_equity_pct", True) - expected_pct)))
+    out["zscore_diff"] = float(np.nanmax(np.abs(table.column("debt_to_equity_z", True) - expected_z)))
+    assert out["rank_diff"] < 1e-9 and out["zscore_diff"] < 1e-9 and out["screen_s"] < 1.0, out
+    return out
+
+
+if __name__ == "__main__":
+    print("Fundamentals screen, 5000 companies:")
+    print("=" * 60)
+    for name, value in benchmark_fundamentals().items():
+        print(f"{name:>12}: {value:.4g}")
@@ -0,0 +1,327 @@
+# utils/indicators.py
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS = 252
+
+
+def _series(values) -> pd.Series:
+    """Zero-copy Series over a float64 array, for pandas' rolling/ewm kernels"""
+    return pd.Series(np.asarray(values, dtype=np.float64), copy=False)
+
+
+def sma(values, window: int) -> np.ndarray:
+    """Simple moving average (NaN until the window is full)"""
+    return _series(values).rolling(window=window).mean().to_numpy()
+
+
+def rolling_std(values, window: int) -> np.ndarray:
+    """Rolling sample standard deviation (ddof=1)"""
+    return _series(values).rolling(window=window).std().to_numpy()
+
+
+def ema(values, span: int) -> np.ndarray:
+    """Exponential moving average, alpha = 2 / (span + 1), bias-adjusted from the first bar"""
+    return _series(values).ewm(span=span).mean().to_numpy()
+
+
+def bollinger_bands(close, window: int = 20, n_std: float = 2.0):
+    """(middle, upper, lower) bands around a simple moving average"""
+    middle = sma(close, window)
+    width = n_std * rolling_std(close, window)
+    return middle, middle + width, middle - width
+
+
+def wilder_mean(values, period: int) -> np.ndarray:
+    """
+    Wilder smoothing of a series whose first element is undefined (e.g. a diff)
+
+    Seeded with the simple mean of the first period values, then
+    avg = (avg * (period - 1) + x) / period.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    tail = values[1:]
+    if len(tail) < period:
+        return out
+    seeded = np.concatenate([[tail[:period].mean()], tail[period:]])
+    out[period:] = _series(seeded).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    return out
+
+
+def rsi(close, period: int = 14, method: str = "sma") -> np.ndarray:
+    """
+    Relative Strength Index
+
+    method="sma" averages gains/losses with simple rolling means (the chart
+    default); method="wilder" uses Wilder's recursive smoothing.
+    """
+    delta = np.diff(np.asarray(close, dtype=np.float64), prepend=np.nan)
+    gain, loss = np.clip(delta, 0, None), -np.clip(delta, None, 0)
+    if method == "wilder":
+        avg_gain, avg_loss = wilder_mean(gain, period), wilder_mean(loss, period)
+    else:
+        avg_gain, avg_loss = sma(gain, period), sma(loss, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9):
+    """(macd, signal, histogram) from the fast/slow EMA difference"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def returns(close) -> np.ndarray:
+    """Simple bar-over-bar returns (NaN for the first bar)"""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:] = close[1:] / close[:-1] - 1
+    return out
+
+
+def rolling_volatility(close, window: int = 20, periods_per_year: int = TRADING_DAYS) -> np.ndarray:
+    """Annualized rolling standard deviation of returns"""
+    return rolling_std(returns(close), window) * np.sqrt(periods_per_year)
+
+
+# ---------- Indicator registry ----------
+
+class Indicator:
+    """
+    A registered indicator: the bar columns it reads, its parameters (with
+    defaults), its output names, its warm-up length and a vectorized compute
+    function taking an IndicatorSet plus parameters.
+    """
+
+    __slots__ = ("name", "inputs", "outputs", "params", "warmup", "compute", "description")
+
+    def __init__(self, name, inputs, outputs, params, warmup, compute, description=""):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.params = dict(params)
+        self.warmup = warmup
+        self.compute = compute
+        self.description = description
+
+    def resolve(self, params: dict = None) -> dict:
+        """Defaults overridden by the given parameters (unknown names are rejected)"""
+        params = params or {}
+        unknown = set(params) - set(self.params)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {self.name}: {sorted(unknown)}")
+        return {**self.params, **params}
+
+    def warmup_bars(self, params: dict = None) -> int:
+        """Leading bars whose outputs are not yet meaningful"""
+        return int(self.warmup(**self.resolve(params)))
+
+
+INDICATORS = {}
+
+
+def register_indicator(name: str, inputs, outputs, params=None, warmup=None, description: str = ""):
+    """Decorator registering compute(ctx, **params) -> array or tuple of arrays"""
+    def decorator(compute):
+        INDICATORS[name] = Indicator(
+            name, inputs, outputs, params or {}, warmup or (lambda **_: 0), compute, description
+        )
+        return compute
+    return decorator
+
+
+def _spec_key(spec):
+    """(name, params) for an indicator spec given as a name or a (name, params) pair"""
+    name, params = (spec, {}) if isinstance(spec, str) else spec
+    if name not in INDICATORS:
+        raise KeyError(f"Unknown indicator '{name}'")
+    params = INDICATORS[name].resolve(params)
+    return name, tuple(sorted(params.items()))
+
+
+class IndicatorSet:
+    """
+    Indicators over one OHLCV container, computed together on first use
+
+    request() queues indicator specs; the first result lookup computes every
+    queued indicator in one pass. Intermediate series (moving averages, EMAs,
+    rolling extremes, returns) are memoized, so e.g. a 20-bar SMA is shared by
+    the SMA, Bollinger and crossover indicators.
+    """
+
+    def __init__(self, bars):
+        self.bars = bars
+        self._memo = {}
+        self._results = {}
+        self._pending = []
+
+    def column(self, name: str) -> np.ndarray:
+        return self.bars[name]
+
+    def _cached(self, key, fn):
+        if key not in self._memo:
+            self._memo[key] = fn()
+        return self._memo[key]
+
+    # Shared primitives
+    def sma(self, column: str, window: int) -> np.ndarray:
+        return self._cached(("sma", column, window), lambda: sma(self.column(column), window))
+
+    def ema(self, column: str, span: int) -> np.ndarray:
+        return self._cached(("ema", column, span), lambda: ema(self.column(column), span))
+
+    def rolling_std(self, column: str, window: int) -> np.ndarray:
+        return self._cached(("std", column, window), lambda: rolling_std(self.column(column), window))
+
+    def rolling_max(self, column: str, window: int) -> np.ndarray:
+        return self._cached(("max", column, window),
+                            lambda: _series(self.column(column)).rolling(window).max().to_numpy())
+
+    def rolling_min(self, column: str, window: int) -> np.ndarray:
+        return self._cached(("min", column, window),
+                            lambda: _series(self.column(column)).rolling(window).min().to_numpy())
+
+    def returns(self) -> np.ndarray:
+        return self._cached(("returns",), lambda: returns(self.column("Close")))
+
+    def request(self, *specs):
+        """Queue indicator specs (names or (name, params) pairs) for the next batch"""
+        for spec in specs:
+            key = _spec_key(spec)
+            if key not in self._results and key not in self._pending:
+                self._pending.append(key)
+        return self
+
+    def compute(self, *specs) -> dict:
+        """Compute queued and given specs in one pass; returns {(name, params): outputs}"""
+        self.request(*specs)
+        pending, self._pending = self._pending, []
+        for name, params in pending:
+            indicator = INDICATORS[name]
+            if any(self.bars[col] is None for col in indicator.inputs):
+                print(f"Skipping {name}: missing input columns {indicator.inputs}")
+                self._results[(name, params)] = None
+                continue
+            values = indicator.compute(self, **dict(params))
+            if not isinstance(values, tuple):
+                values = (values,)
+            self._results[(name, params)] = dict(zip(indicator.outputs, values))
+        return {key: self._results[key] for key in map(_spec_key, specs)} if specs else dict(self._results)
+
+    def get(self, name: str, **params):
+        """Outputs of one indicator as {output: array} (None if its inputs are missing)"""
+        key = _spec_key((name, params))
+        if key not in self._results:
+            self.compute((name, params))
+        return self._results[key]
+
+
+@register_indicator("sma", ("Close",), ("sma",), {"window": 20}, lambda window: window - 1,
+                    "Simple moving average")
+def _sma_indicator(ctx, window):
+    return ctx.sma("Close", window)
+
+
+@register_indicator("ema", ("Close",), ("ema",), {"span": 20}, lambda span: span - 1,
+                    "Exponential moving average")
+def _ema_indicator(ctx, span):
+    return ctx.ema("Close", span)
+
+
+@register_indicator("bollinger", ("Close",), ("middle", "upper", "lower"), {"window": 20, "n_std": 2.0},
+                    lambda window, n_std: window - 1, "Bollinger Bands")
+def _bollinger_indicator(ctx, window, n_std):
+    middle = ctx.sma("Close", window)
+    width = n_std * ctx.rolling_std("Close", window)
+    return middle, middle + width, middle - width
+
+
+@register_indicator("rsi", ("Close",), ("rsi",), {"period": 14, "method": "sma"}, lambda period, method: period,
+                    "Relative Strength Index")
+def _rsi_indicator(ctx, period, method):
+    return rsi(ctx.column("Close"), period, method)
+
+
+@register_indicator("macd", ("Close",), ("macd", "signal", "histogram"), {"fast": 12, "slow": 26, "signal": 9},
+                    lambda fast, slow, signal: slow + signal - 2, "MACD")
+def _macd_indicator(ctx, fast, slow, signal):
+    line = ctx.ema("Close", fast) - ctx.ema("Close", slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+@register_indicator("volatility", ("Close",), ("volatility",), {"window": 20, "periods_per_year": TRADING_DAYS},
+                    lambda window, periods_per_year: window, "Annualized rolling volatility")
+def _volatility_indicator(ctx, window, periods_per_year):
+    return rolling_std(ctx.returns(), window) * np.sqrt(periods_per_year)
+
+
+@register_indicator("ma_crossover", ("Close",), ("fast", "slow", "position", "cross"), {"fast": 20, "slow": 50},
+                    lambda fast, slow: max(fast, slow) - 1, "Moving average crossover signals")
+def _ma_crossover_indicator(ctx, fast, slow):
+    fast_ma, slow_ma = ctx.sma("Close", fast), ctx.sma("Close", slow)
+    with np.errstate(invalid="ignore"):
+        position = np.sign(fast_ma - slow_ma)
+    position = np.nan_to_num(position)
+    # +1 on the bar a golden cross completes, -1 on a death cross
+    cross = np.zeros(len(position))
+    cross[1:] = np.where(position[:-1] != 0, np.sign(np.diff(position)), 0)
+    return fast_ma, slow_ma, position, cross
+
+
+@register_indicator("drawdown", ("Close",), ("peak", "drawdown"), {}, None, "Drawdown from running peak")
+def _drawdown_indicator(ctx):
+    close = ctx.column("Close")
+    peak = np.maximum.accumulate(close)
+    return peak, close / peak - 1
+
+
+@register_indicator("atr", ("High", "Low", "Close"), ("true_range", "atr"), {"period": 14}, lambda period: period,
+                    "Average True Range (Wilder)")
+def _atr_indicator(ctx, period):
+    high, low, close = ctx.column("High"), ctx.column("Low"), ctx.column("Close")
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    # The first bar has no previous close, like the first diff of a series
+    return true_range, wilder_mean(np.concatenate([[np.nan], true_range[1:]]), period)
+
+
+@register_indicator("obv", ("Close", "Volume"), ("obv",), {}, None, "On-Balance Volume")
+def _obv_indicator(ctx):
+    direction = np.sign(np.diff(ctx.column("Close"), prepend=ctx.column("Close")[:1]))
+    return np.cumsum(direction * ctx.column("Volume"))
+
+
+@register_indicator("vwap", ("High", "Low", "Close", "Volume"), ("vwap",), {"anchor": "auto"}, None,
+                    "Volume-weighted average price")
+def _vwap_indicator(ctx, anchor):
+    if anchor == "auto":
+        # Session VWAP for intraday bars, cumulative over the range for daily bars
+        time = ctx.bars.time
+        intraday = len(time) > 1 and np.median(np.diff(time)) < pd.Timedelta(days=1).value
+        anchor = "session" if intraday else None
+    typical = (ctx.column("High") + ctx.column("Low") + ctx.column("Close")) / 3
+    volume = ctx.column("Volume")
+    cum_pv, cum_v = np.cumsum(typical * volume), np.cumsum(volume)
+    if anchor == "session":
+        # Restart the running sums at each exchange-local calendar day
+        days = ctx.bars.index.normalize().asi8
+        new_day = np.concatenate([[True], days[1:] != days[:-1]])
+        session_start = np.flatnonzero(new_day)[np.cumsum(new_day) - 1]
+        cum_pv = cum_pv - np.concatenate([[0.0], cum_pv])[session_start]
+        cum_v = cum_v - np.concatenate([[0.0], cum_v])[session_start]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cum_pv / cum_v
+
+
+@register_indicator("stochastic", ("High", "Low", "Close"), ("k", "d"), {"k": 14, "d": 3},
+                    lambda k, d: k + d - 2, "Stochastic oscillator")
+def _stochastic_indicator(ctx, k, d):
+    highest, lowest = ctx.rolling_max("High", k), ctx.rolling_min("Low", k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_k = 100 * (ctx.column("Close") - lowest) / (highest - lowest)
+    return percent_k, sma(percent_k, d)
@@ -0,0 +1,175 @@
+# utils/keywords.py
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from utils.news_store import get_news_store
+from utils.search_index import tokenize, to_epoch_seconds, unindexed_rows
+
+
+N_FEATURES = 2 ** 18
+
+
+def _features(text: str):
+    """Unigram and bigram terms of a text"""
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _hash(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) & (N_FEATURES - 1)
+
+
+class NewsKeywordModel:
+    """
+    Incrementally maintained TF-IDF model over the local article store
+
+    Terms (unigrams + bigrams) are hashed into N_FEATURES buckets. Term counts
+    are kept as a sparse COO matrix (doc, bucket, count arrays) and document
+    frequencies as a dense bucket array; both are appended to as the store
+    ingests articles, so nothing is re-vectorized on rerun. Docs are store
+    positions, as in NewsSearchIndex. A bucket -> term map is kept only to
+    label results.
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else get_news_store()
+        self.doc_freq = np.zeros(N_FEATURES, dtype=np.int64)
+        self.terms = {}
+        self.symbols = {}
+        self._doc_symbols, self._doc_times = [], []
+        self._chunks = []
+        self._coo = None
+        self.add_rows(0, self.store.rows)
+        self.store.subscribe(self.add_rows)
+
+    def __len__(self):
+        return len(self._doc_symbols)
+
+    def add_rows(self, start: int, rows):
+        """Vectorize store rows from store position start on and update document frequencies"""
+        rows = unindexed_rows(self.store, len(self), start, rows)
+        if not rows:
+            return
+        published = pd.to_datetime([r.get("published_at") for r in rows], utc=True, errors="coerce")
+        published = np.asarray((published - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1), dtype=np.float64)
+
+        doc_ids, buckets, terms = [], [], {}
+        first_doc = len(self._doc_symbols)
+        for offset, row in enumerate(rows):
+            for term in _features(f"{row.get('title', '')} {row.get('description', '')}"):
+                bucket = _hash(term)
+                terms.setdefault(bucket, term)
+                doc_ids.append(first_doc + offset)
+                buckets.append(bucket)
+        chunk = None
+        if buckets:
+            # Collapse repeated (doc, bucket) pairs into counts
+            keys = np.asarray(doc_ids, dtype=np.int64) * N_FEATURES + np.asarray(buckets, dtype=np.int64)
+            keys, counts = np.unique(keys, return_counts=True)
+            docs, cols = np.divmod(keys, N_FEATURES)
+            chunk = (docs, cols, counts.astype(np.float64))
+
+        # Everything that can fail is done; commit the batch so all arrays stay in step
+        for bucket, term in terms.items():
+            self.terms.setdefault(bucket, term)
+        self._doc_symbols.extend(self.symbols.setdefault(row.get("symbol", ""), len(self.symbols)) for row in rows)
+        self._doc_times.extend(published)
+        if chunk is not None:
+            self._chunks.append(chunk)
+            self.doc_freq += np.bincount(chunk[1], minlength=N_FEATURES)
+        self._coo = None
+
+    def _matrix(self):
+        """Consolidated COO arrays plus per-doc symbol codes and times"""
+        if self._coo is None:
+            if self._chunks:
+                docs, cols, counts = (np.concatenate(parts) for parts in zip(*self._chunks))
+                self._chunks = [(docs, cols, counts)]
+            else:
+                docs = cols = np.empty(0, dtype=np.int64)
+                counts = np.empty(0)
+            self._coo = (
+                docs, cols, counts,
+                np.asarray(self._doc_symbols, dtype=np.int32),
+                np.asarray(self._doc_times, dtype=np.float64),
+            )
+        return self._coo
+
+    def _window_counts(self, doc_mask):
+        docs, cols, counts, _, _ = self._matrix()
+        entries = doc_mask[docs]
+        return np.bincount(cols[entries], weights=counts[entries], minlength=N_FEATURES)
+
+    def top_terms(self, symbols=None, start=None, end=None, n_terms: int = 15, min_count: int = 2):
+        """
+        Top emerging terms for a set of symbols over a time window
+
+        Terms are weighted by TF-IDF within the window and by their lift over
+        the preceding window of equal length (same symbols).
+
+        Args:
+            symbols: Symbols to include (None = whole archive)
+            start, end: Window bounds (default: last 7 days up to now)
+            n_terms: Number of terms to return
+            min_count: Minimum occurrences within the window
+
+        Returns:
+            DataFrame with term, count, baseline_count, lift and score columns
+        """
+        columns = ["term", "count", "baseline_count", "lift", "score"]
+        if len(self) == 0:
+            return pd.DataFrame(columns=columns)
+
+        end_s = to_epoch_seconds(end) if end is not None else pd.Timestamp.now(tz="UTC").timestamp()
+        start_s = to_epoch_seconds(start) if start is not None else end_s - 7 * 86400
+        _, _, _, doc_symbols, doc_times = self._matrix()
+
+        symbol_mask = np.ones(len(self), dtype=bool)
+        if symbols:
+            wanted = [self.symbols[s.upper()] for s in symbols if s.upper() in self.symbols]
+            symbol_mask = np.isin(doc_symbols, wanted)
+
+        in_window = symbol_mask & (doc_times >= start_s) & (doc_times < end_s)
+        in_baseline = symbol_mask & (doc_times >= start_s - (end_s - start_s)) & (doc_times < start_s)
+
+        window = self._window_counts(in_window)
+        baseline = self._window_counts(in_baseline)
+        candidates = np.flatnonzero(window >= min_count)
+        if len(candidates) == 0:
+            return pd.DataFrame(columns=columns)
+
+        idf = np.log((1 + len(self)) / (1 + self.doc_freq[candidates])) + 1.0
+        window_rate = window[candidates] / max(window.sum(), 1.0)
+        baseline_rate = baseline[candidates] / max(baseline.sum(), 1.0)
+        smoothing = 1.0 / max(window.sum(), 1.0)
+        lift = (window_rate + smoothing) / (baseline_rate + smoothing)
+        score = window[candidates] * idf * np.log1p(lift)
+
+        top = np.argsort(-score, kind="stable")[:n_terms]
+        return pd.DataFrame({
+            "term": [self.terms.get(int(b), str(b)) for b in candidates[top]],
+            "count": window[candidates[top]].astype(int),
+            "baseline_count": baseline[candidates[top]].astype(int),
+            "lift": lift[top],
+            "score": score[top],
+        })
+
+    def top_terms_by_sector(self, sector: str, sector_map: dict, **kwargs):
+        """Top emerging terms across all symbols mapped to a sector"""
+        symbols = [s for s, sec in sector_map.items() if sec == sector]
+        if not symbols:
+            return pd.DataFrame(columns=["term", "count", "baseline_count", "lift", "score"])
+        return self.top_terms(symbols=symbols, **kwargs)
+
+
+_model = None
+
+
+def get_keyword_model() -> NewsKeywordModel:
+    """Process-wide keyword model over the shared news store"""
+    global _model
+    if _model is None:
+        _model = NewsKeywordModel()
+    return _model
@@ -0,0 +1,193 @@
+# utils/news_store.py
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+DATA_DIR = os.getenv("MARKETSCOPE_DATA_DIR", "data")
+NEWS_STORE_PATH = os.path.join(DATA_DIR, "news_store.jsonl")
+
+ARTICLE_COLUMNS = [
+    "id", "symbol", "title", "description", "source",
+    "url", "published_at", "sentiment", "score",
+]
+
+
+def article_id(article: dict) -> str:
+    """Stable short ID for an article (URL hash, falling back to title + date)"""
+    key = article.get("url") or f"{article.get('title', '')}|{article.get('publishedAt', '')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _to_row(symbol: str, article: dict) -> dict:
+    """Flatten an analyzed NewsAPI article into a store row"""
+    source = article.get("source")
+    return {
+        "id": article_id(article),
+        "symbol": symbol.upper(),
+        "title": article.get("title") or "",
+        "description": article.get("description") or "",
+        "source": source.get("name", "") if isinstance(source, dict) else (source or ""),
+        "url": article.get("url") or "",
+        "published_at": article.get("publishedAt") or "",
+        "sentiment": article.get("sentiment", "Neutral"),
+        "score": float(article.get("sentiment_score", 0.0) or 0.0),
+    }
+
+
+def _rows_to_frame(rows) -> pd.DataFrame:
+    """Build an article DataFrame with parsed publish times"""
+    df = pd.DataFrame(rows, columns=ARTICLE_COLUMNS)
+    df["published_at"] = pd.to_datetime(df["published_at"], utc=True, errors="coerce")
+    return df
+
+
+class NewsStore:
+    """
+    Append-only local article history, persisted as JSON lines
+
+    Articles are deduplicated by ID per symbol. The whole history is held in
+    memory as rows; frame() materializes a DataFrame sorted newest first and
+    caches it (and per-symbol slices) until the next ingestion; positions()
+    caches filtered row positions the same way, so paging reads only the rows
+    shown. Ingestion is
+    serialized by a lock, so listeners see batches in store order.
+    """
+
+    def __init__(self, path: str = NEWS_STORE_PATH):
+        self.path = path
+        self._rows = []
+        self._keys = set()
+        self._frame = None
+        self._by_symbol = {}
+        self._positions = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                key = (row.get("id"), row.get("symbol"))
+                if key not in self._keys:
+                    self._keys.add(key)
+                    self._rows.append(row)
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def rows(self) -> list:
+        """Stored rows in ingestion order (positions are stable row IDs)"""
+        return self._rows
+
+    def subscribe(self, listener):
+        """
+        Register a callable invoked as listener(start, rows) after each ingestion
+
+        start is the store position of rows[0]. A listener that missed a batch
+        (e.g. it raised) can read the skipped rows back from rows[n:start].
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def add(self, symbol: str, articles) -> list:
+        """
+        Ingest analyzed articles for a symbol
+
+        Returns:
+            List of newly stored rows (already-known articles are skipped)
+        """
+        rows = [_to_row(symbol, article) for article in articles or []
+                if isinstance(article, dict) and (article.get("url") or article.get("title"))]
+        with self._lock:
+            new_rows = []
+            for row in rows:
+                key = (row["id"], row["symbol"])
+                if key in self._keys:
+                    continue
+                self._keys.add(key)
+                new_rows.append(row)
+
+            if not new_rows:
+                return []
+
+            start = len(self._rows)
+            self._rows.extend(new_rows)
+            self._frame = None
+            self._by_symbol = {}
+            self._positions = {}
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for row in new_rows:
+                        f.write(json.dumps(row) + "\n")
+            except OSError as e:
+                print(f"Error persisting news store: {e}")
+
+            for listener in self._listeners:
+                try:
+                    listener(start, new_rows)
+                except Exception as e:
+                    print(f"Error in news store listener: {e}")
+        return new_rows
+
+    def frame(self, symbol: str = None) -> pd.DataFrame:
+        """Return stored articles (optionally for one symbol), newest first"""
+        if self._frame is None:
+            df = _rows_to_frame(self._rows)
+            self._frame = df.sort_values("published_at", ascending=False, kind="stable").reset_index(drop=True)
+        if symbol is None:
+            return self._frame
+        symbol = symbol.upper()
+        if symbol not in self._by_symbol:
+            self._by_symbol[symbol] = self._frame[self._frame["symbol"] == symbol]
+        return self._by_symbol[symbol]
+
+    def positions(self, symbol: str = None, sentiments=None) -> np.ndarray:
+        """
+        Store positions of articles (optionally for one symbol and sentiments), newest first
+
+        Cached per (symbol, sentiments) until the next ingestion; pass slices
+        of the result to take() to load one page.
+        """
+        key = (symbol.upper() if symbol else None, None if sentiments is None else tuple(sorted(sentiments)))
+        with self._lock:
+            if key not in self._positions:
+                wanted = None if sentiments is None else set(sentiments)
+                picked = [i for i, row in enumerate(self._rows)
+                          if (key[0] is None or row.get("symbol") == key[0])
+                          and (wanted is None or row.get("sentiment") in wanted)]
+                published = pd.Series(pd.to_datetime([self._rows[i].get("published_at") for i in picked],
+                                                     utc=True, errors="coerce"))
+                order = published.sort_values(ascending=False, kind="stable").index.to_numpy()
+                self._positions[key] = np.asarray(picked, dtype=np.int64)[order]
+            return self._positions[key]
+
+    def take(self, positions) -> pd.DataFrame:
+        """Return the rows at the given store positions, in that order"""
+        return _rows_to_frame([self._rows[i] for i in positions])
+
+
+_store = None
+
+
+def get_news_store() -> NewsStore:
+    """Process-wide NewsStore instance"""
+    global _store
+    if _store is None:
+        _store = NewsStore()
+    return _store
@@ -0,0 +1,135 @@
+# utils/ohlcv.py
+import numpy as np
+import pandas as pd
+
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+# Frames that went through reset_index() keep their timestamps in one of these
+TIME_COLUMNS = ("Date", "Datetime")
+
+
+class OHLCV:
+    """
+    Validated OHLCV bars held as contiguous NumPy arrays
+
+    time is int64 nanoseconds since the UTC epoch (tz keeps the exchange
+    timezone); prices and volume are float64. Instances are built once per
+    price series (see from_frame) and treated as read-only: column
+    accessors and slices are views, not copies.
+    """
+
+    __slots__ = ("time", "tz", "open", "high", "low", "close", "volume", "_index")
+
+    def __init__(self, time, open, high, low, close, volume=None, tz=None):
+        self.time = time
+        self.tz = tz
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self._index = None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame):
+        """
+        Validate an OHLCV DataFrame (yfinance layout) into a container
+
+        Rows missing any OHLC value are dropped, the index is parsed, sorted
+        and deduplicated. Columns are viewed rather than copied when the frame
+        is already clean.
+
+        Returns:
+            OHLCV, or None if the frame is empty or lacks OHLC columns
+        """
+        if frame is None or frame.empty or not all(col in frame.columns for col in PRICE_COLUMNS):
+            return None
+
+        index = frame.index
+        if not isinstance(index, pd.DatetimeIndex):
+            time_col = next((c for c in TIME_COLUMNS if c in frame.columns), None)
+            try:
+                index = pd.DatetimeIndex(frame[time_col] if time_col else index)
+            except Exception as e:
+                print(f"Error parsing price index: {e}")
+                return None
+
+        columns = {col: frame[col].to_numpy(dtype=np.float64) for col in PRICE_COLUMNS}
+        if "Volume" in frame.columns:
+            columns["Volume"] = frame["Volume"].to_numpy(dtype=np.float64)
+
+        keep = ~np.isnan(np.column_stack([columns[col] for col in PRICE_COLUMNS])).any(axis=1)
+        time = index.as_unit("ns").asi8
+        order = None
+        if not keep.all():
+            order = np.flatnonzero(keep)
+        if not index.is_monotonic_increasing or index.has_duplicates:
+            candidates = order if order is not None else np.arange(len(time))
+            candidates = candidates[np.argsort(time[candidates], kind="stable")]
+            # Keep the last row of each duplicated timestamp
+            last = np.append(time[candidates][1:] != time[candidates][:-1], True)
+            order = candidates[last]
+        if order is not None:
+            time = time[order]
+            columns = {col: values[order] for col, values in columns.items()}
+        if len(time) == 0:
+            return None
+
+        return cls(
+            np.ascontiguousarray(time),
+            columns["Open"], columns["High"], columns["Low"], columns["Close"],
+            columns.get("Volume"),
+            tz=index.tz,
+        )
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.time) == 0
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Timestamps as a DatetimeIndex (built once, in the exchange timezone)"""
+        if self._index is None:
+            index = pd.DatetimeIndex(self.time.view("datetime64[ns]"))
+            self._index = index.tz_localize("UTC").tz_convert(self.tz) if self.tz is not None else index
+        return self._index
+
+    @property
+    def columns(self) -> list:
+        names = list(PRICE_COLUMNS)
+        if self.volume is not None:
+            names.append("Volume")
+        return names
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Column view by yfinance column name (e.g. bars['Close'])"""
+        try:
+            return getattr(self, name.lower())
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def arrays(self) -> dict:
+        """Column name -> array, including the int64 time column"""
+        data = {"Time": self.time}
+        data.update((name, self[name]) for name in self.columns)
+        return data
+
+    def take(self, positions):
+        """Container of selected rows (a view for slices, a copy for index arrays)"""
+        volume = self.volume[positions] if self.volume is not None else None
+        return OHLCV(self.time[positions], self.open[positions], self.high[positions],
+                     self.low[positions], self.close[positions], volume, tz=self.tz)
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame copy in the yfinance layout"""
+        return pd.DataFrame({name: self[name] for name in self.columns}, index=self.index)
+
+
+def as_ohlcv(price_data):
+    """OHLCV container for a container or DataFrame (None if unusable)"""
+    if price_data is None or isinstance(price_data, OHLCV):
+        return price_data
+    return OHLCV.from_frame(price_data)
@@ -0,0 +1,447 @@
+# utils/optimizer.py
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import TRADING_DAYS
+from utils.risk import asset_returns, covariance
+
+
+OPTIMIZERS = {
+    "min_variance": "Minimum variance",
+    "max_sharpe": "Maximum Sharpe ratio",
+    "risk_parity": "Equal risk contribution",
+}
+FRONTIER_POINTS = 40
+TOLERANCE = 1e-9
+MAX_ITERATIONS = 20000
+
+
+def project_bounded_simplex(v, lo, hi) -> np.ndarray:
+    """
+    Euclidean projection of v onto {w : sum(w) = 1, lo <= w <= hi}
+
+    The projection is clip(v - tau, lo, hi) for the shift tau that makes
+    the weights sum to one. The sum is piecewise linear and decreasing in
+    tau with breakpoints at v - hi and v - lo, so it is evaluated at every
+    breakpoint with one sort and cumulative sums and tau is interpolated
+    inside the bracketing segment: O(N log N), no iteration.
+    """
+    lo = np.broadcast_to(lo, v.shape)
+    hi = np.broadcast_to(hi, v.shape)
+    points = np.concatenate([v - hi, v - lo])
+    # Passing v_i - hi_i frees weight i (slope -1); passing v_i - lo_i pins it at lo (slope back to 0)
+    slopes = np.concatenate([-np.ones(len(v)), np.ones(len(v))])
+    order = np.argsort(points, kind="stable")
+    points, slopes = points[order], slopes[order]
+    slope_after = np.cumsum(slopes)
+    totals = hi.sum() + np.concatenate([[0.0], np.cumsum(slope_after[:-1] * np.diff(points))])
+
+    k = int(np.searchsorted(-totals, -1.0))
+    if k == 0:
+        return np.clip(v - points[0], lo, hi)
+    if k >= len(points):
+        return np.clip(v - points[-1], lo, hi)
+    t0, t1, s0, s1 = points[k - 1], points[k], totals[k - 1], totals[k]
+    tau = t0 if s0 == s1 else t0 + (s0 - 1) * (t1 - t0) / (s0 - s1)
+    return np.clip(v - tau, lo, hi)
+
+
+def _bounds(n: int, lower, upper):
+    """Per-asset bound arrays, checked for feasibility"""
+    lo = np.broadcast_to(np.asarray(lower, dtype=np.float64), (n,)).copy()
+    hi = np.broadcast_to(np.asarray(upper, dtype=np.float64), (n,)).copy()
+    if lo.sum() > 1 + 1e-12 or hi.sum() < 1 - 1e-12 or (lo > hi).any():
+        raise ValueError(f"Weight bounds [{lower}, {upper}] cannot sum to 1 over {n} assets")
+    return lo, hi
+
+
+def _active_set_solve(cov, linear, lo, hi, w, tol: float):
+    """
+    Exact solution for the bounds active at w, or None if it is not optimal
+
+    Weights at a bound stay there; the free ones solve the equality
+    constrained KKT system [2 cov_FF 1; 1' 0] [w_F; nu] = [linear_F -
+    2 cov_FB w_B; 1 - sum(w_B)]. The result is accepted only if the free
+    weights stay inside their bounds and no bound weight wants to move.
+    """
+    at_lo, at_hi = w <= lo + tol, w >= hi - tol
+    free = ~(at_lo | at_hi)
+    if not free.any():
+        return None
+    fixed = np.where(at_lo, lo, np.where(at_hi, hi, 0.0))
+    cov_ff = cov[np.ix_(free, free)]
+    size = int(free.sum())
+    system = np.zeros((size + 1, size + 1))
+    system[:size, :size] = 2 * cov_ff
+    system[:size, size] = system[size, :size] = 1.0
+    rhs = np.concatenate([linear[free] - 2 * cov[free] @ fixed, [1 - fixed.sum()]])
+    try:
+        solution = np.linalg.solve(system, rhs)
+    except np.linalg.LinAlgError:
+        return None
+
+    candidate = fixed.copy()
+    candidate[free] = solution[:size]
+    nu = solution[size]
+    if (candidate[free] < lo[free] - tol).any() or (candidate[free] > hi[free] + tol).any():
+        return None
+    # Lagrangian gradient: >= 0 where pinned low, <= 0 where pinned high
+    reduced = 2 * (cov @ candidate) - linear + nu
+    scale = max(np.abs(linear).max(), np.abs(reduced).max(), 1e-12)
+    if (reduced[at_lo] < -1e-9 * scale).any() or (reduced[at_hi] > 1e-9 * scale).any():
+        return None
+    return np.clip(candidate, lo, hi)
+
+
+def solve_mean_variance(cov, mu, risk_aversion_inv: float, lo, hi, start=None, step=None,
+                        tol: float = TOLERANCE, max_iter: int = MAX_ITERATIONS, check_every: int = 5):
+    """
+    Minimize w' cov w - t * mu' w over the bounded simplex
+
+    Accelerated projected gradient (FISTA with a 1 / L step, L = 2 * largest
+    eigenvalue of cov, and adaptive restart) identifies which weights sit
+    on their bounds; every check_every iterations the free weights are
+    solved exactly for that active set and accepted once they satisfy the
+    KKT conditions. t = 0 gives minimum variance; larger t moves along the
+    efficient frontier towards maximum return.
+
+    Returns:
+        (weights, iterations)
+    """
+    n = len(cov)
+    if step is None:
+        step = 1.0 / (2 * np.linalg.eigvalsh(cov)[-1])
+    w = project_bounded_simplex(np.full(n, 1.0 / n) if start is None else np.asarray(start, dtype=np.float64), lo, hi)
+    y, momentum = w.copy(), 1.0
+    linear = risk_aversion_inv * np.asarray(mu, dtype=np.float64)
+    for iteration in range(1, max_iter + 1):
+        if iteration % check_every == 1 or check_every == 1:
+            exact = _active_set_solve(cov, linear, lo, hi, w, 1e-10)
+            if exact is not None:
+                return exact, iteration
+        gradient = 2 * (cov @ y) - linear
+        new = project_bounded_simplex(y - step * gradient, lo, hi)
+        change = new - w
+        if np.abs(change).max() < tol:
+            return new, iteration
+        # Restart the momentum when it points uphill
+        if gradient @ change > 0:
+            momentum = 1.0
+        next_momentum = 0.5 * (1 + math.sqrt(1 + 4 * momentum ** 2))
+        y = new + (momentum - 1) / next_momentum * change
+        w, momentum = new, next_momentum
+    return w, max_iter
+
+
+def max_return_weights(mu, lo, hi) -> np.ndarray:
+    """Highest-return weights within the bounds: fill the best assets up to their caps"""
+    order = np.argsort(-mu, kind="stable")
+    capacity = (hi - lo)[order]
+    before = np.cumsum(capacity) - capacity
+    weights = lo.copy()
+    weights[order] += np.clip(1 - lo.sum() - before, 0.0, capacity)
+    return weights
+
+
+def _frontier_span(cov, mu, lo, hi, step, n_points: int):
+    """
+    Return weights t from minimum variance to the smallest t reaching the
+    maximum-return portfolio
+
+    The optimal weights are piecewise linear in t, so a grid ending at that
+    point spreads the frontier instead of piling points on the max-return
+    corner. It is bracketed by doubling and narrowed by bisection,
+    warm-started.
+
+    Returns:
+        (t values, solver iterations spent)
+    """
+    target = max_return_weights(mu, lo, hi) @ mu
+    tolerance = 1e-9 * max(abs(target), 1.0)
+    low, high = 0.0, 2 / step / max(float(np.ptp(mu)), 1e-12)
+    w, iterations = solve_mean_variance(cov, mu, high, lo, hi, None, step)
+    for _ in range(60):
+        if w @ mu >= target - tolerance:
+            break
+        low, high = high, 2 * high
+        w, used = solve_mean_variance(cov, mu, high, lo, hi, w, step)
+        iterations += used
+    for _ in range(20):
+        mid = 0.5 * (low + high)
+        w, used = solve_mean_variance(cov, mu, mid, lo, hi, w, step)
+        iterations += used
+        if w @ mu >= target - tolerance:
+            high = mid
+        else:
+            low = mid
+    # Squared spacing: the frontier bends most near minimum variance
+    return high * np.linspace(0.0, 1.0, n_points) ** 2, iterations
+
+
+def efficient_frontier(mu, cov, lower=0.0, upper=1.0, n_points: int = FRONTIER_POINTS,
+                       risk_free: float = 0.0, warm_start: bool = True) -> dict:
+    """
+    Sample the efficient frontier in one sweep over the risk-aversion parameter
+
+    Points run from minimum variance to maximum return, evenly spaced in
+    the return weight t; each solve starts from the previous point's
+    weights, so most points converge in a few iterations.
+
+    Returns:
+        Dict with 'weights' (points x assets), 'returns', 'volatility',
+        'sharpe', 't' (the return weight of each point) and 'iterations'
+        (including those spent finding the span)
+    """
+    mu = np.asarray(mu, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    lo, hi = _bounds(len(mu), lower, upper)
+    step = 1.0 / (2 * np.linalg.eigvalsh(cov)[-1])
+    ts, iterations = _frontier_span(cov, mu, lo, hi, step, n_points)
+
+    weights = np.empty((n_points, len(mu)))
+    start = None
+    for k, t in enumerate(ts):
+        weights[k], used = solve_mean_variance(cov, mu, t, lo, hi, start, step)
+        iterations += used
+        if warm_start:
+            start = weights[k]
+
+    returns = weights @ mu
+    volatility = np.sqrt(np.maximum(np.einsum("ij,jk,ik->i", weights, cov, weights), 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (returns - risk_free) / volatility
+    return {"weights": weights, "returns": returns, "volatility": volatility, "sharpe": sharpe,
+            "t": ts, "iterations": iterations}
+
+
+def max_sharpe_weights(mu, cov, lower=0.0, upper=1.0, risk_free: float = 0.0, frontier: dict = None):
+    """
+    Maximum Sharpe ratio weights: the best frontier point, refined by a
+    golden-section search over the risk-aversion parameter around it
+    """
+    mu = np.asarray(mu, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    lo, hi = _bounds(len(mu), lower, upper)
+    frontier = frontier or efficient_frontier(mu, cov, lower, upper, risk_free=risk_free)
+    step = 1.0 / (2 * np.linalg.eigvalsh(cov)[-1])
+    best = int(np.nanargmax(frontier["sharpe"]))
+    ts = frontier["t"]
+    a, b = ts[max(best - 1, 0)], ts[min(best + 1, len(ts) - 1)]
+    start = frontier["weights"][best]
+
+    def sharpe_at(t):
+        w, _ = solve_mean_variance(cov, mu, t, lo, hi, start, step)
+        vol = math.sqrt(max(w @ cov @ w, 0.0))
+        return ((w @ mu - risk_free) / vol if vol > 0 else -np.inf), w
+
+    ratio = (math.sqrt(5) - 1) / 2
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    (fc, wc), (fd, wd) = sharpe_at(c), sharpe_at(d)
+    for _ in range(30):
+        if fc > fd:
+            b, d, fd, wd = d, c, fc, wc
+            c = b - ratio * (b - a)
+            fc, wc = sharpe_at(c)
+        else:
+            a, c, fc, wc = c, d, fd, wd
+            d = a + ratio * (b - a)
+            fd, wd = sharpe_at(d)
+    candidate, score = (wc, fc) if fc > fd else (wd, fd)
+    return candidate if score >= frontier["sharpe"][best] else frontier["weights"][best]
+
+
+def _risk_budget_descent(cov, diag, y, budgets, free, tol: float, max_sweeps: int):
+    """
+    Cyclical coordinate descent on min 1/2 y' cov y - sum(b_i log y_i) over the free coordinates
+
+    Coordinates outside free keep their values (and risk); each step is the
+    positive root of a quadratic. y is updated in place.
+    """
+    cov_y = cov @ y
+    for _ in range(max_sweeps):
+        previous = y[free]
+        for i in free:
+            rest = cov_y[i] - diag[i] * y[i]
+            new = (-rest + math.sqrt(rest * rest + 4 * diag[i] * budgets[i])) / (2 * diag[i])
+            cov_y += cov[:, i] * (new - y[i])
+            y[i] = new
+        if np.abs(y[free] - previous).max() <= tol * np.abs(y[free]).max():
+            break
+    return y
+
+
+def risk_parity_weights(cov, budgets=None, lower=0.0, upper=1.0, tol: float = 1e-10, max_sweeps: int = 1000):
+    """
+    Equal (or budgeted) risk contribution weights by cyclical coordinate descent
+
+    Solves min 1/2 y' cov y - sum(b_i log y_i) for y > 0 one coordinate at a
+    time (each step is the positive root of a quadratic) and normalizes
+    w = y / sum(y), which gives w_i (cov w)_i proportional to b_i.
+
+    Weights outside their bounds are pinned to the bound and the rest are
+    solved again with the pinned weights held fixed: the free assets keep
+    contributions proportional to their budgets, which are scaled (by
+    bisection) until the free weights take exactly the remaining mass.
+    """
+    cov = np.asarray(cov, dtype=np.float64)
+    n = len(cov)
+    budgets = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=np.float64) / np.sum(budgets)
+    lo, hi = _bounds(n, lower, upper)
+    diag = np.diag(cov).copy()
+    y = _risk_budget_descent(cov, diag, budgets / np.sqrt(diag), budgets, np.arange(n), tol, max_sweeps)
+    w = y / y.sum()
+
+    pinned = np.zeros(n, dtype=bool)
+    while True:
+        over, under = ~pinned & (w > hi), ~pinned & (w < lo)
+        if not (over | under).any():
+            break
+        w[over], w[under] = hi[over], lo[under]
+        pinned |= over | under
+        free = np.flatnonzero(~pinned)
+        mass = 1.0 - w[pinned].sum()
+        if len(free) == 0 or mass <= lo[free].sum():
+            w[free] = lo[free]
+            break
+
+        def free_mass(scale):
+            _risk_budget_descent(cov, diag, w, budgets * scale, free, tol, max_sweeps)
+            return w[free].sum()
+
+        # The free weights grow with the budget scale; bracket, then bisect
+        low, high = 0.0, 1.0
+        while free_mass(high) < mass:
+            low, high = high, high * 4
+        for _ in range(200):
+            scale = (low + high) / 2
+            total = free_mass(scale)
+            if abs(total - mass) <= tol * mass:
+                break
+            low, high = (scale, high) if total < mass else (low, scale)
+    return project_bounded_simplex(w, lo, hi)
+
+
+def risk_contributions(weights, cov) -> np.ndarray:
+    """Share of portfolio variance from each asset (sums to 1)"""
+    weights = np.asarray(weights, dtype=np.float64)
+    marginal = weights * (cov @ weights)
+    return marginal / marginal.sum()
+
+
+def optimize_portfolio(prices: pd.DataFrame, method: str = "max_sharpe", lower=0.0, upper=1.0,
+                       cov_method: str = "shrinkage", risk_free: float = 0.0,
+                       periods_per_year: int = TRADING_DAYS, n_points: int = FRONTIER_POINTS):
+    """
+    Optimal weights for a (time x asset) price DataFrame
+
+    Expected returns are mean bar returns and the covariance comes from
+    utils.risk.covariance, both annualized.
+
+    Args:
+        method: Key of OPTIMIZERS
+        lower, upper: Weight bounds (scalars or per asset); 0 / 1 is long-only
+        cov_method: One of utils.risk.COVARIANCE_METHODS
+
+    Returns:
+        Dict with 'weights' (Series), 'frontier' (efficient_frontier dict),
+        'expected_return', 'volatility', 'sharpe', 'risk_contributions'
+        (Series), 'mu' and 'cov'; None for an unknown method or too little
+        history
+    """
+    if method not in OPTIMIZERS:
+        print(f"Unknown optimizer: {method}")
+        return None
+    returns = asset_returns(prices.to_numpy(dtype=np.float64))
+    if len(returns) < 30 or prices.shape[1] < 2:
+        return None
+    mu = returns.mean(axis=0) * periods_per_year
+    cov = covariance(returns, cov_method) * periods_per_year
+    try:
+        frontier = efficient_frontier(mu, cov, lower, upper, n_points, risk_free)
+    except ValueError as e:
+        print(f"Error optimizing portfolio: {e}")
+        return None
+
+    if method == "min_variance":
+        weights = frontier["weights"][0]
+    elif method == "max_sharpe":
+        weights = max_sharpe_weights(mu, cov, lower, upper, risk_free, frontier)
+    else:
+        weights = risk_parity_weights(cov, lower=lower, upper=upper)
+
+    volatility = math.sqrt(max(weights @ cov @ weights, 0.0))
+    expected = float(weights @ mu)
+    symbols = list(prices.columns)
+    return {
+        "weights": pd.Series(weights, index=symbols, name="weight"),
+        "frontier": frontier,
+        "expected_return": expected,
+        "volatility": volatility,
+        "sharpe": (expected - risk_free) / volatility if volatility > 0 else np.nan,
+        "risk_contributions": pd.Series(risk_contributions(weights, cov), index=symbols, name="risk_contribution"),
+        "mu": pd.Series(mu, index=symbols),
+        "cov": cov,
+    }
+
+
+def benchmark_optimizer(n_assets: int = 300, n_days: int = 2520, seed: int = 0) -> dict:
+    """
+    Time the frontier sweep warm- and cold-started and check the solutions
+
+    Minimum variance is compared with the closed form (bounds inactive),
+    bounded solutions with their KKT conditions and risk parity (with and
+    without a weight cap) with equal risk contributions.
+
+    Returns:
+        Dict of timings, iteration counts and errors
+    """
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0004, 0.01, (n_days, 1))
+    returns = market * rng.uniform(0.5, 1.5, n_assets) + rng.normal(0.0002, 0.015, (n_days, n_assets))
+    mu = returns.mean(axis=0) * TRADING_DAYS
+    cov = covariance(returns, "shrinkage") * TRADING_DAYS
+
+    out = {}
+    for label, warm in (("warm", True), ("cold", False)):
+        start = time.perf_counter()
+        frontier = efficient_frontier(mu, cov, 0.0, 1.0, warm_start=warm)
+        out[f"{label}_s"] = time.perf_counter() - start
+        out[f"{label}_iterations"] = frontier["iterations"]
+
+    # Unbounded minimum variance: cov^-1 1 / 1' cov^-1 1
+    inverse = np.linalg.solve(cov, np.ones(n_assets))
+    closed = inverse / inverse.sum()
+    free, _ = solve_mean_variance(cov, mu, 0.0, -np.ones(n_assets), np.ones(n_assets))
+    out["min_variance_error"] = float(np.abs(free - closed).max())
+
+    # KKT for a capped max-Sharpe-side point: free weights share one gradient value
+    w = frontier["weights"][len(frontier["t"]) // 2]
+    gradient = 2 * cov @ w - frontier["t"][len(frontier["t"]) // 2] * mu
+    inside = (w > 1e-7) & (w < 1 - 1e-7)
+    out["kkt_spread"] = float(np.ptp(gradient[inside])) if inside.sum() > 1 else 0.0
+
+    start = time.perf_counter()
+    parity = risk_parity_weights(cov)
+    out["risk_parity_s"] = time.perf_counter() - start
+    out["risk_parity_error"] = float(np.ptp(risk_contributions(parity, cov)) * n_assets)
+
+    # Capped below the largest unbounded weight: uncapped assets still share risk equally
+    cap = float(np.quantile(parity, 0.9))
+    start = time.perf_counter()
+    capped = risk_parity_weights(cov, upper=cap)
+    out["risk_parity_capped_s"] = time.perf_counter() - start
+    free = capped < cap - 1e-9
+    out["risk_parity_capped_error"] = float(np.ptp(risk_contributions(capped, cov)[free]) * n_assets)
+    assert out["min_variance_error"] < 1e-6 and out["risk_parity_error"] < 1e-6, out
+    assert capped.max() <= cap + 1e-12 and out["risk_parity_capped_error"] < 1e-6, out
+    return out
+
+
+if __name__ == "__main__":
+    print("Efficient frontier, 300 assets, 40 points, long-only:")
+    print("=" * 60)
+    for name, value in benchmark_optimizer().items():
+        print(f"{name:>20}: {value:.4g}")
@@ -0,0 +1,121 @@
+# utils/parallel.py
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+MAX_WORKERS = int(os.getenv("MARKETSCOPE_WORKERS", "0")) or min(os.cpu_count() or 1, 8)
+
+
+class SharedArray:
+    """
+    A NumPy array copied once into a named shared-memory block
+
+    Workers receive the small handle (name, shape, dtype) and map the same
+    memory with run_shared() instead of unpickling a copy of the data. Use as
+    a context manager; the block is unlinked on exit.
+    """
+
+    def __init__(self, values):
+        values = np.ascontiguousarray(values)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self.array = np.ndarray(values.shape, dtype=values.dtype, buffer=self._shm.buf)
+        self.array[...] = values
+        self.handle = (self._shm.name, values.shape, values.dtype.str)
+
+    def close(self):
+        if self._shm is None:
+            return
+        self.array = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_shared(handle, fn, *args):
+    """Worker side: call fn(array, *args) on the shared array named by handle"""
+    name, shape, dtype = handle
+    shm = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        return fn(array, *args)
+    finally:
+        del array
+        try:
+            shm.close()
+        except BufferError:
+            # A traceback still references the mapping; it is released with it
+            pass
+
+
+_pool = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Process-wide worker pool
+
+    Workers are spawned rather than forked so the threads of the host
+    (Streamlit) process are never duplicated mid-lock.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def reset_process_pool():
+    """Drop the worker pool (e.g. after a worker crashed); the next call starts a new one"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+_threads = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """
+    Process-wide pool for background jobs started from the UI
+
+    Jobs run in threads of the host process, so a Streamlit rerun keeps
+    rendering while NumPy (which releases the GIL) does the work.
+    """
+    global _threads
+    if _threads is None:
+        _threads = ThreadPoolExecutor(max_workers=2, thread_name_prefix="marketscope")
+    return _threads
+
+
+def map_shared(fn, values, tasks, workers: int = None) -> list:
+    """
+    [fn(values, *task) for task in tasks], on the process pool with values in shared memory
+
+    fn must be a module-level function. Runs inline when there is a single
+    task, workers <= 1, or the pool cannot be used.
+    """
+    tasks = list(tasks)
+    workers = MAX_WORKERS if workers is None else workers
+    if len(tasks) <= 1 or workers <= 1:
+        return [fn(values, *task) for task in tasks]
+
+    try:
+        with SharedArray(values) as shared:
+            pool = get_process_pool()
+            futures = [pool.submit(run_shared, shared.handle, fn, *task) for task in tasks]
+            return [future.result() for future in futures]
+    except (BrokenProcessPool, OSError) as e:
+        print(f"Process pool unavailable, running inline: {e}")
+        reset_process_pool()
+        return [fn(values, *task) for task in tasks]
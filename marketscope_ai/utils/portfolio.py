@@ -0,0 +1,308 @@
+# utils/portfolio.py
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import fill_gaps, sharpe_ratio
+from utils.bar_store import get_bar_store
+from utils.indicators import TRADING_DAYS
+
+
+HOLDING_COLUMNS = ("symbol", "quantity", "cost", "currency")
+
+# Quote currencies in minor units: (major currency, factor)
+MINOR_CURRENCIES = {"GBp": ("GBP", 0.01), "GBX": ("GBP", 0.01), "ZAc": ("ZAR", 0.01), "ILA": ("ILS", 0.01)}
+
+
+def fx_symbol(currency: str, base_currency: str) -> str:
+    """Yahoo Finance pair quoting base-currency units per unit of currency (e.g. EURUSD=X)"""
+    return f"{currency.upper()}{base_currency.upper()}=X"
+
+
+def normalize_holdings(holdings, base_currency: str = "USD") -> pd.DataFrame:
+    """
+    Holdings as a DataFrame with one row per (symbol, currency)
+
+    Accepts a DataFrame or a list of dicts with symbol, quantity and
+    optionally cost (per unit, in the holding's currency), currency and
+    target_weight. Symbols are upper-cased, minor-unit currencies (GBp) are
+    folded into their major currency and repeated lots are merged with a
+    quantity-weighted cost.
+    """
+    frame = pd.DataFrame(holdings).copy()
+    if frame.empty or "symbol" not in frame.columns or "quantity" not in frame.columns:
+        return pd.DataFrame(columns=list(HOLDING_COLUMNS) + ["target_weight", "unit_factor"])
+
+    frame["symbol"] = frame["symbol"].astype(str).str.strip().str.upper()
+    frame["quantity"] = pd.to_numeric(frame["quantity"], errors="coerce")
+    frame["cost"] = pd.to_numeric(frame.get("cost"), errors="coerce") if "cost" in frame else np.nan
+    currency = frame["currency"].fillna(base_currency).astype(str).str.strip() if "currency" in frame else base_currency
+    frame["currency"] = currency
+    frame["target_weight"] = pd.to_numeric(frame["target_weight"], errors="coerce") if "target_weight" in frame else np.nan
+
+    # Minor units: quantities stay, per-unit cost is converted to the major currency
+    factor = frame["currency"].map(lambda c: MINOR_CURRENCIES.get(c, (c, 1.0))[1])
+    frame["currency"] = frame["currency"].map(lambda c: MINOR_CURRENCIES.get(c, (c.upper(), 1.0))[0])
+    frame["cost"] = frame["cost"] * factor
+    # Already-normalized holdings keep their factor
+    frame["unit_factor"] = factor * (frame["unit_factor"] if "unit_factor" in frame else 1.0)
+
+    frame = frame[(frame["symbol"] != "") & frame["quantity"].notna() & (frame["quantity"] != 0)]
+    frame["cost_value"] = frame["cost"] * frame["quantity"]
+    grouped = frame.groupby(["symbol", "currency"], sort=False)
+    merged = grouped[["quantity", "cost_value", "target_weight"]].sum(min_count=1)
+    merged["unit_factor"] = grouped["unit_factor"].first()
+    merged = merged.reset_index()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        merged["cost"] = merged["cost_value"] / merged["quantity"]
+    return merged[list(HOLDING_COLUMNS) + ["target_weight", "unit_factor"]]
+
+
+class PortfolioAnalytics:
+    """
+    Daily analytics of a fixed set of holdings, shaped (time x holding)
+
+    Values are in the base currency and quantities are held constant.
+    Returns are time-weighted: a holding that starts trading mid-history
+    adds value but not return. Per-holding contributions are daily weight x
+    return, linked through the later portfolio growth so they add up to
+    the total return exactly. Drift is measured against target weights (or,
+    without targets, the weights on the first day).
+    """
+
+    __slots__ = ("index", "holdings", "base_currency", "prices", "fx", "values", "nav", "weights",
+                 "returns", "portfolio_returns", "contributions", "target_weights", "drift",
+                 "periods_per_year")
+
+    def __init__(self, index, holdings, base_currency, prices, fx, target_weights, periods_per_year):
+        self.index = index
+        self.holdings = holdings
+        self.base_currency = base_currency
+        self.prices = prices
+        self.fx = fx
+        self.periods_per_year = periods_per_year
+
+        # Whole-matrix arithmetic, in place where possible (thousands of columns)
+        base_prices = prices * fx
+        base_prices *= holdings["unit_factor"].to_numpy(dtype=np.float64)
+        self.values = base_prices * holdings["quantity"].to_numpy(dtype=np.float64)
+        self.values[np.isnan(self.values)] = 0.0
+        self.nav = self.values.sum(axis=1)
+        self.weights = self.values / np.where(self.nav == 0, 1.0, self.nav)[:, None]
+
+        self.returns = np.zeros(base_prices.shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(base_prices[1:], base_prices[:-1], out=self.returns[1:])
+        self.returns[1:] -= 1
+        self.returns[~np.isfinite(self.returns)] = 0.0
+
+        self.contributions = np.zeros(self.weights.shape)
+        np.multiply(self.weights[:-1], self.returns[1:], out=self.contributions[1:])
+        self.portfolio_returns = self.contributions.sum(axis=1)
+
+        if target_weights is None:
+            first = int(np.argmax(self.nav != 0))
+            target_weights = self.weights[first]
+        self.target_weights = np.asarray(target_weights, dtype=np.float64)
+        self.drift = self.weights - self.target_weights
+
+    def nav_frame(self) -> pd.DataFrame:
+        """Portfolio value, daily return and rebalancing distance over time"""
+        return pd.DataFrame({
+            "nav": self.nav,
+            "return": self.portfolio_returns,
+            # One-way turnover needed to get back to target
+            "drift": 0.5 * np.abs(self.drift).sum(axis=1),
+        }, index=self.index)
+
+    def price_frame(self) -> pd.DataFrame:
+        """Per-holding prices in the base currency (NaN before a holding trades)"""
+        base_prices = self.prices * self.fx
+        base_prices *= self.holdings["unit_factor"].to_numpy(dtype=np.float64)
+        return pd.DataFrame(base_prices, index=self.index, columns=self.holdings["symbol"].to_numpy())
+
+    def holdings_table(self) -> pd.DataFrame:
+        """Latest per-holding value, weight, drift, P&L and contribution over the history"""
+        last = self.values[-1]
+        nav = self.nav[-1]
+        first = int(np.argmax(self.nav != 0))
+        cost_value = (self.holdings["cost"] * self.holdings["quantity"]).to_numpy(dtype=np.float64) * self.fx[-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            table = pd.DataFrame({
+                "symbol": self.holdings["symbol"].to_numpy(),
+                "currency": self.holdings["currency"].to_numpy(),
+                "quantity": self.holdings["quantity"].to_numpy(),
+                "price": self.prices[-1],
+                "value": last,
+                "weight": self.weights[-1],
+                "target_weight": self.target_weights,
+                "drift": self.drift[-1],
+                "rebalance_trade": (self.target_weights - self.weights[-1]) * nav,
+                "cost_value": cost_value,
+                "unrealized_pnl": last - cost_value,
+                "unrealized_pnl_pct": last / cost_value - 1,
+                "period_return": np.prod(1 + self.returns[first + 1:], axis=0) - 1,
+                "contribution": self.linked_contributions(),
+            })
+        return table
+
+    def linked_contributions(self) -> np.ndarray:
+        """Per-holding contribution to the total return (sums to it exactly)"""
+        # prod(1 + r) - 1 == sum_t r_t * prod_{s > t}(1 + r_s)
+        growth_after = np.ones(len(self.portfolio_returns))
+        growth_after[:-1] = np.cumprod((1 + self.portfolio_returns[::-1])[:-1])[::-1]
+        return growth_after @ self.contributions
+
+    def summary(self) -> dict:
+        """Headline portfolio statistics in the base currency"""
+        first = int(np.argmax(self.nav != 0))
+        returns = self.portfolio_returns[first + 1:]
+        years = len(returns) / self.periods_per_year
+        equity = np.cumprod(np.concatenate([[1.0], 1 + returns]))
+        total = equity[-1] - 1
+        return {
+            "base_currency": self.base_currency,
+            "nav": float(self.nav[-1]),
+            "total_return": float(total),
+            "cagr": float((1 + total) ** (1 / years) - 1) if years > 0 else np.nan,
+            "volatility": float(np.std(returns, ddof=1) * np.sqrt(self.periods_per_year)) if len(returns) > 1 else np.nan,
+            "sharpe": float(sharpe_ratio(returns, periods_per_year=self.periods_per_year)[0]) if len(returns) > 1 else np.nan,
+            "max_drawdown": float((equity / np.maximum.accumulate(equity) - 1).min()),
+            "drift": float(0.5 * np.abs(self.drift[-1]).sum()),
+            "holdings": len(self.holdings),
+        }
+
+
+def _fx_columns(currencies, base_currency, fx_rates, index) -> np.ndarray:
+    """(T, len(currencies)) base-currency rates, forward/back-filled; 1.0 for the base currency"""
+    out = np.full((len(index), len(currencies)), np.nan)
+    for j, currency in enumerate(currencies):
+        if currency == base_currency.upper():
+            out[:, j] = 1.0
+            continue
+        rate = fx_rates.get(currency) if fx_rates is not None else None
+        if isinstance(rate, pd.Series):
+            rate = rate[~rate.index.duplicated(keep="last")].sort_index()
+            out[:, j] = rate.reindex(index.union(rate.index)).ffill().bfill().reindex(index).to_numpy()
+        elif rate is not None:
+            out[:, j] = float(rate)
+    return out
+
+
+def analyze_portfolio(holdings, prices: pd.DataFrame, base_currency: str = "USD", fx_rates: dict = None,
+                      periods_per_year: int = TRADING_DAYS):
+    """
+    Vectorized portfolio analytics over an aligned price matrix
+
+    Args:
+        holdings: DataFrame/records with symbol, quantity, cost, currency
+            (see normalize_holdings)
+        prices: (time x symbol) local-currency close prices
+        base_currency: Currency all values are reported in
+        fx_rates: Currency -> Series of base-currency rates over time, or a
+            constant rate; missing currencies make their holdings NaN-valued (0)
+
+    Returns:
+        PortfolioAnalytics, or None when no holding has prices
+    """
+    holdings = normalize_holdings(holdings, base_currency)
+    if holdings.empty or prices is None or prices.empty:
+        return None
+
+    index = prices.index
+    columns = {symbol: j for j, symbol in enumerate(map(str.upper, prices.columns))}
+    positions = holdings["symbol"].map(columns)
+    missing = positions.isna()
+    if missing.all():
+        return None
+    if missing.any():
+        print(f"No prices for: {', '.join(holdings.loc[missing, 'symbol'])}")
+
+    matrix = fill_gaps(prices.to_numpy(dtype=np.float64))
+    held = np.full((len(index), len(holdings)), np.nan)
+    held[:, ~missing.to_numpy()] = matrix[:, positions[~missing].astype(int).to_numpy()]
+
+    currencies = list(dict.fromkeys(holdings["currency"]))
+    fx_table = _fx_columns(currencies, base_currency, fx_rates, index)
+    fx = fx_table[:, holdings["currency"].map({c: j for j, c in enumerate(currencies)}).to_numpy()]
+
+    targets = holdings["target_weight"]
+    target_weights = None
+    if targets.notna().any():
+        target_weights = targets.fillna(0.0).to_numpy(dtype=np.float64)
+        target_weights = target_weights / target_weights.sum() if target_weights.sum() else None
+
+    return PortfolioAnalytics(index, holdings, base_currency.upper(), held, fx, target_weights, periods_per_year)
+
+
+def load_portfolio(holdings, base_currency: str = "USD", start=None, end=None, fallback_rates: dict = None):
+    """
+    analyze_portfolio over prices and FX pairs held in the local bar store
+
+    FX history is read from stored pairs (see fx_symbol); currencies
+    without a stored pair use fallback_rates (e.g. a spot rate) when given.
+
+    Returns:
+        PortfolioAnalytics, or None when no holding has stored prices
+    """
+    holdings = normalize_holdings(holdings, base_currency)
+    store = get_bar_store()
+    prices = store.matrix(holdings["symbol"].unique(), "Close", start=start, end=end)
+    if prices.empty:
+        return None
+
+    fx_rates = {}
+    for currency in holdings["currency"].unique():
+        if currency == base_currency.upper():
+            continue
+        pair = store.matrix([fx_symbol(currency, base_currency)], "Close", start=None, end=end)
+        if not pair.empty:
+            fx_rates[currency] = pair.iloc[:, 0].dropna()
+        elif fallback_rates and currency in fallback_rates:
+            fx_rates[currency] = fallback_rates[currency]
+    return analyze_portfolio(holdings, prices, base_currency, fx_rates)
+
+
+def benchmark_portfolio(n_days: int = 2520, n_holdings: int = 3000, seed: int = 0) -> dict:
+    """
+    Time analytics for a large multi-currency portfolio and check that
+    contributions add up to the portfolio return
+
+    Returns:
+        Dict of step -> seconds
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2015-01-01", periods=n_days)
+    symbols = [f"S{i:04d}" for i in range(n_holdings)]
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0002, 0.015, (n_days, n_holdings)), axis=0)),
+                          index=index, columns=symbols)
+    prices.iloc[: n_days // 3, : n_holdings // 10] = np.nan  # later listings
+    currencies = rng.choice(["USD", "EUR", "GBp", "JPY"], n_holdings)
+    holdings = pd.DataFrame({"symbol": symbols, "quantity": rng.integers(1, 500, n_holdings),
+                             "cost": rng.uniform(50, 150, n_holdings), "currency": currencies})
+    fx_rates = {
+        "EUR": pd.Series(1.1 * np.exp(np.cumsum(rng.normal(0, 0.004, n_days))), index=index),
+        "GBP": pd.Series(1.3 * np.exp(np.cumsum(rng.normal(0, 0.004, n_days))), index=index),
+        "JPY": 0.0068,
+    }
+
+    timings = {}
+    start = time.perf_counter()
+    analytics = analyze_portfolio(holdings, prices, "USD", fx_rates)
+    timings["analyze"] = time.perf_counter() - start
+    start = time.perf_counter()
+    table = analytics.holdings_table()
+    summary = analytics.summary()
+    analytics.nav_frame()
+    timings["report"] = time.perf_counter() - start
+
+    assert abs(table["contribution"].sum() - summary["total_return"]) < 1e-9, "contributions do not add up"
+    return timings
+
+
+if __name__ == "__main__":
+    print("Portfolio analytics, 3000 holdings x 10 years, 4 currencies (seconds):")
+    print("=" * 60)
+    for step, seconds in benchmark_portfolio().items():
+        print(f"{step:>10}: {seconds:.3f}")
@@ -0,0 +1,262 @@
+# utils/relative_stats.py
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import fill_gaps
+from utils.bar_store import get_bar_store
+from utils.indicators import TRADING_DAYS
+
+
+BENCHMARKS = {
+    "SPY": "S&P 500 (SPY)",
+    "^NSEI": "Nifty 50 (^NSEI)",
+    "BTC-USD": "Bitcoin (BTC-USD)",
+}
+DEFAULT_WINDOW = 63  # about one quarter of daily bars
+RELATIVE_STATS = ("beta", "correlation", "alpha", "tracking_error")
+
+
+def _moments(asset_returns, benchmark_returns) -> np.ndarray:
+    """
+    (6, T, N) stack of x, y, x^2, y^2, xy and a validity count, where x is
+    the benchmark and y the asset; bars where either is missing count as zero
+    """
+    x = np.broadcast_to(benchmark_returns[:, None], asset_returns.shape)
+    valid = np.isfinite(asset_returns) & np.isfinite(x)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, asset_returns, 0.0)
+    return np.stack([x, y, x * x, y * y, x * y, valid.astype(np.float64)])
+
+
+def _window_stats(sums, window: int, periods_per_year: int) -> dict:
+    """Relative stats from (6, T, N) trailing-window moment sums (NaN unless the window is complete)"""
+    sx, sy, sxx, syy, sxy, count = sums
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (sxy - sx * sy / window) / (window - 1)
+        var_x = (sxx - sx * sx / window) / (window - 1)
+        var_y = (syy - sy * sy / window) / (window - 1)
+        beta = cov / var_x
+        stats = {
+            "beta": beta,
+            "correlation": cov / np.sqrt(var_x * var_y),
+            # Jensen's alpha with a zero risk-free rate, annualized
+            "alpha": (sy - beta * sx) / window * periods_per_year,
+            "tracking_error": np.sqrt(np.maximum(var_x + var_y - 2 * cov, 0.0) * periods_per_year),
+        }
+    full = count == window
+    return {name: np.where(full & np.isfinite(value), value, np.nan) for name, value in stats.items()}
+
+
+class RelativeStats:
+    """
+    Rolling beta, correlation, alpha and tracking error of symbols vs one benchmark
+
+    All statistics come from trailing sums of five return moments, taken
+    as differences of one cumulative sum over a (6, T, N) stack, so every
+    symbol and bar is computed in a single vectorized pass. The last
+    `window` cumulative rows and the last close of each series are kept
+    (also as of the bar before, since the last bar may still change), which
+    lets sync() extend the cached history with new bars only; the stats live
+    in over-allocated buffers so appends do not copy history.
+    """
+
+    __slots__ = ("benchmark", "window", "periods_per_year", "symbols", "index", "stats",
+                 "_head", "_last_close", "_base_head", "_base_last_close")
+
+    def __init__(self, benchmark: str, window: int = DEFAULT_WINDOW, periods_per_year: int = TRADING_DAYS):
+        self.benchmark = benchmark.upper()
+        self.window = int(window)
+        self.periods_per_year = periods_per_year
+        self.symbols = None
+        self.index = None
+        self.stats = {}
+        self._head = None
+        self._last_close = None
+        self._base_head = None
+        self._base_last_close = None
+
+    def sync(self, close: pd.DataFrame, benchmark_close: pd.Series) -> dict:
+        """
+        Extend the statistics with bars from the last cached one on
+
+        The last cached bar may have been revised since (a daily bar that
+        was still forming), so it is recomputed from the state kept from
+        before it. A different symbol set or new history before the cached
+        start rebuilds from scratch.
+
+        Args:
+            close: (time x symbol) close prices
+            benchmark_close: Benchmark close prices (aligned on close.index)
+
+        Returns:
+            Dict of stat name -> (time x symbol) DataFrame
+        """
+        benchmark_close = benchmark_close.reindex(close.index)
+        symbols = list(close.columns)
+        if symbols != self.symbols or self.index is None or (len(close) and close.index[0] < self.index[0]):
+            self.symbols, self.index, self.stats = symbols, close.index[:0], {}
+            self._head = np.zeros((6, self.window, len(symbols)))
+            self._last_close = np.full(len(symbols) + 1, np.nan)
+
+        if len(self.index) and self.index[-1] in close.index:
+            # Redo the last cached bar from the state before it
+            new = close.index >= self.index[-1]
+            self._head, self._last_close = self._base_head, self._base_last_close
+            self.index = self.index[:-1]
+        elif len(self.index):
+            new = close.index > self.index[-1]
+        else:
+            new = np.ones(len(close), dtype=bool)
+        if new.any():
+            prices = np.column_stack([close.to_numpy(dtype=np.float64)[new],
+                                      benchmark_close.to_numpy(dtype=np.float64)[new]])
+            # Carry the previous closes so the first new bar has a return and gaps are filled
+            prices = fill_gaps(np.vstack([self._last_close, prices]))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = prices[1:] / prices[:-1] - 1
+            self._last_close, self._base_last_close = prices[-1], prices[-2]
+
+            moments = _moments(returns[:, :-1], returns[:, -1])
+            prefix = np.concatenate([self._head, self._head[:, -1:] + np.cumsum(moments, axis=1)], axis=1)
+            sums = prefix[:, self.window:] - prefix[:, :-self.window]
+            self._head, self._base_head = prefix[:, -self.window:], prefix[:, -self.window - 1:-1]
+
+            fresh = _window_stats(sums, self.window, self.periods_per_year)
+            self._append(fresh)
+            self.index = self.index.append(close.index[new])
+        return self.frames()
+
+    def _append(self, fresh: dict):
+        """Append rows to the stat buffers, growing them geometrically so syncs stay O(new bars)"""
+        size = len(self.index)
+        added = len(next(iter(fresh.values())))
+        for name in RELATIVE_STATS:
+            buffer = self.stats.get(name)
+            if buffer is None or len(buffer) < size + added:
+                grown = np.empty((max(2 * (size + added), 64), len(self.symbols)))
+                if buffer is not None:
+                    grown[:size] = buffer[:size]
+                self.stats[name] = buffer = grown
+            buffer[size:size + added] = fresh[name]
+
+    def values(self, name: str) -> np.ndarray:
+        """(time x symbol) array of one stat"""
+        return self.stats[name][:len(self.index)]
+
+    def frames(self) -> dict:
+        """Dict of stat name -> (time x symbol) DataFrame"""
+        return {name: pd.DataFrame(self.values(name), index=self.index, columns=self.symbols)
+                for name in self.stats}
+
+    def latest(self) -> pd.DataFrame:
+        """Most recent complete value of every stat per symbol (symbol x stat)"""
+        table = {}
+        for name in self.stats:
+            values = self.values(name)
+            valid = np.isfinite(values)
+            last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+            table[name] = np.where(valid.any(axis=0), values[last, np.arange(values.shape[1])], np.nan)
+        return pd.DataFrame(table, index=self.symbols)
+
+
+def rolling_relative_stats(close, benchmark_close, window: int = DEFAULT_WINDOW,
+                           periods_per_year: int = TRADING_DAYS) -> dict:
+    """
+    Rolling beta, correlation, alpha and tracking error in one pass
+
+    Args:
+        close: Series (one symbol) or (time x symbol) DataFrame of closes
+        benchmark_close: Benchmark closes on the same time axis
+
+    Returns:
+        Dict of stat name -> (time x symbol) DataFrame
+    """
+    if isinstance(close, pd.Series):
+        close = close.to_frame(close.name or "Close")
+    name = getattr(benchmark_close, "name", None) or "benchmark"
+    return RelativeStats(str(name), window, periods_per_year).sync(close, pd.Series(benchmark_close, index=close.index))
+
+
+_relative = {}
+
+
+def get_relative_stats(symbols, benchmark: str, window: int = DEFAULT_WINDOW,
+                       resolution: str = "1d") -> RelativeStats:
+    """Process-wide cached RelativeStats for a watchlist / benchmark / window"""
+    key = (tuple(s.upper() for s in symbols), benchmark.upper(), int(window), resolution)
+    if key not in _relative:
+        _relative[key] = RelativeStats(benchmark, window)
+    return _relative[key]
+
+
+def relative_stats_watchlist(symbols, benchmark: str, window: int = DEFAULT_WINDOW, resolution: str = "1d"):
+    """
+    Rolling relative stats of stored symbols vs a stored benchmark, reusing the cache
+
+    Returns:
+        (RelativeStats, dict of stat frames), or None when the benchmark
+        or every symbol is missing from the bar store
+    """
+    symbols = [s.upper() for s in symbols if s.upper() != benchmark.upper()]
+    matrix = get_bar_store().matrix(symbols + [benchmark], "Close", resolution)
+    if matrix.empty or benchmark.upper() not in matrix.columns or matrix.shape[1] < 2:
+        return None
+    close = matrix.drop(columns=benchmark.upper())
+    cache = get_relative_stats(close.columns, benchmark, window, resolution)
+    return cache, cache.sync(close, matrix[benchmark.upper()])
+
+
+def benchmark_relative_stats(n_days: int = 2520, n_symbols: int = 1000, window: int = DEFAULT_WINDOW,
+                             seed: int = 0) -> dict:
+    """
+    Time the one-pass computation, check it against pandas rolling stats and
+    check that incremental syncs match a full recomputation
+
+    Returns:
+        Dict of step -> seconds, plus the largest differences found
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2014-01-01", periods=n_days)
+    market = rng.normal(0.0003, 0.01, n_days)
+    betas = rng.uniform(0.2, 1.8, n_symbols)
+    returns = market[:, None] * betas + rng.normal(0, 0.012, (n_days, n_symbols))
+    close = pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=index,
+                         columns=[f"S{i}" for i in range(n_symbols)])
+    bench = pd.Series(100 * np.cumprod(1 + market), index=index, name="MKT")
+
+    out = {}
+    start = time.perf_counter()
+    full = rolling_relative_stats(close, bench, window)
+    out["one_pass_s"] = time.perf_counter() - start
+
+    asset, market_returns = close.iloc[:, :5].pct_change(), bench.pct_change()
+    expected = asset.rolling(window).cov(market_returns).div(market_returns.rolling(window).var(), axis=0)
+    out["beta_vs_pandas"] = float(np.nanmax(np.abs(full["beta"].iloc[:, :5] - expected)))
+
+    cache = RelativeStats("MKT", window)
+    start = time.perf_counter()
+    cache.sync(close.iloc[:-5], bench)
+    for i in range(5, 0, -1):
+        cache.sync(close.iloc[:len(close) - i + 1], bench)
+    out["incremental_s"] = time.perf_counter() - start
+    out["incremental_diff"] = max(float(np.nanmax(np.abs(cache.values(name) - full[name].to_numpy())))
+                                  for name in RELATIVE_STATS)
+
+    # A revised (still forming) last bar replaces the cached one
+    revised = close.copy()
+    revised.iloc[-1] *= 1.05
+    cache.sync(revised, bench)
+    expected = rolling_relative_stats(revised, bench, window)
+    out["revised_bar_diff"] = max(float(np.nanmax(np.abs(cache.values(name) - expected[name].to_numpy())))
+                                  for name in RELATIVE_STATS)
+    assert out["beta_vs_pandas"] < 1e-8 and out["incremental_diff"] < 1e-8 and out["revised_bar_diff"] < 1e-8, out
+    return out
+
+
+if __name__ == "__main__":
+    print("Rolling relative stats, 1000 symbols x 10 years, 63-bar window:")
+    print("=" * 60)
+    for name, value in benchmark_relative_stats().items():
+        print(f"{name:>18}: {value:.3g}")
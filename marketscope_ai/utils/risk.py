@@ -0,0 +1,302 @@
+# utils/risk.py
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import fill_gaps
+from utils.indicators import TRADING_DAYS
+
+
+CONFIDENCE = 0.95
+MC_PATHS = 20000
+# Memory cap for one batch of simulated (paths x horizon x assets) returns
+SIM_CHUNK_BYTES = 64 * 1024 * 1024
+EWMA_LAMBDA = 0.94  # RiskMetrics daily decay
+COVARIANCE_METHODS = ("ewma", "shrinkage", "sample")
+
+# Historical windows replayed against current weights (start, end inclusive)
+STRESS_SCENARIOS = {
+    "2008 Financial Crisis": ("2008-09-12", "2009-03-09"),
+    "2011 US Downgrade": ("2011-07-22", "2011-08-19"),
+    "2015 China Devaluation": ("2015-08-10", "2015-08-25"),
+    "2018 Q4 Selloff": ("2018-09-20", "2018-12-24"),
+    "2020 COVID Crash": ("2020-02-19", "2020-03-23"),
+    "2022 Rate Shock": ("2022-01-03", "2022-10-12"),
+}
+WORST_WINDOWS = (5, 20)
+
+
+def _price_frame(prices) -> pd.DataFrame:
+    """(time x asset) DataFrame from a Series or DataFrame of prices"""
+    if isinstance(prices, pd.Series):
+        return prices.to_frame(prices.name or "Close")
+    return prices
+
+
+def asset_returns(prices) -> np.ndarray:
+    """(T-1, N) simple returns; rows where any asset is missing are dropped"""
+    values = fill_gaps(np.asarray(prices, dtype=np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = values[1:] / values[:-1] - 1
+    return returns[np.isfinite(returns).all(axis=1)]
+
+
+# ---------- Covariance estimators ----------
+
+def sample_covariance(returns) -> np.ndarray:
+    """Unbiased sample covariance of (T, N) returns"""
+    returns = np.asarray(returns, dtype=np.float64)
+    return np.atleast_2d(np.cov(returns, rowvar=False))
+
+
+def ewma_covariance(returns, lam: float = EWMA_LAMBDA) -> np.ndarray:
+    """
+    Exponentially weighted covariance (RiskMetrics), zero-mean
+
+    The newest observation has weight (1 - lam), each older one lam times
+    the next; weights are renormalized over the available history.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    weights = lam ** np.arange(len(returns) - 1, -1, -1, dtype=np.float64)
+    weights /= weights.sum()
+    return (returns * weights[:, None]).T @ returns
+
+
+def shrinkage_covariance(returns) -> np.ndarray:
+    """
+    Ledoit-Wolf covariance: the sample covariance shrunk towards a scaled
+    identity with the analytically optimal intensity
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    t, n = returns.shape
+    x = returns - returns.mean(axis=0)
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    target = mu * np.eye(n)
+    delta = np.sum((sample - target) ** 2)
+    # sum_t ||x_t x_t' - S||^2 == sum_t ||x_t||^4 - T ||S||^2
+    beta = (np.sum(np.sum(x * x, axis=1) ** 2) - t * np.sum(sample ** 2)) / t ** 2
+    shrink = min(max(beta, 0.0), delta) / delta if delta > 0 else 1.0
+    return shrink * target + (1 - shrink) * sample
+
+
+def covariance(returns, method: str = "ewma") -> np.ndarray:
+    """Covariance of (T, N) returns by one of COVARIANCE_METHODS"""
+    if method == "ewma":
+        return ewma_covariance(returns)
+    if method == "shrinkage":
+        return shrinkage_covariance(returns)
+    return sample_covariance(returns)
+
+
+# ---------- VaR / CVaR ----------
+
+def historical_var(portfolio_returns, confidence: float = CONFIDENCE, horizon: int = 1):
+    """
+    (VaR, CVaR) as positive loss fractions from overlapping compounded
+    horizon-bar portfolio returns
+    """
+    returns = np.asarray(portfolio_returns, dtype=np.float64)
+    if len(returns) <= horizon:
+        return np.nan, np.nan
+    growth = np.concatenate([[1.0], np.cumprod(1 + returns)])
+    windows = growth[horizon:] / growth[:-horizon] - 1
+    cutoff = np.quantile(windows, 1 - confidence)
+    return -cutoff, -windows[windows <= cutoff].mean()
+
+
+def parametric_var(weights, cov, mean=None, confidence: float = CONFIDENCE, horizon: int = 1):
+    """(VaR, CVaR) under normally distributed returns, scaled by sqrt(horizon)"""
+    weights = np.asarray(weights, dtype=np.float64)
+    mu = float(weights @ mean) * horizon if mean is not None else 0.0
+    sigma = float(np.sqrt(max(weights @ cov @ weights, 0.0) * horizon))
+    normal = NormalDist()
+    z = normal.inv_cdf(1 - confidence)
+    return -(mu + z * sigma), -(mu - sigma * normal.pdf(z) / (1 - confidence))
+
+
+def _cholesky(cov) -> np.ndarray:
+    """Cholesky factor, with eigenvalues clipped at zero if cov is not positive definite"""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0.0, None))
+
+
+def simulate_portfolio_returns(weights, cov, mean=None, horizon: int = 1, n_paths: int = MC_PATHS,
+                               seed=None, chunk_bytes: int = SIM_CHUNK_BYTES) -> np.ndarray:
+    """
+    Monte Carlo horizon returns of a buy-and-hold portfolio
+
+    Per-bar asset returns are drawn from N(mean, cov) in batches of paths
+    sized to stay under chunk_bytes; each asset compounds over the horizon
+    and the portfolio is the weighted sum of asset growth.
+
+    Returns:
+        (n_paths,) simulated portfolio returns
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    n = len(weights)
+    factor = _cholesky(np.atleast_2d(cov)).T
+    mean = np.zeros(n) if mean is None else np.asarray(mean, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+
+    # Draws are float32: sampling noise dwarfs the rounding, and it halves
+    # both memory and the cost of the RNG and the correlating matmul.
+    factor = factor.astype(np.float32)
+    shift = (1 + mean).astype(np.float32)
+    # A batch holds the normal draws and the correlated returns
+    batch = max(1, int(chunk_bytes // (2 * 4 * horizon * n)))
+    out = np.empty(n_paths)
+    for start in range(0, n_paths, batch):
+        size = min(batch, n_paths - start)
+        shocks = rng.standard_normal((size * horizon, n), dtype=np.float32)
+        daily = shocks @ factor
+        daily += shift
+        growth = daily.reshape(size, horizon, n).prod(axis=1, dtype=np.float64)
+        out[start:start + size] = growth @ weights - weights.sum()
+    return out
+
+
+def monte_carlo_var(weights, cov, mean=None, confidence: float = CONFIDENCE, horizon: int = 1,
+                    n_paths: int = MC_PATHS, seed=None):
+    """(VaR, CVaR) from simulate_portfolio_returns"""
+    simulated = simulate_portfolio_returns(weights, cov, mean, horizon, n_paths, seed)
+    cutoff = np.quantile(simulated, 1 - confidence)
+    return -cutoff, -simulated[simulated <= cutoff].mean()
+
+
+# ---------- Stress tests ----------
+
+def stress_test(prices, weights=None, scenarios: dict = None, worst_windows=WORST_WINDOWS) -> pd.DataFrame:
+    """
+    Replay historical windows against the current weights
+
+    Each scenario applies every asset's return over the window (first to
+    last stored price inside it) with buy-and-hold weights. Assets without
+    prices at the window start are left out and reported through coverage
+    (the share of weight that was replayed). The worst rolling windows of
+    the stored history are added as generic scenarios. Named scenarios need
+    a DatetimeIndex.
+
+    Returns:
+        DataFrame of scenario, start, end, return and coverage
+    """
+    frame = _price_frame(prices)
+    values = fill_gaps(frame.to_numpy(dtype=np.float64))
+    n = values.shape[1]
+    weights = np.full(n, 1.0 / n) if weights is None else np.asarray(weights, dtype=np.float64)
+    dated = isinstance(frame.index, pd.DatetimeIndex)
+    naive = frame.index.tz_localize(None) if dated and frame.index.tz is not None else frame.index
+
+    rows = []
+    for name, (start, end) in ((scenarios or STRESS_SCENARIOS) if dated else {}).items():
+        inside = np.flatnonzero((naive >= pd.Timestamp(start)) & (naive <= pd.Timestamp(end)))
+        if len(inside) < 2:
+            rows.append({"scenario": name, "start": start, "end": end, "return": np.nan, "coverage": 0.0})
+            continue
+        first, last = values[inside[0]], values[inside[-1]]
+        covered = np.isfinite(first) & np.isfinite(last)
+        coverage = weights[covered].sum()
+        move = (last[covered] / first[covered] - 1) @ weights[covered] / coverage if coverage else np.nan
+        rows.append({"scenario": name, "start": start, "end": end, "return": move, "coverage": coverage})
+
+    # Worst stretches of the stored history for the current weights
+    returns = np.nan_to_num(np.diff(values, axis=0) / values[:-1], nan=0.0) @ weights
+    growth = np.concatenate([[1.0], np.cumprod(1 + returns)])
+    for window in worst_windows:
+        if len(growth) <= window:
+            continue
+        moves = growth[window:] / growth[:-window] - 1
+        worst = int(np.argmin(moves))
+        rows.append({
+            "scenario": f"Worst {window}-bar window",
+            "start": str(naive[worst].date()) if dated else str(naive[worst]),
+            "end": str(naive[worst + window].date()) if dated else str(naive[worst + window]),
+            "return": moves[worst],
+            "coverage": 1.0,
+        })
+    return pd.DataFrame(rows)
+
+
+def risk_report(prices, weights=None, confidence: float = CONFIDENCE, horizon: int = 1, method: str = "ewma",
+                n_paths: int = MC_PATHS, seed: int = 0, periods_per_year: int = TRADING_DAYS):
+    """
+    Historical, parametric and Monte Carlo VaR/CVaR plus stress tests
+
+    Args:
+        prices: Series (one asset) or (time x asset) DataFrame of prices
+        weights: Portfolio weights (default equal weight); normalized to sum to 1
+        confidence: VaR confidence level (e.g. 0.95)
+        horizon: Horizon in bars
+        method: Covariance estimator (one of COVARIANCE_METHODS)
+        n_paths: Monte Carlo paths
+
+    Returns:
+        Dict with 'var' and 'cvar' (method -> positive loss fraction),
+        'volatility' (annualized), 'stress' DataFrame and 'observations';
+        None when there are too few returns
+    """
+    frame = _price_frame(prices)
+    returns = asset_returns(frame.to_numpy(dtype=np.float64))
+    n = frame.shape[1]
+    if len(returns) < max(30, horizon + 2):
+        return None
+    weights = np.full(n, 1.0 / n) if weights is None else np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+
+    cov = covariance(returns, method)
+    mean = returns.mean(axis=0)
+    portfolio = returns @ weights
+
+    var, cvar = {}, {}
+    var["historical"], cvar["historical"] = historical_var(portfolio, confidence, horizon)
+    var["parametric"], cvar["parametric"] = parametric_var(weights, cov, mean, confidence, horizon)
+    var["monte_carlo"], cvar["monte_carlo"] = monte_carlo_var(weights, cov, mean, confidence, horizon, n_paths, seed)
+    return {
+        "confidence": confidence,
+        "horizon": horizon,
+        "method": method,
+        "var": var,
+        "cvar": cvar,
+        "volatility": float(np.sqrt(weights @ cov @ weights * periods_per_year)),
+        "stress": stress_test(frame, weights),
+        "observations": len(returns),
+    }
+
+
+def benchmark_risk(n_days: int = 2520, n_assets: int = 200, n_paths: int = 50000, horizon: int = 10,
+                   seed: int = 0) -> dict:
+    """
+    Time a full risk report on a correlated random universe and check the
+    Monte Carlo VaR against the parametric one (they agree for normal returns)
+
+    Returns:
+        Dict of step -> seconds, plus the relative VaR gap
+    """
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0003, 0.01, (n_days, 1))
+    returns = 0.8 * market + rng.normal(0, 0.012, (n_days, n_assets))
+    prices = pd.DataFrame(100 * np.cumprod(1 + returns, axis=0),
+                          index=pd.bdate_range("2014-01-01", periods=n_days))
+
+    out = {}
+    for method in COVARIANCE_METHODS:
+        start = time.perf_counter()
+        report = risk_report(prices, horizon=horizon, method=method, n_paths=n_paths)
+        out[method] = time.perf_counter() - start
+    gap = abs(report["var"]["monte_carlo"] / report["var"]["parametric"] - 1)
+    # Compounding over the horizon makes the simulated tail slightly different
+    assert gap < 0.05, f"Monte Carlo VaR off by {gap:.1%}"
+    out["mc_vs_parametric"] = gap
+    return out
+
+
+if __name__ == "__main__":
+    print("Risk report, 200 assets x 10 years, 50k paths x 10 bars:")
+    print("=" * 60)
+    for name, value in benchmark_risk().items():
+        print(f"{name:>18}: {value:.3f}")
@@ -0,0 +1,442 @@
+# utils/screener.py
+import ast
+import operator
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import fill_gaps
+from utils.bar_store import get_bar_store
+from utils.indicators import TRADING_DAYS
+from utils.sweeps import grid_ema, grid_rolling_std, grid_rsi, grid_sma
+
+
+# Screen field name -> bar store column
+SCREEN_FIELDS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+EXAMPLE_SCREEN = "rsi(14) < 30 and close > sma(200) and volume > 2 * volume_sma(20)"
+# EMAs are warmed up over this many spans; the weight left out is below 1e-8
+EMA_WARMUP_SPANS = 10
+# Memory cap for one batch of (bars x symbol) working arrays
+SCREEN_CHUNK_BYTES = 64 * 1024 * 1024
+SCREENER_CACHE_SIZE = 8
+
+
+# ---------- Screen term registry ----------
+
+class ScreenTerm:
+    """
+    A value a screen can compare: a bar field or an indicator
+
+    compute(fields, *params) maps a dict of (T, N) field matrices to one
+    (T, N) matrix. lookback(*params) is the number of bars, the current one
+    included, that determine one output row; it is what lets new bars be
+    screened from a short tail of history.
+    """
+
+    __slots__ = ("name", "inputs", "params", "lookback", "compute", "description")
+
+    def __init__(self, name, inputs, params, lookback, compute, description=""):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.params = tuple(params)
+        self.lookback = lookback
+        self.compute = compute
+        self.description = description
+
+
+SCREEN_TERMS = {}
+
+
+def register_term(name: str, inputs, params=(), lookback=None, description: str = ""):
+    """Decorator registering compute(fields, *params) -> (T, N) array"""
+    def decorator(compute):
+        SCREEN_TERMS[name] = ScreenTerm(name, inputs, params, lookback or (lambda *_: 1), compute, description)
+        return compute
+    return decorator
+
+
+for _field, _column in SCREEN_FIELDS.items():
+    register_term(_field, (_field,), description=f"{_column} of the bar")(
+        lambda fields, _field=_field: fields[_field]
+    )
+
+
+@register_term("sma", ("close",), (20,), lambda window: window, "Simple moving average of close")
+def _sma_term(fields, window):
+    return grid_sma(fields["close"], [window])[0]
+
+
+@register_term("ema", ("close",), (20,), lambda span: EMA_WARMUP_SPANS * span, "Exponential moving average of close")
+def _ema_term(fields, span):
+    return grid_ema(fields["close"], [span])[0]
+
+
+@register_term("rsi", ("close",), (14,), lambda period: period + 1, "Relative Strength Index (simple means)")
+def _rsi_term(fields, period):
+    return grid_rsi(fields["close"], [period])[0]
+
+
+@register_term("volume_sma", ("volume",), (20,), lambda window: window, "Average volume")
+def _volume_sma_term(fields, window):
+    return grid_sma(fields["volume"], [window])[0]
+
+
+@register_term("roc", ("close",), (20,), lambda window: window + 1, "Percent change over the window")
+def _roc_term(fields, window):
+    close = fields["close"]
+    out = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[window:] = 100 * (close[window:] / close[:-window] - 1)
+    return out
+
+
+@register_term("highest", ("close",), (252,), lambda window: window, "Highest close of the window")
+def _highest_term(fields, window):
+    return pd.DataFrame(fields["close"]).rolling(window).max().to_numpy()
+
+
+@register_term("lowest", ("close",), (252,), lambda window: window, "Lowest close of the window")
+def _lowest_term(fields, window):
+    return pd.DataFrame(fields["close"]).rolling(window).min().to_numpy()
+
+
+@register_term("volatility", ("close",), (20,), lambda window: window + 1, "Annualized volatility of returns")
+def _volatility_term(fields, window):
+    close = fields["close"]
+    returns = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = close[1:] / close[:-1] - 1
+    return grid_rolling_std(returns, [window])[0] * np.sqrt(TRADING_DAYS)
+
+
+# ---------- Screen conditions ----------
+
+# Phrasings accepted on top of Python expression syntax
+_ALIASES = ((r"\b(\d+)[- ]?(?:day|bar)s? (sma|ema|rsi|volume_sma|roc|highest|lowest|volatility)\b", r"\2(\1)"),
+            (r"×", "*"), (r"(?<=\d)\s*x\b", " *"), (r"\babove\b", ">"), (r"\bbelow\b", "<"))
+_COMPARE = {ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal}
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+def _term(node):
+    """(label, ScreenTerm, params) for a term node such as `close`, `rsi` or `sma(200)`; None for other nodes"""
+    if isinstance(node, ast.Name):
+        name, args = node.id, []
+    elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        name, args = node.func.id, node.args
+    else:
+        return None
+    term = SCREEN_TERMS.get(name)
+    if term is None:
+        raise ValueError(f"Unknown screen term '{name}' (known: {', '.join(SCREEN_TERMS)})")
+    if len(args) > len(term.params):
+        raise ValueError(f"{name} takes at most {len(term.params)} parameter(s)")
+    params = []
+    for arg in args:
+        value = arg.value if isinstance(arg, ast.Constant) else None
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 1 or value != int(value):
+            raise ValueError(f"Parameters of {name} must be whole numbers of bars")
+        params.append(int(value))
+    params = tuple(params) + term.params[len(params):]
+    label = f"{name}({', '.join(map(str, params))})" if term.params else name
+    return label, term, params
+
+
+class ScreenCondition:
+    """
+    A parsed screen such as "rsi(14) < 30 and close > sma(200)"
+
+    The text is parsed as a Python expression and checked against a small
+    grammar: numbers, SCREEN_TERMS names (bare for the default parameters
+    or called with bar counts), + - * /, comparisons and and / or / not.
+    "above", "below", "2x" / "2×" and "200-day sma" are read as >, <, 2 *
+    and sma(200). Evaluation works on whole (T, N) arrays of term values.
+    """
+
+    __slots__ = ("text", "tree", "terms")
+
+    def __init__(self, text: str):
+        normalized = " ".join(text.lower().split())
+        for pattern, replacement in _ALIASES:
+            normalized = re.sub(pattern, replacement, normalized)
+        try:
+            tree = ast.parse(normalized, mode="eval").body
+        except SyntaxError as e:
+            raise ValueError(f"Cannot parse screen '{text}': {e.msg}") from None
+        if not (isinstance(tree, (ast.Compare, ast.BoolOp))
+                or (isinstance(tree, ast.UnaryOp) and isinstance(tree.op, ast.Not))):
+            raise ValueError("A screen must be a comparison, e.g. 'close > sma(200)'")
+        self.text = normalized
+        self.tree = tree
+        self.terms = {}
+        self._collect(tree)
+        if not self.terms:
+            raise ValueError("A screen must reference at least one field or indicator")
+
+    def _collect(self, node):
+        """Validate the tree and record every term it references"""
+        found = _term(node)
+        if found is not None:
+            self.terms[found[0]] = found[1:]
+        elif isinstance(node, ast.BoolOp):
+            for value in node.values:
+                self._collect(value)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub, ast.UAdd)):
+            self._collect(node.operand)
+        elif isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+            for value in [node.left] + node.comparators:
+                self._collect(value)
+        elif isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            self._collect(node.left)
+            self._collect(node.right)
+        elif not (isinstance(node, ast.Constant) and isinstance(node.value, (int, float))
+                  and not isinstance(node.value, bool)):
+            raise ValueError(f"Unsupported expression in screen: '{ast.unparse(node)}'")
+
+    def inputs(self) -> list:
+        """Bar fields the terms read, in SCREEN_FIELDS order"""
+        needed = {name for term, _ in self.terms.values() for name in term.inputs}
+        return [name for name in SCREEN_FIELDS if name in needed]
+
+    def lookback(self) -> int:
+        """Bars of history (the current one included) that decide one screened bar"""
+        return max(term.lookback(*params) for term, params in self.terms.values())
+
+    def evaluate(self, values: dict) -> np.ndarray:
+        """Boolean array of the condition given term label -> array of values"""
+        return np.asarray(self._evaluate(self.tree, values), dtype=bool)
+
+    def _evaluate(self, node, values):
+        found = _term(node)
+        if found is not None:
+            return values[found[0]]
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.BoolOp):
+            parts = [self._evaluate(value, values) for value in node.values]
+            reduce = np.logical_and.reduce if isinstance(node.op, ast.And) else np.logical_or.reduce
+            return reduce(np.broadcast_arrays(*parts))
+        if isinstance(node, ast.UnaryOp):
+            operand = self._evaluate(node.operand, values)
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(operand)
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.Compare):
+            left, out = self._evaluate(node.left, values), True
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._evaluate(comparator, values)
+                out = out & _COMPARE[type(op)](left, right)
+                left = right
+            return out
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _ARITHMETIC[type(node.op)](self._evaluate(node.left, values), self._evaluate(node.right, values))
+
+
+# ---------- Incremental screener ----------
+
+def _filled_tail(values, offset: int) -> np.ndarray:
+    """Rows offset: of a (T, N) matrix with gaps filled, seeded by each column's last bar before offset"""
+    tail = values[offset:]
+    if offset and not np.isfinite(tail[0]).all():
+        before = np.isfinite(values[:offset])
+        last = offset - 1 - np.argmax(before[::-1], axis=0)
+        seed = np.where(before.any(axis=0), values[last, np.arange(values.shape[1])], np.nan)
+        return fill_gaps(np.vstack([seed, tail]))[1:]
+    return fill_gaps(tail)
+
+
+class Screener:
+    """
+    One screen condition kept up to date over a universe of symbols
+
+    Fields arrive as (time x symbol) matrices; gaps where a symbol has no
+    bar (another exchange's trading day) carry its previous bar forward so
+    rolling windows survive holidays. sync() screens only the bars after the
+    last one it has seen, plus that last bar again since a daily bar may
+    still be forming: indicators are computed over those bars and the
+    condition's lookback, not over the whole history. Per symbol it keeps
+    the latest term values, whether the condition holds, for how many
+    consecutive bars it has held and the date of the symbol's last real bar.
+    A symbol only matches where every term it references has a value.
+    """
+
+    __slots__ = ("condition", "symbols", "start", "end", "values", "match", "streak", "last_bar",
+                 "_base_streak")
+
+    def __init__(self, condition):
+        self.condition = condition if isinstance(condition, ScreenCondition) else ScreenCondition(condition)
+        self.symbols = None
+        self.start = self.end = None
+        self.values = {}
+        self.match = self.streak = self.last_bar = None
+        self._base_streak = None
+
+    def sync(self, fields: dict) -> pd.DataFrame:
+        """
+        Screen bars newer than the cached ones
+
+        A different symbol set or history before the cached start rebuilds
+        from scratch.
+
+        Args:
+            fields: SCREEN_FIELDS name -> (time x symbol) DataFrame for every
+                field in condition.inputs(), on a shared index and columns
+
+        Returns:
+            results()
+        """
+        frame = fields[self.condition.inputs()[0]]
+        symbols = list(frame.columns)
+        if symbols != self.symbols or self.end is None or (len(frame) and frame.index[0] < self.start):
+            n = len(symbols)
+            self.symbols, self.start, self.end = symbols, (frame.index[0] if len(frame) else None), None
+            self.values = {label: np.full(n, np.nan) for label in self.condition.terms}
+            self.match = np.zeros(n, dtype=bool)
+            self.streak = self._base_streak = np.zeros(n, dtype=np.int64)
+            self.last_bar = np.full(n, pd.NaT, dtype=object)
+
+        redo = frame.index >= self.end if self.end is not None else np.ones(len(frame), dtype=bool)
+        if not redo.any():
+            return self.results()
+        first = int(np.argmax(redo))
+
+        lookback = self.condition.lookback()
+        offset = max(0, first - lookback + 1)
+        filled = {name: _filled_tail(fields[name].to_numpy(dtype=np.float64), offset)
+                  for name in self.condition.inputs()}
+        seen = np.isfinite(fields[self.condition.inputs()[0]].to_numpy(dtype=np.float64)[first:])
+        latest = len(seen) - 1 - np.argmax(seen[::-1], axis=0)
+        has_bar = seen.any(axis=0)
+        self.last_bar[has_bar] = np.asarray(frame.index[first + latest[has_bar]], dtype=object)
+
+        terms = self.condition.terms
+        rows = max(1, SCREEN_CHUNK_BYTES // (8 * len(symbols) * (len(terms) + len(filled) + 4)))
+        streak = base = self._base_streak
+        for start in range(first, len(frame), rows):
+            stop = min(start + rows, len(frame))
+            low = max(offset, start - lookback + 1)
+            window = {name: values[low - offset:stop - offset] for name, values in filled.items()}
+            values = {label: term.compute(window, *params)[start - low:] for label, (term, params) in terms.items()}
+            match = self.condition.evaluate(values)
+            for value in values.values():
+                match &= np.isfinite(value)
+            for row in np.broadcast_to(match, (stop - start, len(symbols))):
+                base, streak = streak, np.where(row, streak + 1, 0)
+
+        self.values = {label: value[-1].copy() for label, value in values.items()}
+        self.match = streak > 0
+        self.streak, self._base_streak = streak, base
+        self.end = frame.index[-1]
+        return self.results()
+
+    def results(self) -> pd.DataFrame:
+        """One row per symbol: match, streak (bars), the latest term values and last_bar"""
+        table = pd.DataFrame({"match": self.match, "streak": self.streak, **self.values}, index=self.symbols)
+        table["last_bar"] = pd.to_datetime(pd.Series(self.last_bar, index=self.symbols))
+        return table
+
+    def matches(self) -> pd.DataFrame:
+        """Matching symbols, the newest matches (shortest streak) first"""
+        table = self.results()
+        table = table[table["match"]]
+        return table.rename_axis("symbol").sort_values(["streak", "symbol"])
+
+
+_screeners = {}
+
+
+def get_screener(symbols, condition, resolution: str = "1d") -> Screener:
+    """Process-wide cached Screener for a universe / condition / resolution (ValueError on a bad condition)"""
+    condition = condition if isinstance(condition, ScreenCondition) else ScreenCondition(condition)
+    key = (tuple(s.upper() for s in symbols), condition.text, resolution)
+    if key not in _screeners:
+        if len(_screeners) >= SCREENER_CACHE_SIZE:
+            _screeners.pop(next(iter(_screeners)))
+        _screeners[key] = Screener(condition)
+    return _screeners[key]
+
+
+def screen_universe(symbols, condition: str, resolution: str = "1d"):
+    """
+    Screen stored symbols, reusing the cached Screener so only new bars are screened
+
+    Symbols must already be in the bar store (see fetchers.financials.get_price_data).
+
+    Returns:
+        Screener, or None when the condition is invalid or no symbol is stored
+    """
+    try:
+        condition = ScreenCondition(condition)
+    except ValueError as e:
+        print(f"Invalid screen: {e}")
+        return None
+    store = get_bar_store()
+    names = condition.inputs()
+    base = store.matrix(symbols, SCREEN_FIELDS[names[0]], resolution)
+    if base.empty:
+        return None
+    fields = {names[0]: base}
+    for name in names[1:]:
+        fields[name] = store.matrix(base.columns, SCREEN_FIELDS[name], resolution).reindex(
+            index=base.index, columns=base.columns
+        )
+    screener = get_screener(base.columns, condition, resolution)
+    screener.sync(fields)
+    return screener
+
+
+def benchmark_screener(n_days: int = 1260, n_symbols: int = 3000, missing: float = 0.02, seed: int = 0) -> dict:
+    """
+    Time a full and an incremental screen of a random universe, check the
+    incremental result against a full rescreen and the term values against
+    the per-symbol indicator functions
+
+    Returns:
+        Dict of step -> seconds, the match count and the largest differences
+    """
+    from utils import indicators
+
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2019-01-01", periods=n_days)
+    columns = [f"S{i}" for i in range(n_symbols)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (n_days, n_symbols)), axis=0))
+    volume = rng.lognormal(13, 0.5, (n_days, n_symbols)) * np.where(rng.random((n_days, n_symbols)) < 0.02, 4, 1)
+    close[rng.random(close.shape) < missing] = np.nan
+    fields = {"close": pd.DataFrame(close, index=index, columns=columns),
+              "volume": pd.DataFrame(volume, index=index, columns=columns)}
+
+    out = {}
+    start = time.perf_counter()
+    full = Screener(EXAMPLE_SCREEN).sync(fields)
+    out["full_s"] = time.perf_counter() - start
+
+    incremental = Screener(EXAMPLE_SCREEN)
+    incremental.sync({name: frame.iloc[:-1] for name, frame in fields.items()})
+    start = time.perf_counter()
+    result = incremental.sync(fields)
+    out["one_new_bar_s"] = time.perf_counter() - start
+    out["matches"] = int(result["match"].sum())
+    assert result["match"].equals(full["match"]) and result["streak"].equals(full["streak"]), "incremental mismatch"
+    labels = list(incremental.condition.terms)
+    out["incremental_diff"] = float(np.nanmax(np.abs(result[labels].to_numpy() / full[labels].to_numpy() - 1)))
+
+    filled = fill_gaps(close[:, :20])
+    expected = np.column_stack([
+        [indicators.rsi(filled[:, j], 14)[-1] for j in range(20)],
+        [indicators.sma(filled[:, j], 200)[-1] for j in range(20)],
+        [indicators.sma(volume[:, j], 20)[-1] for j in range(20)],
+    ])
+    got = full[["rsi(14)", "sma(200)", "volume_sma(20)"]].to_numpy()[:20]
+    out["reference_diff"] = float(np.nanmax(np.abs(got - expected) / np.abs(expected)))
+    assert out["incremental_diff"] < 1e-8 and out["reference_diff"] < 1e-8, out
+    return out
+
+
+if __name__ == "__main__":
+    print("Technical screen, 3000 symbols x 5 years:")
+    print(f"  {EXAMPLE_SCREEN}")
+    print("=" * 60)
+    for name, value in benchmark_screener().items():
+        print(f"{name:>18}: {value:.4g}")
@@ -0,0 +1,203 @@
+# utils/search_index.py
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from utils.news_store import get_news_store
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+SENTIMENT_CODES = {"Positive": 0, "Neutral": 1, "Negative": 2}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens without stopwords"""
+    return [t for t in TOKEN_PATTERN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def to_epoch_seconds(value) -> float:
+    """Epoch seconds for a date/datetime (naive values are taken as UTC)"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.timestamp()
+
+
+def unindexed_rows(store, indexed: int, start: int, rows) -> list:
+    """
+    Rows a store listener holding the first `indexed` store rows still needs
+
+    rows start at store position start. Rows a failed notification skipped
+    are read back from the store; rows already held are dropped.
+    """
+    if start > indexed:
+        return store.rows[indexed:start] + list(rows)
+    return list(rows[indexed - start:])
+
+
+class _Postings:
+    """Growable postings list (doc IDs and term frequencies) with a cached array view"""
+
+    __slots__ = ("docs", "tfs", "_arrays")
+
+    def __init__(self):
+        self.docs = []
+        self.tfs = []
+        self._arrays = None
+
+    def append(self, doc: int, tf: int):
+        self.docs.append(doc)
+        self.tfs.append(tf)
+        self._arrays = None
+
+    def arrays(self):
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.docs, dtype=np.int64), np.asarray(self.tfs, dtype=np.float64))
+        return self._arrays
+
+
+class NewsSearchIndex:
+    """
+    Inverted index with BM25 ranking over the local article store
+
+    Documents are the store's rows (title + description). Per-document
+    metadata (length, symbol, publish time, sentiment) lives in NumPy arrays
+    so filters become boolean masks and scoring is a scatter-add per query
+    term. The index subscribes to the store and indexes new rows as they are
+    ingested, so it never needs a rebuild; doc IDs are store positions, and
+    rows a failed notification skipped are indexed with the next batch.
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else get_news_store()
+        self.postings = defaultdict(_Postings)
+        self.symbols = {}
+        self._lengths, self._symbol_codes, self._times, self._sentiments = [], [], [], []
+        self._total_length = 0
+        self._meta = None
+        self.add_rows(0, self.store.rows)
+        self.store.subscribe(self.add_rows)
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add_rows(self, start: int, rows):
+        """Index store rows from store position start on; positions are doc IDs"""
+        rows = unindexed_rows(self.store, len(self), start, rows)
+        if not rows:
+            return
+        published = pd.to_datetime([r.get("published_at") for r in rows], utc=True, errors="coerce")
+        published = np.asarray((published - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1), dtype=np.float64)
+        tokens = [tokenize(f"{row.get('title', '')} {row.get('description', '')}") for row in rows]
+
+        # Everything that can fail is done; the appends below keep all arrays in step
+        for row, ts, doc_tokens in zip(rows, published, tokens):
+            doc = len(self._lengths)
+            counts = defaultdict(int)
+            for token in doc_tokens:
+                counts[token] += 1
+            for token, tf in counts.items():
+                self.postings[token].append(doc, tf)
+
+            symbol = row.get("symbol", "")
+            self._lengths.append(len(doc_tokens))
+            self._symbol_codes.append(self.symbols.setdefault(symbol, len(self.symbols)))
+            self._times.append(ts)
+            self._sentiments.append(SENTIMENT_CODES.get(row.get("sentiment"), 1))
+            self._total_length += len(doc_tokens)
+        self._meta = None
+
+    def _metadata(self):
+        if self._meta is None:
+            self._meta = (
+                np.asarray(self._lengths, dtype=np.float64),
+                np.asarray(self._symbol_codes, dtype=np.int32),
+                np.asarray(self._times, dtype=np.float64),
+                np.asarray(self._sentiments, dtype=np.int8),
+            )
+        return self._meta
+
+    def _filter_mask(self, symbols=None, start=None, end=None, sentiments=None):
+        """Boolean doc mask for the given filters, or None when unfiltered"""
+        _, codes, times, sentiment_codes = self._metadata()
+        mask = None
+
+        def _and(m):
+            return m if mask is None else mask & m
+
+        if symbols:
+            wanted = [self.symbols[s.upper()] for s in symbols if s.upper() in self.symbols]
+            mask = _and(np.isin(codes, wanted))
+        if start is not None:
+            mask = _and(times >= to_epoch_seconds(start))
+        if end is not None:
+            mask = _and(times < to_epoch_seconds(end))
+        if sentiments:
+            mask = _and(np.isin(sentiment_codes, [SENTIMENT_CODES[s] for s in sentiments if s in SENTIMENT_CODES]))
+        return mask
+
+    def search(self, query: str, symbols=None, start=None, end=None, sentiments=None, limit: int = 50):
+        """
+        Rank stored articles for a free-text query with BM25
+
+        Args:
+            query: Free-text query, e.g. "guidance cut"
+            symbols: Optional list of symbols to restrict to
+            start, end: Optional publish date range (end exclusive)
+            sentiments: Optional list of sentiment labels
+            limit: Maximum number of hits
+
+        Returns:
+            List of (doc_id, score) tuples, best first
+        """
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self.postings]
+        n_docs = len(self)
+        if not terms or n_docs == 0:
+            return []
+
+        lengths, _, _, _ = self._metadata()
+        avg_length = self._total_length / n_docs if self._total_length else 1.0
+        norm = K1 * (1 - B + B * lengths / avg_length)
+
+        scores = np.zeros(n_docs)
+        for term in terms:
+            docs, tfs = self.postings[term].arrays()
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (K1 + 1) / (tfs + norm[docs])
+
+        mask = self._filter_mask(symbols, start, end, sentiments)
+        if mask is not None:
+            scores[~mask] = 0.0
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(doc), float(scores[doc])) for doc in hits]
+
+    def search_frame(self, query: str, **filters) -> pd.DataFrame:
+        """Search and return matching store rows (with a 'relevance' column), best first"""
+        hits = self.search(query, **filters)
+        frame = self.store.take([doc for doc, _ in hits])
+        frame["relevance"] = [score for _, score in hits]
+        return frame
+
+
+_index = None
+
+
+def get_search_index() -> NewsSearchIndex:
+    """Process-wide search index over the shared news store"""
+    global _index
+    if _index is None:
+        _index = NewsSearchIndex()
+    return _index
@@ -0,0 +1,254 @@
+# utils/simulation.py
+import threading
+import time
+
+import numpy as np
+
+from utils.parallel import get_thread_pool
+
+
+SIM_METHODS = {
+    "gbm": "Geometric Brownian motion",
+    "bootstrap": "Bootstrapped historical returns",
+}
+DEFAULT_PATHS = 100_000
+DEFAULT_HORIZON = 252
+FAN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Memory cap for one batch of (paths x horizon) working arrays
+SIM_CHUNK_BYTES = 64 * 1024 * 1024
+# Per-step log-return histogram used for streaming quantiles
+HISTOGRAM_BINS = 4096
+HISTOGRAM_SIGMAS = 10.0
+SAMPLE_PATHS = 30
+
+
+class PathSimulation:
+    """
+    Summary of simulated price paths, built without keeping the paths
+
+    Every horizon step has a fixed log-return histogram that each batch of
+    paths is added to; quantiles are read from it with linear interpolation
+    inside a bin (bins are HISTOGRAM_SIGMAS sigma wide over HISTOGRAM_BINS,
+    outliers land in the edge bins). Means and the share of paths above the
+    start price are exact running sums. A few whole paths are kept for
+    display.
+    """
+
+    __slots__ = ("method", "start_price", "horizon", "n_paths", "seed", "lo", "width", "counts",
+                 "price_sum", "above", "samples", "elapsed")
+
+    def __init__(self, method, start_price, horizon, n_paths, seed, center, half_width):
+        self.method = method
+        self.start_price = float(start_price)
+        self.horizon = int(horizon)
+        self.n_paths = 0
+        self.seed = seed
+        self.lo = center - half_width
+        self.width = 2 * half_width / HISTOGRAM_BINS
+        self.counts = np.zeros(self.horizon * HISTOGRAM_BINS, dtype=np.int64)
+        self.price_sum = np.zeros(self.horizon)
+        self.above = np.zeros(self.horizon, dtype=np.int64)
+        self.samples = None
+        self.elapsed = 0.0
+
+    def add(self, log_paths):
+        """Add a (paths x horizon) batch of cumulative log returns"""
+        bins = (log_paths - self.lo.astype(np.float32)) / self.width.astype(np.float32)
+        np.clip(bins, 0, HISTOGRAM_BINS - 1, out=bins)
+        flat = bins.astype(np.int32)
+        del bins
+        flat += np.arange(self.horizon, dtype=np.int32) * HISTOGRAM_BINS
+        self.counts += np.bincount(flat.ravel(), minlength=len(self.counts))
+        del flat
+        self.price_sum += np.exp(log_paths).sum(axis=0, dtype=np.float64)
+        self.above += (log_paths > 0).sum(axis=0)
+        if self.samples is None:
+            self.samples = np.asarray(log_paths[:SAMPLE_PATHS], dtype=np.float64)
+        self.n_paths += len(log_paths)
+
+    def quantiles(self, levels=FAN_QUANTILES) -> dict:
+        """Level -> price path of that quantile, with the start price at step 0"""
+        counts = self.counts.reshape(self.horizon, HISTOGRAM_BINS)
+        cdf = np.cumsum(counts, axis=1) / max(self.n_paths, 1)
+        steps = np.arange(self.horizon)
+        out = {}
+        for level in levels:
+            k = np.minimum((cdf < level).sum(axis=1), HISTOGRAM_BINS - 1)
+            below = np.where(k > 0, cdf[steps, np.maximum(k - 1, 0)], 0.0)
+            share = counts[steps, k] / max(self.n_paths, 1)
+            fraction = np.where(share > 0, (level - below) / np.where(share > 0, share, 1.0), 0.5)
+            log_price = self.lo + self.width * (k + np.clip(fraction, 0.0, 1.0))
+            out[level] = self.start_price * np.exp(np.concatenate([[0.0], log_price]))
+        return out
+
+    def mean_path(self) -> np.ndarray:
+        return np.concatenate([[self.start_price], self.start_price * self.price_sum / max(self.n_paths, 1)])
+
+    def prob_above(self) -> np.ndarray:
+        """Share of paths above the start price at each step"""
+        return self.above / max(self.n_paths, 1)
+
+    def sample_paths(self) -> np.ndarray:
+        """(SAMPLE_PATHS x horizon+1) example price paths"""
+        if self.samples is None:
+            return np.empty((0, self.horizon + 1))
+        return self.start_price * np.exp(np.hstack([np.zeros((len(self.samples), 1)), self.samples]))
+
+    def summary(self) -> dict:
+        """Final-step statistics"""
+        final = {level: path[-1] for level, path in self.quantiles((0.05, 0.5, 0.95)).items()}
+        return {
+            "start_price": self.start_price,
+            "expected_price": float(self.mean_path()[-1]),
+            "median_price": float(final[0.5]),
+            "p05": float(final[0.05]),
+            "p95": float(final[0.95]),
+            "prob_above_start": float(self.prob_above()[-1]),
+            "paths": self.n_paths,
+            "elapsed_s": self.elapsed,
+        }
+
+
+def log_returns(close) -> np.ndarray:
+    """Finite bar-to-bar log returns of a close series"""
+    values = np.asarray(close, dtype=np.float64)
+    values = values[np.isfinite(values) & (values > 0)]
+    return np.diff(np.log(values))
+
+
+def simulate_paths(close, horizon: int = DEFAULT_HORIZON, n_paths: int = DEFAULT_PATHS, method: str = "gbm",
+                   seed: int = None, block_size: int = 1, chunk_bytes: int = SIM_CHUNK_BYTES,
+                   progress=None, cancel: threading.Event = None):
+    """
+    Simulate forward price paths from a close history in memory-capped batches
+
+    GBM draws normal log returns with the historical mean and volatility;
+    bootstrap resamples historical log returns (in blocks of block_size
+    bars to keep short-range dependence). Each batch of paths is generated
+    as one (paths x horizon) float32 array, accumulated into a
+    PathSimulation and discarded, so memory is bounded by chunk_bytes
+    whatever n_paths is.
+
+    Args:
+        close: Close prices (the last one is the start price)
+        seed: Seed for reproducible paths (the same seed and chunk size give
+            the same result)
+        progress: Optional callable receiving the fraction completed
+        cancel: Optional threading.Event that stops after the current batch
+
+    Returns:
+        PathSimulation, or None with too little history or an unknown method
+    """
+    if method not in SIM_METHODS:
+        print(f"Unknown simulation method: {method}")
+        return None
+    history = log_returns(close)
+    if len(history) < 20:
+        return None
+    started = time.perf_counter()
+    mean, sigma = float(history.mean()), float(history.std(ddof=1))
+    steps = np.arange(1, horizon + 1)
+    simulation = PathSimulation(method, np.asarray(close, dtype=np.float64)[-1], horizon, n_paths, seed,
+                                mean * steps, HISTOGRAM_SIGMAS * max(sigma, 1e-8) * np.sqrt(steps))
+
+    # Per element: float32 paths and bin positions, int32 bin indices and
+    # bincount's int64 copy of them
+    batch = max(1, int(chunk_bytes // (20 * horizon)))
+    n_batches = -(-n_paths // batch)
+    generators = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_batches)]
+    history32 = history.astype(np.float32)
+    block_size = max(1, min(int(block_size), len(history)))
+    for b, rng in enumerate(generators):
+        if cancel is not None and cancel.is_set():
+            break
+        size = min(batch, n_paths - b * batch)
+        if method == "gbm":
+            paths = rng.standard_normal((size, horizon), dtype=np.float32)
+            paths *= sigma
+            paths += mean
+        else:
+            n_blocks = -(-horizon // block_size)
+            starts = rng.integers(0, len(history) - block_size + 1, (size, n_blocks), dtype=np.int32)
+            picks = (starts[:, :, None] + np.arange(block_size, dtype=np.int32)).reshape(size, -1)[:, :horizon]
+            paths = history32[picks]
+        np.cumsum(paths, axis=1, out=paths)
+        simulation.add(paths)
+        del paths
+        if progress is not None:
+            progress((b + 1) / n_batches)
+
+    simulation.elapsed = time.perf_counter() - started
+    return simulation
+
+
+class SimulationJob:
+    """A simulate_paths run on the background thread pool with progress and cancellation"""
+
+    __slots__ = ("future", "progress", "cancel_event", "params")
+
+    def __init__(self, close, **params):
+        self.progress = 0.0
+        self.cancel_event = threading.Event()
+        self.params = params
+        self.future = get_thread_pool().submit(
+            simulate_paths, np.asarray(close, dtype=np.float64), progress=self._report,
+            cancel=self.cancel_event, **params
+        )
+
+    def _report(self, fraction: float):
+        self.progress = fraction
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def result(self):
+        """The PathSimulation (None if the run failed)"""
+        try:
+            return self.future.result()
+        except Exception as e:
+            print(f"Error simulating paths: {e}")
+            return None
+
+
+def benchmark_simulation(n_paths: int = 1_000_000, horizon: int = 252, seed: int = 0) -> dict:
+    """
+    Simulate a million GBM and bootstrap paths, compare the GBM quantiles
+    with their closed form and record peak traced memory
+
+    Returns:
+        Dict of timings, the largest relative quantile error and peak MB
+    """
+    import tracemalloc
+    from statistics import NormalDist
+
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.015, 2520)))
+    history = log_returns(close)
+    mean, sigma = history.mean(), history.std(ddof=1)
+
+    out = {}
+    tracemalloc.start()
+    for method in SIM_METHODS:
+        simulation = simulate_paths(close, horizon, n_paths, method, seed=seed, block_size=5)
+        out[f"{method}_s"] = simulation.elapsed
+        if method == "gbm":
+            quantiles = simulation.quantiles()
+            error = 0.0
+            for level, path in quantiles.items():
+                exact = close[-1] * np.exp(mean * horizon + NormalDist().inv_cdf(level) * sigma * np.sqrt(horizon))
+                error = max(error, abs(path[-1] / exact - 1))
+            out["gbm_quantile_error"] = error
+    out["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    assert out["gbm_quantile_error"] < 0.01, out
+    return out
+
+
+if __name__ == "__main__":
+    print("Monte Carlo paths, 1,000,000 x 252 bars:")
+    print("=" * 60)
+    for name, value in benchmark_simulation().items():
+        print(f"{name:>20}: {value:.4g}")
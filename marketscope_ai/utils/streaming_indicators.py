@@ -0,0 +1,449 @@
+# utils/streaming_indicators.py
+import json
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_store import BASE_INTERVALS, DATA_DIR
+from utils.indicators import TRADING_DAYS
+
+
+INDICATOR_STATE_DIR = os.path.join(DATA_DIR, "indicators")
+# Intraday intervals whose indicators are updated bar by bar
+LIVE_INTERVALS = ("1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h")
+
+
+class _RollingStats:
+    """
+    Fixed-size window with O(1) mean and sample variance (sliding Welford)
+
+    The running sums are recomputed from the buffer once per full pass over
+    the window, which bounds floating-point drift at amortized O(1) cost.
+    """
+
+    __slots__ = ("size", "buffer", "pos", "count", "mean", "m2", "since_resync")
+
+    def __init__(self, size: int):
+        self.size = int(size)
+        self.buffer = np.zeros(self.size)
+        self.pos = self.count = self.since_resync = 0
+        self.mean = self.m2 = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    def push(self, x: float):
+        if self.count < self.size:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = self.buffer[self.pos]
+            new_mean = self.mean + (x - old) / self.size
+            self.m2 += (x - old) * (x - new_mean + old - self.mean)
+            self.mean = new_mean
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.size
+
+        self.since_resync += 1
+        if self.full and self.since_resync >= self.size:
+            self.mean = float(self.buffer.mean())
+            self.m2 = float(((self.buffer - self.mean) ** 2).sum())
+            self.since_resync = 0
+
+    def variance(self) -> float:
+        if not self.full or self.size < 2:
+            return math.nan
+        return max(self.m2, 0.0) / (self.size - 1)
+
+    def to_state(self) -> dict:
+        return {
+            "size": self.size, "buffer": self.buffer.tolist(), "pos": self.pos, "count": self.count,
+            "mean": self.mean, "m2": self.m2, "since_resync": self.since_resync,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        stats = cls(state["size"])
+        stats.buffer = np.asarray(state["buffer"], dtype=np.float64)
+        stats.pos, stats.count = state["pos"], state["count"]
+        stats.mean, stats.m2 = state["mean"], state["m2"]
+        stats.since_resync = state["since_resync"]
+        return stats
+
+
+class StreamingIndicator(ABC):
+    """
+    Base class: update() consumes one close and returns the latest value
+
+    Subclasses list their constructor parameters in PARAMS and their mutable
+    state in STATE; to_state()/from_state() round-trip both through plain
+    JSON-compatible dicts.
+    """
+
+    PARAMS = ()
+    STATE = ()
+
+    @abstractmethod
+    def update(self, close: float):
+        """Consume one close and return the latest value"""
+
+    def to_state(self) -> dict:
+        state = {"type": type(self).__name__}
+        state.update((name, getattr(self, name)) for name in self.PARAMS)
+        for name in self.STATE:
+            value = getattr(self, name)
+            state[name] = value.to_state() if hasattr(value, "to_state") else value
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict):
+        indicator = cls(**{name: state[name] for name in cls.PARAMS})
+        for name in cls.STATE:
+            current = getattr(indicator, name)
+            value = state[name]
+            if hasattr(current, "from_state"):
+                value = type(current).from_state(value)
+            setattr(indicator, name, value)
+        return indicator
+
+
+class StreamingSMA(StreamingIndicator):
+    """Simple moving average (NaN until the window is full)"""
+
+    PARAMS = ("window",)
+    STATE = ("stats",)
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.stats = _RollingStats(window)
+
+    def update(self, close: float) -> float:
+        self.stats.push(close)
+        return self.stats.mean if self.stats.full else math.nan
+
+
+class StreamingEMA(StreamingIndicator):
+    """Bias-adjusted EMA with alpha = 2 / (span + 1), matching indicators.ema"""
+
+    PARAMS = ("span",)
+    STATE = ("numerator", "denominator")
+
+    def __init__(self, span: int = 20):
+        self.span = span
+        self.numerator = self.denominator = 0.0
+
+    def update(self, close: float) -> float:
+        decay = 1.0 - 2.0 / (self.span + 1.0)
+        self.numerator = close + decay * self.numerator
+        self.denominator = 1.0 + decay * self.denominator
+        return self.numerator / self.denominator
+
+
+class StreamingBollinger(StreamingIndicator):
+    """(middle, upper, lower) Bollinger Bands from a sliding Welford window"""
+
+    PARAMS = ("window", "n_std")
+    STATE = ("stats",)
+
+    def __init__(self, window: int = 20, n_std: float = 2.0):
+        self.window, self.n_std = window, n_std
+        self.stats = _RollingStats(window)
+
+    def update(self, close: float):
+        self.stats.push(close)
+        if not self.stats.full:
+            return math.nan, math.nan, math.nan
+        width = self.n_std * math.sqrt(self.stats.variance())
+        return self.stats.mean, self.stats.mean + width, self.stats.mean - width
+
+
+class StreamingRSI(StreamingIndicator):
+    """RSI with simple ("sma") or Wilder ("wilder") averaging, matching indicators.rsi"""
+
+    PARAMS = ("period", "method")
+    STATE = ("prev_close", "gains", "losses", "avg_gain", "avg_loss", "seen")
+
+    def __init__(self, period: int = 14, method: str = "sma"):
+        self.period, self.method = period, method
+        self.prev_close = None
+        self.gains, self.losses = _RollingStats(period), _RollingStats(period)
+        self.avg_gain = self.avg_loss = 0.0
+        self.seen = 0
+
+    def update(self, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return math.nan
+        delta = close - self.prev_close
+        self.prev_close = close
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self.seen += 1
+
+        if self.method == "wilder" and self.seen > self.period:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        else:
+            self.gains.push(gain)
+            self.losses.push(loss)
+            if not self.gains.full:
+                return math.nan
+            self.avg_gain, self.avg_loss = self.gains.mean, self.losses.mean
+
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else math.nan
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+
+class StreamingMACD(StreamingIndicator):
+    """(macd, signal, histogram) from three streaming EMAs"""
+
+    PARAMS = ("fast", "slow", "signal")
+    STATE = ("fast_ema", "slow_ema", "signal_ema")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast, self.slow, self.signal = fast, slow, signal
+        self.fast_ema, self.slow_ema, self.signal_ema = StreamingEMA(fast), StreamingEMA(slow), StreamingEMA(signal)
+
+    def update(self, close: float):
+        line = self.fast_ema.update(close) - self.slow_ema.update(close)
+        signal_line = self.signal_ema.update(line)
+        return line, signal_line, line - signal_line
+
+
+class StreamingVolatility(StreamingIndicator):
+    """Annualized rolling standard deviation of bar returns"""
+
+    PARAMS = ("window", "periods_per_year")
+    STATE = ("prev_close", "stats")
+
+    def __init__(self, window: int = 20, periods_per_year: int = TRADING_DAYS):
+        self.window, self.periods_per_year = window, periods_per_year
+        self.prev_close = None
+        self.stats = _RollingStats(window)
+
+    def update(self, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return math.nan
+        self.stats.push(close / self.prev_close - 1.0)
+        self.prev_close = close
+        return math.sqrt(self.stats.variance() * self.periods_per_year)
+
+
+STREAMING_INDICATORS = {
+    cls.__name__: cls
+    for cls in (StreamingSMA, StreamingEMA, StreamingBollinger, StreamingRSI, StreamingMACD, StreamingVolatility)
+}
+
+
+def indicator_from_state(state: dict) -> StreamingIndicator:
+    """Rebuild a streaming indicator from its to_state() dict"""
+    return STREAMING_INDICATORS[state["type"]].from_state(state)
+
+
+def default_live_indicators(periods_per_year: int = TRADING_DAYS) -> dict:
+    """The chart indicators with their default parameters"""
+    return {
+        "SMA 20": StreamingSMA(20),
+        "EMA 20": StreamingEMA(20),
+        "Bollinger 20": StreamingBollinger(20),
+        "RSI 14": StreamingRSI(14, method="wilder"),
+        "MACD 12/26/9": StreamingMACD(12, 26, 9),
+        "Volatility 20": StreamingVolatility(20, periods_per_year),
+    }
+
+
+class LiveIndicators:
+    """
+    Named streaming indicators for one symbol/interval, fed only with new bars
+
+    last_time (int64 epoch ns) records the newest bar consumed, so sync() can
+    be called with the full bar history on every rerun and costs O(new bars).
+    The newest bar may still be forming, so the indicator state from before
+    it is kept and every sync restores it and feeds that bar again with its
+    current close. State is persisted as JSON so it survives restarts.
+    """
+
+    def __init__(self, indicators: dict = None, periods_per_year: int = TRADING_DAYS):
+        # periods_per_year only configures the default set; given indicators keep their own
+        self.indicators = indicators if indicators is not None else default_live_indicators(periods_per_year)
+        self.last_time = None
+        self.values = {}
+        self._base = None
+
+    def sync(self, bars) -> dict:
+        """
+        Feed bars from last_time on, redoing the last consumed bar
+
+        Args:
+            bars: OHLCV container (time-sorted)
+
+        Returns:
+            Dict of indicator name -> latest value
+        """
+        if bars is None or bars.empty:
+            return self.values
+        start = 0
+        if self.last_time is not None:
+            start = int(np.searchsorted(bars.time, self.last_time, side="left"))
+            if start < len(bars) and bars.time[start] == self.last_time and self._base is not None:
+                self.indicators = {name: indicator_from_state(s) for name, s in self._base.items()}
+            else:
+                start = int(np.searchsorted(bars.time, self.last_time, side="right"))
+        closes = bars.close[start:].tolist()
+        for i, close in enumerate(closes):
+            if i == len(closes) - 1:
+                self._base = {name: ind.to_state() for name, ind in self.indicators.items()}
+            self.values = {name: ind.update(close) for name, ind in self.indicators.items()}
+        if closes:
+            self.last_time = int(bars.time[-1])
+        return self.values
+
+    def to_state(self) -> dict:
+        return {
+            "last_time": self.last_time,
+            "values": self.values,
+            "indicators": {name: ind.to_state() for name, ind in self.indicators.items()},
+            "base": self._base,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        live = cls({name: indicator_from_state(s) for name, s in state["indicators"].items()})
+        live.last_time = state["last_time"]
+        live.values = {name: tuple(v) if isinstance(v, list) else v for name, v in state["values"].items()}
+        live._base = state.get("base")
+        return live
+
+    def save(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_state(), f)
+        except Exception as e:
+            print(f"Error saving indicator state to {path}: {e}")
+
+    @classmethod
+    def load(cls, path: str):
+        """Saved indicators, or None if there is no (readable) state"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls.from_state(json.load(f))
+        except Exception as e:
+            print(f"Error loading indicator state from {path}: {e}")
+            return None
+
+
+# Calendar intervals yfinance serves that have no fixed bar length
+CALENDAR_PERIODS = {"1mo": 12, "3mo": 4, "6mo": 2, "1y": 1}
+
+# Regular trading session of exchange-traded markets (US equities)
+SESSION_LENGTH = pd.Timedelta(hours=6, minutes=30)
+
+
+def periods_per_year(interval: str, crypto: bool = False) -> int:
+    """
+    Bars per year for annualizing volatility and risk
+
+    Crypto trades 24/7, so its bars fill the calendar year. Session-traded
+    markets have TRADING_DAYS sessions a year, each split into bars.
+    """
+    if interval in CALENDAR_PERIODS:
+        return CALENDAR_PERIODS[interval]
+    size = BASE_INTERVALS[interval]
+    if crypto or size > pd.Timedelta(days=1):
+        return int(pd.Timedelta(days=365) / size)
+    return TRADING_DAYS * math.ceil(SESSION_LENGTH / size)
+
+
+def _state_path(symbol: str, interval: str) -> str:
+    return os.path.join(INDICATOR_STATE_DIR, f"{symbol.upper()}_{interval}.json")
+
+
+_live = {}
+
+
+def get_live_indicators(symbol: str, interval: str, periods_per_year: int = TRADING_DAYS) -> LiveIndicators:
+    """Process-wide live indicators for a symbol/interval (restored from disk when saved)"""
+    key = (symbol.upper(), interval)
+    if key not in _live:
+        live = LiveIndicators.load(_state_path(symbol, interval))
+        if live is not None and any(getattr(ind, "periods_per_year", periods_per_year) != periods_per_year
+                                    for ind in live.indicators.values()):
+            # Saved with another annualization; replaying the history is cheaper than mixing scales
+            live = None
+        _live[key] = live or LiveIndicators(periods_per_year=periods_per_year)
+    return _live[key]
+
+
+def save_live_indicators(symbol: str, interval: str):
+    live = _live.get((symbol.upper(), interval))
+    if live is not None:
+        live.save(_state_path(symbol, interval))
+
+
+# Verification function
+def verify_streaming(n: int = 5000, seed: int = 0) -> dict:
+    """
+    Feed a random walk bar by bar and compare against the batch implementations
+
+    Also checks that a save/restore halfway through gives the same result.
+
+    Returns:
+        Dict of indicator -> max absolute difference
+    """
+    from utils import indicators
+
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    middle, upper, lower = indicators.bollinger_bands(close, 20)
+    macd, signal, hist = indicators.macd(close, 12, 26, 9)
+    batch = {
+        "sma": (StreamingSMA(20), [indicators.sma(close, 20)]),
+        "ema": (StreamingEMA(20), [indicators.ema(close, 20)]),
+        "bollinger": (StreamingBollinger(20), [middle, upper, lower]),
+        "rsi": (StreamingRSI(14), [indicators.rsi(close, 14)]),
+        "rsi_wilder": (StreamingRSI(14, method="wilder"), [indicators.rsi(close, 14, method="wilder")]),
+        "macd": (StreamingMACD(12, 26, 9), [macd, signal, hist]),
+        "volatility": (StreamingVolatility(20), [indicators.rolling_volatility(close, 20)]),
+    }
+
+    errors = {}
+    for name, (indicator, expected) in batch.items():
+        outputs = []
+        for i, value in enumerate(close.tolist()):
+            if i == n // 2:
+                indicator = indicator_from_state(json.loads(json.dumps(indicator.to_state())))
+            out = indicator.update(value)
+            outputs.append(out if isinstance(out, tuple) else (out,))
+        got = np.asarray(outputs, dtype=np.float64).T
+        errors[name] = max(
+            float(np.nanmax(np.abs(g - e))) if np.isnan(g).sum() == np.isnan(e).sum() else math.inf
+            for g, e in zip(got, expected)
+        )
+    return errors
+
+
+if __name__ == "__main__":
+    print("Streaming vs batch indicators (max abs error):")
+    print("=" * 50)
+    for name, error in verify_streaming().items():
+        print(f"{name:>12}: {error:.3e}")
+
+    live = LiveIndicators()
+    closes = 100 + np.cumsum(np.random.default_rng(1).normal(0, 0.5, 100_000))
+    start = time.perf_counter()
+    for value in closes.tolist():
+        for indicator in live.indicators.values():
+            indicator.update(value)
+    elapsed = time.perf_counter() - start
+    print(f"\nPer-bar update of {len(live.indicators)} indicators: {elapsed / len(closes) * 1e6:.1f} us")
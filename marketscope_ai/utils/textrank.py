@@ -0,0 +1,93 @@
+# utils/textrank.py
+import re
+
+import numpy as np
+
+from utils.search_index import tokenize
+
+
+# Break after terminal punctuation, but not after initialisms such as "U.S."
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])(?<![A-Z]\.[A-Z]\.)\s+(?=[A-Za-z0-9$\"'(])")
+DAMPING = 0.85
+
+
+def split_sentences(text: str) -> list:
+    """Split text into sentences on terminal punctuation and line breaks"""
+    sentences = []
+    for block in re.split(r"[\r\n]+", text or ""):
+        block = block.strip(" -•*\t")
+        if block:
+            sentences.extend(s.strip() for s in SENTENCE_PATTERN.split(block) if s.strip())
+    return sentences
+
+
+def _tfidf_matrix(sentences):
+    """L2-normalized TF-IDF rows (sentences x vocabulary) as a dense array"""
+    tokenized = [tokenize(s) for s in sentences]
+    vocab = {}
+    for tokens in tokenized:
+        for token in tokens:
+            vocab.setdefault(token, len(vocab))
+    matrix = np.zeros((len(sentences), max(len(vocab), 1)))
+    for i, tokens in enumerate(tokenized):
+        for token in tokens:
+            matrix[i, vocab[token]] += 1.0
+
+    df = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1 + len(sentences)) / (1 + df)) + 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def textrank_scores(sentences, iterations: int = 50, tol: float = 1e-6):
+    """
+    Score sentences with TextRank over a cosine-similarity graph
+
+    Returns:
+        Array of sentence scores (higher is more central)
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.empty(0)
+
+    tfidf = _tfidf_matrix(sentences)
+    similarity = tfidf @ tfidf.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1.0 / n), where=out_weight > 0)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        updated = (1 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tol:
+            return updated
+        scores = updated
+    return scores
+
+
+def extractive_summary(text: str, n_sentences: int = 3, max_chars: int = None) -> list:
+    """
+    Pick the most central sentences of a text (deduplicated, in original order)
+
+    Args:
+        text: Input text (e.g. concatenated news descriptions)
+        n_sentences: Number of sentences to keep
+        max_chars: Optional character budget for the selected sentences
+
+    Returns:
+        List of selected sentences
+    """
+    sentences = list(dict.fromkeys(split_sentences(text)))
+    if len(sentences) <= n_sentences:
+        return sentences
+
+    ranked = np.argsort(-textrank_scores(sentences), kind="stable")
+    chosen, used = [], 0
+    for i in ranked:
+        if len(chosen) == n_sentences:
+            break
+        if max_chars and used + len(sentences[i]) > max_chars and chosen:
+            continue
+        chosen.append(i)
+        used += len(sentences[i])
+    return [sentences[i] for i in sorted(chosen)]